@@ -0,0 +1,121 @@
+import json
+import posixpath
+
+EMPTY_API_REFERENCE = "No functions or classes were found by the parser."
+
+
+def iter_api_reference_text(entries):
+    """
+    Yields the API reference text for (file_path, classes, functions)
+    entries, one line at a time.
+    """
+    empty = True
+    for file_path, classes, functions in entries:
+        if not classes and not functions:
+            continue
+        if empty:
+            yield "### API Reference Data\n\n"
+            empty = False
+        yield f"**File: `{file_path}`**\n"
+        if classes:
+            yield "  - Classes: " + ", ".join(classes) + "\n"
+        if functions:
+            yield "  - Functions: " + ", ".join(f"{name}()" for name in functions) + "\n"
+        yield "\n"
+    if empty:
+        yield EMPTY_API_REFERENCE
+
+
+def render_api_reference(entries):
+    """Renders (file_path, classes, functions) entries as API reference text."""
+    return "".join(iter_api_reference_text(entries))
+
+
+def group_by_package(api_reference):
+    """
+    Groups structured API reference data ({file: {"classes", "functions"}})
+    by directory. Returns {package: [(file, classes, functions), ...]},
+    with "" for the repo root.
+    """
+    packages = {}
+    for file_path, symbols in api_reference.items():
+        package = posixpath.dirname(file_path)
+        packages.setdefault(package, []).append((file_path, symbols["classes"], symbols["functions"]))
+    return packages
+
+
+class ApiIndex:
+    """
+    Per-file index of the classes and functions found by the analyzer,
+    updated as each file's symbol record is merged into (or removed
+    from) the CCG, so lookups never have to scan the graph.
+
+    `files` maps a repo-relative path to {"classes": [...],
+    "functions": [...]} in definition order, using qualified names
+    (`Class.method`). `definitions` maps both qualified and simple
+    names to the set of paths defining them.
+    """
+    def __init__(self):
+        self.files = {}
+        self.definitions = {}
+
+    def add_file(self, file_path, record):
+        """Indexes the classes and functions of one per-file symbol record."""
+        self.remove_file(file_path)
+        if not record["classes"] and not record["functions"]:
+            return
+        # A name redefined in the same file (e.g. under `if`/`else`) is listed once.
+        symbols = {
+            "classes": list(dict.fromkeys(record["classes"])),
+            "functions": list(dict.fromkeys(record["functions"])),
+        }
+        self.files[file_path] = symbols
+        for name in symbols["classes"] + symbols["functions"]:
+            self.definitions.setdefault(name, set()).add(file_path)
+            short_name = name.rsplit('.', 1)[-1]
+            if short_name != name:
+                self.definitions.setdefault(short_name, set()).add(file_path)
+
+    def remove_file(self, file_path):
+        symbols = self.files.pop(file_path, None)
+        if symbols is None:
+            return
+        for name in symbols["classes"] + symbols["functions"]:
+            for key in {name, name.rsplit('.', 1)[-1]}:
+                paths = self.definitions.get(key)
+                if paths is not None:
+                    paths.discard(file_path)
+                    if not paths:
+                        del self.definitions[key]
+
+    def symbols_in(self, file_path):
+        """Returns {"classes": [...], "functions": [...]} for a file (empty if unknown)."""
+        symbols = self.files.get(file_path)
+        if symbols is None:
+            return {"classes": [], "functions": []}
+        return {"classes": list(symbols["classes"]), "functions": list(symbols["functions"])}
+
+    def files_defining(self, name):
+        """Returns the sorted paths of files defining `name` (qualified or simple)."""
+        return sorted(self.definitions.get(name, ()))
+
+    def entries(self):
+        """Yields (file_path, classes, functions) in the order files were indexed."""
+        for file_path, symbols in self.files.items():
+            yield file_path, symbols["classes"], symbols["functions"]
+
+    def to_dict(self):
+        return {file_path: self.symbols_in(file_path) for file_path in self.files}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def render(self):
+        return render_api_reference(self.entries())
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, file_path):
+        return file_path in self.files
+
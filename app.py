@@ -1,10 +1,21 @@
 import streamlit as st
-from repo_mapper import RepoMapper
-from code_analyzer import CodeAnalyzer
-from doc_genie import DocGenie
-import traceback
+# Only light modules are imported up front so every rerun and page load
+# stays fast; git, tree-sitter and the Gemini client are imported by the
+# stages that use them.
+from llm_cache import LLMCache
+from llm_resilience import LLMError
+from pipeline import Pipeline
+from job_queue import FAILED, QUEUED, RUNNING, JobManager
+from artifact_store import ArtifactStore
+from symbol_index import SymbolIndex
+from instrumentation import Instrumentation, breakdown
+import json
+import time
 from datetime import datetime
 
+JOB_POLL_INTERVAL = 1.0
+RECENT_PROJECTS_PAGE_SIZE = 20
+
 st.set_page_config(
     page_title="Mwita's Code Genius",
     page_icon="💡",
@@ -13,9 +24,10 @@ st.set_page_config(
 
 if 'page' not in st.session_state:
     st.session_state.page = "🏠 Home"
-if 'projects' not in st.session_state:
-   
-    st.session_state.projects = []
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+if 'replay_run_id' not in st.session_state:
+    st.session_state.replay_run_id = None
 
 
 st.markdown("""
@@ -111,7 +123,7 @@ with st.sidebar:
     
     page = st.radio(
         "Choose Action",
-        ["🏠 Home", "🚀 Generate Documentation", "📈 Recent Projects"],
+        ["🏠 Home", "🚀 Generate Documentation", "📈 Recent Projects", "🔎 Symbol Search"],
         label_visibility="collapsed",
         key="page_radio" 
     )
@@ -121,6 +133,331 @@ with st.sidebar:
 def go_to_generate_docs():
     st.session_state.page_radio = "🚀 Generate Documentation"
 
+@st.cache_resource
+def get_job_manager():
+    """One job manager per server process, shared by every session."""
+    return JobManager()
+
+
+@st.cache_resource
+def get_artifact_store():
+    """Stored runs and their docs, shared by every session."""
+    return ArtifactStore()
+
+
+@st.cache_resource
+def get_llm_cache():
+    """One LLM response cache (and SQLite connection) shared by every session."""
+    return LLMCache()
+
+
+@st.cache_resource
+def get_symbol_index():
+    """The symbols of every documented repository, shared by every session."""
+    return SymbolIndex()
+
+
+@st.cache_resource
+def get_llm_resilience():
+    """
+    One ResilientCaller for every job, so hedging learns from all recent
+    calls and the circuit breaker sees a degraded provider across runs.
+    """
+    from llm_resilience import ResilientCaller
+    return ResilientCaller()
+
+
+@st.cache_resource
+def get_rate_limiter():
+    """One Gemini rate limit for the whole server process, not one per job."""
+    from doc_genie import DEFAULT_REQUESTS_PER_MINUTE
+    from rate_limiter import RateLimiter
+    return RateLimiter(DEFAULT_REQUESTS_PER_MINUTE)
+
+
+def output_variant(options):
+    """The options that change the generated output, as an artifact store key."""
+    return json.dumps(
+        {"map_reduce_docs": options["map_reduce_docs"], "graph_focus": options["graph_focus"]},
+        sort_keys=True
+    )
+
+
+def result_from_run(run, store):
+    """Rebuilds a job result from a stored run."""
+    metadata = run["metadata"]
+    return {
+        "repo_name": run["repo_name"],
+        "status": run["status"],
+        "docs": store.load(run, "docs"),
+        "pipeline_summary": metadata.get("pipeline_summary"),
+        "prompt_report": metadata.get("prompt_report"),
+        "cache_stats": metadata.get("cache_stats"),
+        "metrics": metadata.get("metrics"),
+        "stored_run": run,
+    }
+
+
+def run_documentation_job(job, github_url, api_key, options, store, llm_cache, symbol_index, resilience,
+                          rate_limiter):
+    """
+    Clones, analyzes and documents `github_url` on a job worker thread.
+    Reports progress and streams the docs into `job`; must not call
+    Streamlit (including its cached resources, which the caller passes
+    in as `store`, `llm_cache`, `symbol_index`, `resilience` and
+    `rate_limiter`), since that only works on the script thread. Every run is recorded in the artifact
+    store, failed ones included.
+    """
+    started = time.time()
+    try:
+        return generate_documentation(
+            job, github_url, api_key, options, store, llm_cache, symbol_index, resilience, rate_limiter
+        )
+    except Exception as e:
+        status = "Error (LLM)" if isinstance(e, LLMError) else "Error (Runtime)"
+        store.record_failure(
+            github_url, job.label, None, output_variant(options), status, duration=time.time() - started
+        )
+        raise
+
+
+def reuses_stored_results(options):
+    """Regenerating or profiling a run means doing the work again."""
+    return not (options["bypass_llm_cache"] or options["profile"])
+
+
+def generate_documentation(job, github_url, api_key, options, store, llm_cache, symbol_index, resilience,
+                           rate_limiter):
+    from ccg_mermaid import DEFAULT_NODE_BUDGET
+    from code_analyzer import CodeAnalyzer
+    from doc_genie import DocGenie
+    from parse_cache import ParseCache
+    from repo_mapper import RepoMapper
+
+    variant = output_variant(options)
+    started = time.time()
+    instrumentation = Instrumentation(profile=options["profile"])
+    doc_genie = DocGenie(api_key, cache=llm_cache, bypass_cache=options["bypass_llm_cache"],
+                         resilience=resilience, rate_limiter=rate_limiter, instrumentation=instrumentation)
+    job.report("init", "Step 1: DocGenie (LLM Agent) initialized.")
+
+    mapper = RepoMapper(github_url, doc_genie=doc_genie, no_checkout=options["no_checkout"],
+                        instrumentation=instrumentation)
+    # The workspace and its saved CCG belong to this job until the analysis is done;
+    # another job on the same repository (e.g. with other options) waits here.
+    with mapper.reserve_workspace():
+        if not mapper.clone_repo():
+            status = "Error (Clone Failed)"
+            store.record_failure(github_url, mapper.repo_name, None, variant, status, duration=time.time() - started)
+            return {"repo_name": mapper.repo_name, "status": status}
+        job.report("clone", "Step 2: Repository cloning successful.")
+
+        # The remote may have moved since the request was made; check again at the cloned HEAD.
+        stored = store.find(github_url, mapper.head_sha, variant) if reuses_stored_results(options) else None
+        if stored is not None:
+            job.report("stored", f"Done: Reused the documentation stored for commit {mapper.head_sha[:7]}.")
+            return result_from_run(stored, store)
+
+        # Stages run on worker threads as soon as their inputs are ready,
+        # so the README summary overlaps parsing and graph rendering.
+        def analyze_code(file_tree):
+            analyzer = CodeAnalyzer(
+                mapper.local_repo_path,
+                cache=ParseCache(),
+                graph_backend='sqlite' if options["disk_graph"] else 'networkx',
+                instrumentation=instrumentation
+            )
+            previous_sha = analyzer.load_state() if mapper.previous_sha else None
+            changes = mapper.get_changed_files(previous_sha) if previous_sha else None
+            if changes is not None:
+                analyzer.update_repository(changes, sources=mapper.source_files)
+            else:
+                analyzer.analyze_sources(mapper.source_files)
+            analyzer.save_state(mapper.head_sha)
+            return analyzer
+
+        def render_graph(analysis):
+            return analysis.get_ccg_as_mermaid(
+                max_nodes=DEFAULT_NODE_BUDGET,
+                focus=options["graph_focus"] or None
+            )
+
+        # Runs after the graph stage: both read the analyzer's graph,
+        # which the SQLite backend cannot share between threads at once.
+        def extract_api(analysis, mermaid_graph):
+            if options["map_reduce_docs"]:
+                return analysis.get_api_reference()
+            return analysis.get_api_reference_data()
+
+        # Also after the graph readers, for the same reason.
+        def index_symbols(analysis, api):
+            return symbol_index.update(github_url, mapper.repo_name, mapper.head_sha, analysis.get_api_reference())
+
+        pipeline = Pipeline(instrumentation=instrumentation)
+        pipeline.add("file_tree", mapper.build_file_tree, label="File tree generated")
+        pipeline.add("readme_summary", mapper.get_readme_summary, label="README summarized by AI")
+        pipeline.add("analysis", analyze_code, deps=["file_tree"], label="Code analysis complete")
+        pipeline.add("mermaid_graph", render_graph, deps=["analysis"],
+                     label="Code Context Graph (CCG) generated")
+        pipeline.add("api", extract_api, deps=["analysis", "mermaid_graph"],
+                     label="API reference data extracted")
+        pipeline.add("symbol_index", index_symbols, deps=["analysis", "api"], label="Symbol index updated")
+
+        def show_progress(name, status, seconds):
+            label = pipeline.label(name)
+            if status == 'started':
+                job.report(name, f"... {label} (running)")
+            elif status == 'finished':
+                job.report(name, f"Done: {label} ({seconds:.1f}s)")
+            elif status == 'failed':
+                job.report(name, f"Failed: {label} ({seconds:.1f}s)")
+            else:
+                job.report(name, f"Skipped: {label}")
+
+        results = pipeline.run(on_progress=show_progress)
+    critical_path, critical_seconds = pipeline.critical_path()
+    pipeline_summary = (
+        f"Pipeline: {pipeline.elapsed:.1f}s elapsed for "
+        f"{sum(pipeline.timings.values()):.1f}s of stage work "
+        f"(critical path: {' → '.join(critical_path)}, {critical_seconds:.1f}s)."
+    )
+
+    if options["map_reduce_docs"]:
+        doc_stream = doc_genie.stream_docs_map_reduce(
+            repo_name=mapper.repo_name,
+            readme_summary=results["readme_summary"],
+            file_tree=results["file_tree"],
+            mermaid_graph=results["mermaid_graph"],
+            api_reference=results["api"]
+        )
+    else:
+        doc_stream = doc_genie.stream_final_docs(
+            repo_name=mapper.repo_name,
+            readme_summary=results["readme_summary"],
+            file_tree=results["file_tree"],
+            mermaid_graph=results["mermaid_graph"],
+            api_data=results["api"]
+        )
+
+    job.report("docs", "... Writing the documentation (running)")
+    with instrumentation.span("stage:docs"):
+        for chunk in doc_stream:
+            job.emit(chunk)
+    job.report("docs", "Done: Final documentation generated by AI.")
+
+    result = {
+        "repo_name": mapper.repo_name,
+        "status": "Success",
+        "docs": job.snapshot()[1],
+        "pipeline_summary": pipeline_summary,
+        "prompt_report": doc_genie.last_prompt_report,
+        "cache_stats": doc_genie.cache_stats(),
+        "metrics": instrumentation.to_dict(),
+    }
+    store.save(
+        github_url, mapper.repo_name, mapper.head_sha, variant,
+        {
+            "docs": result["docs"],
+            "mermaid_graph": results["mermaid_graph"],
+            "file_tree": results["file_tree"],
+            "api": results["api"],
+        },
+        duration=time.time() - started,
+        metadata={key: result[key] for key in ("pipeline_summary", "prompt_report", "cache_stats", "metrics")}
+    )
+    return result
+
+
+def show_job(job):
+    """Renders a job's progress, polling with reruns until it finishes."""
+    counts = get_job_manager().counts()
+    st.caption(
+        f"Job {job.id} ({job.label}): {job.status}"
+        f"{f', shared by {job.subscribers} requests' if job.subscribers > 1 else ''}. "
+        f"Server load: {counts[RUNNING]} running, {counts[QUEUED]} queued."
+    )
+    messages, output = job.snapshot()
+    for message in messages:
+        st.text(message)
+
+    if not job.finished:
+        if output:
+            st.markdown(output)
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
+    if job.status == FAILED:
+        if isinstance(job.error, LLMError):
+            st.error(f"The AI service failed, so the documentation is incomplete: {job.error}")
+        else:
+            st.error(f"An unexpected error occurred: {job.error}")
+        return
+
+    if job.result["status"] != "Success":
+        st.error("Error: Failed to clone the repository. Is the URL correct and the repository public?")
+        return
+    show_result(job.result)
+
+
+def show_result(result):
+    """Renders finished documentation, generated now or served from the artifact store."""
+    st.markdown(result["docs"])
+    stored_run = result.get("stored_run")
+    if stored_run is not None:
+        generated_at = datetime.fromtimestamp(stored_run["created"]).strftime("%Y-%m-%d %H:%M")
+        st.success(
+            f"Served from the artifact store: generated {generated_at} "
+            f"for commit {stored_run['commit_sha'][:7]}, which is still the latest."
+        )
+    else:
+        st.success("Documentation generated successfully!")
+    if result["pipeline_summary"]:
+        st.caption(result["pipeline_summary"])
+    prompt_report = result["prompt_report"]
+    if prompt_report is not None:
+        st.caption(
+            f"Prompt: {prompt_report['prompt_tokens']:,} tokens "
+            f"(budget {prompt_report['token_budget']:,}), "
+            f"{prompt_report['saved_tokens']:,} saved by compaction."
+        )
+    cache_stats = result["cache_stats"]
+    if cache_stats is not None:
+        st.caption(
+            f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate), "
+            f"~{cache_stats['saved_seconds']:.1f}s of generation saved."
+        )
+
+    st.download_button(
+        label="Download docs.md",
+        data=result["docs"],
+        file_name=f"{result['repo_name']}_docs.md",
+        mime="text/markdown"
+    )
+    if result.get("metrics"):
+        show_metrics(result["metrics"], result["repo_name"])
+
+
+def show_metrics(metrics, repo_name):
+    """Renders a run's timing breakdown, counters and profiles, with a JSON export."""
+    import pandas as pd
+    with st.expander(f"Timing breakdown ({metrics['elapsed_seconds']:.1f}s)", expanded=False):
+        st.caption("Stages overlap, so shares can add up to more than 100%.")
+        st.dataframe(pd.DataFrame(breakdown(metrics)), use_container_width=True)
+        st.dataframe(
+            pd.DataFrame(sorted(metrics["counters"].items()), columns=["Counter", "Value"]),
+            use_container_width=True
+        )
+        for name, report in metrics["profiles"].items():
+            st.text(f"Profile of {name}:")
+            st.code(report)
+        st.download_button(
+            label="Download metrics.json",
+            data=json.dumps(metrics, indent=2),
+            file_name=f"{repo_name}_metrics.json",
+            mime="application/json"
+        )
+
 if st.session_state.page_radio == "🏠 Home":
     st.title("🚀 Codebase Genius")
     st.subheader("by MWITA-CODE ARCHITECT")
@@ -153,105 +490,171 @@ elif st.session_state.page_radio == "🚀 Generate Documentation":
     )
 
     github_url = st.text_input("GitHub Repository URL", placeholder="https.github.com/streamlit/streamlit-example")
+    no_checkout = st.checkbox(
+        "Read files straight from git objects (skip working-tree checkout)",
+        value=True
+    )
+    disk_graph = st.checkbox(
+        "Keep the code graph on disk (for very large repositories)",
+        value=False
+    )
+    bypass_llm_cache = st.checkbox(
+        "Regenerate AI text instead of reusing cached responses",
+        value=False
+    )
+    map_reduce_docs = st.checkbox(
+        "Document each package separately, in parallel (for large repositories)",
+        value=False
+    )
+    graph_focus = st.text_input(
+        "Focus the code graph on a file or package (optional)",
+        placeholder="src/package"
+    )
+    profile_analysis = st.checkbox(
+        "Profile the code analysis (slower; adds a cProfile report to the timing breakdown)",
+        value=False
+    )
 
     if st.button("Generate Documentation"):
         if "github.com" in github_url:
-            with st.spinner("Genius at work... This may take a few minutes..."):
-                current_repo_name = github_url.split('/')[-1].replace('.git', '')
-                try:
-            
-                    if "GOOGLE_API_KEY" not in st.secrets:
-                        st.error("GOOGLE_API_KEY not found. Please set it in .streamlit/secrets.toml")
-                        st.stop()
-                        
-                    api_key = st.secrets["GOOGLE_API_KEY"]
-                    doc_genie = DocGenie(api_key)
-                    st.text("Step 1: DocGenie (LLM Agent) initialized.")
-
-                    mapper = RepoMapper(github_url, doc_genie=doc_genie)
-                   
-                    clone_success = mapper.clone_repo()
-                    
-                    if clone_success:
-                        st.text("Step 2: Repository cloning successful.")
-                 
-                        file_tree = mapper.build_file_tree()
-                        st.text("Step 3: File tree generated.")
-                        readme_summary = mapper.get_readme_summary()
-                        st.text("Step 4: README summarized by AI.")
-                        analyzer = CodeAnalyzer(mapper.local_repo_path)
-                        analyzer.analyze_repository()
-                        st.text("Step 5: Code analysis complete.")
-                        mermaid_graph = analyzer.get_ccg_as_mermaid()
-                        st.text("Step 6: Code Context Graph (CCG) generated.")
-
-                        api_data = analyzer.get_api_reference_data()
-                        st.text("Step 7: API reference data extracted.")
-                        
-                        final_docs = doc_genie.generate_final_docs(
-                            repo_name=mapper.repo_name,
-                            readme_summary=readme_summary,
-                            file_tree=file_tree,
-                            mermaid_graph=mermaid_graph,
-                            api_data=api_data
-                        )
-                        st.text("Step 8: Final documentation generated by AI.")
-                        
-                        st.success("Documentation generated successfully!")
-    
-                        project_data = {
-                            "Project Name": mapper.repo_name,
-                            "Last Analyzed": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                            "Status": "Success"
-                        }
-                        st.session_state.projects.insert(0, project_data)
-                        st.session_state.projects = st.session_state.projects[:5]
-
-                        st.markdown(final_docs)
-                        
-                        st.download_button(
-                            label="Download docs.md",
-                            data=final_docs,
-                            file_name=f"{mapper.repo_name}_docs.md",
-                            mime="text/markdown"
-                        )
-                    
-                    else:
-                        st.error("Error: Failed to clone the repository. Is the URL correct and the repository public?")
-                    
-                        project_data = {
-                            "Project Name": current_repo_name,
-                            "Last Analyzed": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                            "Status": "Error (Clone Failed)"
-                        }
-                        st.session_state.projects.insert(0, project_data)
-                        st.session_state.projects = st.session_state.projects[:5]
-        
-                except Exception as e:
-                    st.error(f"An unexpected error occurred: {e}")
-                    print("--- FULL TRACEBACK ---")
-                    print(traceback.format_exc())
-                    print("----------------------")
-
-                    project_data = {
-                        "Project Name": current_repo_name,
-                        "Last Analyzed": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                        "Status": f"Error (Runtime)"
-                    }
-                    st.session_state.projects.insert(0, project_data)
-                    st.session_state.projects = st.session_state.projects[:5]
-                   
+            if "GOOGLE_API_KEY" not in st.secrets:
+                st.error("GOOGLE_API_KEY not found. Please set it in .streamlit/secrets.toml")
+                st.stop()
+
+            api_key = st.secrets["GOOGLE_API_KEY"]
+            options = {
+                "no_checkout": no_checkout,
+                "disk_graph": disk_graph,
+                "bypass_llm_cache": bypass_llm_cache,
+                "map_reduce_docs": map_reduce_docs,
+                "graph_focus": graph_focus.strip(),
+                "profile": profile_analysis,
+            }
+            from repo_mapper import remote_head_sha
+            commit_sha = remote_head_sha(github_url)
+            stored = None
+            if reuses_stored_results(options):
+                stored = get_artifact_store().find(github_url, commit_sha, output_variant(options))
+
+            if stored is not None:
+                st.session_state.job_id = None
+                st.session_state.replay_run_id = stored["id"]
+            else:
+                # Requests for the same commit with the same options share one job.
+                job_key = (github_url, commit_sha, tuple(sorted(options.items())))
+                # Cached resources only resolve on the script thread, so fetch them before handing off.
+                store, llm_cache, symbol_index = get_artifact_store(), get_llm_cache(), get_symbol_index()
+                resilience, rate_limiter = get_llm_resilience(), get_rate_limiter()
+                job, created = get_job_manager().submit(
+                    job_key,
+                    lambda job: run_documentation_job(
+                        job, github_url, api_key, options, store, llm_cache, symbol_index, resilience, rate_limiter
+                    ),
+                    label=github_url.split('/')[-1].replace('.git', '')
+                )
+                if not created:
+                    st.info("This repository is already being documented at the same commit; sharing that job's result.")
+                st.session_state.job_id = job.id
+                st.session_state.replay_run_id = None
         else:
             st.error("Please enter a valid GitHub URL.")
 
+    replay_run = get_artifact_store().get(st.session_state.replay_run_id) if st.session_state.replay_run_id else None
+    current_job = get_job_manager().get(st.session_state.job_id) if st.session_state.job_id else None
+    if replay_run is not None:
+        show_result(result_from_run(replay_run, get_artifact_store()))
+    elif current_job is not None:
+        show_job(current_job)
+
 elif st.session_state.page_radio == "📈 Recent Projects":
     st.title("📈 Recent Projects")
-    
-    if not st.session_state.projects:
+
+    store = get_artifact_store()
+    total = store.count()
+    if not total:
         st.info("You haven't analyzed any projects yet. Go to 'Generate Documentation' to get started!")
     else:
-        st.write("Showing the last 5 projects you analyzed.")
-        
+        pages = (total + RECENT_PROJECTS_PAGE_SIZE - 1) // RECENT_PROJECTS_PAGE_SIZE
+        page_number = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+        runs = store.recent(page_number, RECENT_PROJECTS_PAGE_SIZE)
+        st.write(f"Showing {len(runs)} of {total} runs (page {page_number} of {pages}).")
+
         import pandas as pd
-        df = pd.DataFrame(st.session_state.projects)
-        st.dataframe(df, use_container_width=True)
\ No newline at end of file
+        df = pd.DataFrame([
+            {
+                "Project Name": run["repo_name"],
+                "Commit": (run["commit_sha"] or "")[:7],
+                "Last Analyzed": datetime.fromtimestamp(run["created"]).strftime("%Y-%m-%d %H:%M"),
+                "Status": run["status"],
+                "Duration (s)": round(run["duration"], 1) if run["duration"] is not None else None,
+            }
+            for run in runs
+        ])
+        st.dataframe(df, use_container_width=True)
+
+        stored_runs = [run for run in runs if run["artifact_dir"]]
+        if stored_runs:
+            chosen = st.selectbox(
+                "Open stored documentation",
+                stored_runs,
+                format_func=lambda run: (
+                    f"{run['repo_name']} @ {run['commit_sha'][:7]} "
+                    f"({datetime.fromtimestamp(run['created']).strftime('%Y-%m-%d %H:%M')})"
+                )
+            )
+            docs = store.load(chosen, "docs")
+            if docs is not None:
+                st.download_button(
+                    label="Download docs.md",
+                    data=docs,
+                    file_name=f"{chosen['repo_name']}_docs.md",
+                    mime="text/markdown"
+                )
+                st.markdown(docs)
+
+elif st.session_state.page_radio == "🔎 Symbol Search":
+    st.title("🔎 Symbol Search")
+    st.write("Find where classes and functions are defined across every repository documented so far.")
+
+    symbol_index = get_symbol_index()
+    indexed_repos = symbol_index.repos()
+    if not indexed_repos:
+        st.info("No repositories have been indexed yet. Documenting a repository adds its symbols here.")
+    else:
+        query = st.text_input("Symbol name", placeholder="e.g. RepoMapper, build_file_tree or Class.method")
+        col1, col2 = st.columns(2)
+        with col1:
+            kind = st.selectbox("Kind", ["Any", "class", "function"])
+        with col2:
+            repo = st.selectbox(
+                "Repository",
+                [None] + indexed_repos,
+                format_func=lambda repo: "All repositories" if repo is None else (
+                    f"{repo['repo_name']} @ {(repo['commit_sha'] or '')[:7]} ({repo['symbol_count']} symbols)"
+                )
+            )
+
+        if query.strip():
+            started = time.perf_counter()
+            matches = symbol_index.search(
+                query,
+                kind=None if kind == "Any" else kind,
+                repo_url=repo["url"] if repo is not None else None
+            )
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            st.caption(f"{len(matches)} matches in {elapsed_ms:.1f} ms.")
+            if matches:
+                import pandas as pd
+                st.dataframe(pd.DataFrame([
+                    {
+                        "Symbol": match["name"],
+                        "Kind": match["kind"],
+                        "File": match["file"],
+                        "Repository": match["repo_name"],
+                        "Commit": (match["commit_sha"] or "")[:7],
+                        "Match": match["match"],
+                    }
+                    for match in matches
+                ]), use_container_width=True)
+        else:
+            st.caption(f"{len(indexed_repos)} repositories indexed.")
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_ARTIFACT_DIR = ".codebase_genius_artifacts"
+
+# Artifact name -> file it is stored in, inside the run's directory.
+ARTIFACT_FILES = {
+    "docs": "docs.md",
+    "mermaid_graph": "ccg.mmd",
+    "file_tree": "file_tree.txt",
+    "api": "api.json",
+}
+_RUN_COLUMNS = "id, url, repo_name, commit_sha, variant, status, created, duration, artifact_dir, metadata"
+
+
+def _atomic_write(path, text):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+class ArtifactStore:
+    """
+    Persistent record of documentation runs and their outputs.
+
+    Every run (successful or not) is a row in a SQLite index. A
+    successful run also keeps its generated docs, CCG diagram, file tree
+    and API data as files under `root`, one directory per repository,
+    commit and `variant` (a string naming the options that change the
+    output), so an unchanged repository can be served again without
+    regenerating anything. Safe to share between threads.
+    """
+    def __init__(self, root=DEFAULT_ARTIFACT_DIR):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " id INTEGER PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " repo_name TEXT NOT NULL,"
+            " commit_sha TEXT,"
+            " variant TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " duration REAL,"
+            " artifact_dir TEXT,"
+            " metadata TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS runs_created ON runs (created)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS runs_lookup ON runs (url, commit_sha, variant) WHERE artifact_dir IS NOT NULL"
+        )
+        self.conn.commit()
+
+    def _run_dir(self, url, repo_name, commit_sha, variant):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]
+        variant_digest = hashlib.sha1(variant.encode('utf-8')).hexdigest()[:10]
+        return os.path.join(f"{repo_name}-{digest}", commit_sha, variant_digest)
+
+    def save(self, url, repo_name, commit_sha, variant, artifacts, duration=None, metadata=None):
+        """
+        Stores a successful run's `artifacts` ({name: value}, names from
+        ARTIFACT_FILES; the API data may be any JSON value) and records
+        it. Returns the run id.
+        """
+        relative_dir = self._run_dir(url, repo_name, commit_sha, variant)
+        directory = os.path.join(self.root, relative_dir)
+        os.makedirs(directory, exist_ok=True)
+        for name, value in artifacts.items():
+            text = json.dumps(value) if name == "api" else value
+            _atomic_write(os.path.join(directory, ARTIFACT_FILES[name]), text)
+        return self._insert(url, repo_name, commit_sha, variant, "Success", duration, relative_dir, metadata)
+
+    def record_failure(self, url, repo_name, commit_sha, variant, status, duration=None):
+        """Records a run that produced nothing worth keeping. Returns the run id."""
+        return self._insert(url, repo_name, commit_sha, variant, status, duration, None, None)
+
+    def _insert(self, url, repo_name, commit_sha, variant, status, duration, artifact_dir, metadata):
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (url, repo_name, commit_sha, variant, status, created, duration, artifact_dir, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, repo_name, commit_sha, variant, status, time.time(), duration, artifact_dir,
+                 json.dumps(metadata) if metadata is not None else None)
+            )
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def _row_to_run(self, row):
+        run_id, url, repo_name, commit_sha, variant, status, created, duration, artifact_dir, metadata = row
+        return {
+            "id": run_id,
+            "url": url,
+            "repo_name": repo_name,
+            "commit_sha": commit_sha,
+            "variant": variant,
+            "status": status,
+            "created": created,
+            "duration": duration,
+            "artifact_dir": artifact_dir,
+            "metadata": json.loads(metadata) if metadata else {},
+        }
+
+    def find(self, url, commit_sha, variant):
+        """Returns the latest stored run for this repo, commit and variant, or None."""
+        if not commit_sha:
+            return None
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {_RUN_COLUMNS} FROM runs"
+                " WHERE url = ? AND commit_sha = ? AND variant = ? AND artifact_dir IS NOT NULL"
+                " ORDER BY created DESC LIMIT 1",
+                (url, commit_sha, variant)
+            ).fetchone()
+        if row is None:
+            return None
+        run = self._row_to_run(row)
+        if not os.path.isfile(os.path.join(self.root, run["artifact_dir"], ARTIFACT_FILES["docs"])):
+            return None
+        return run
+
+    def get(self, run_id):
+        """Returns the run with `run_id`, or None."""
+        with self._lock:
+            row = self.conn.execute(f"SELECT {_RUN_COLUMNS} FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return self._row_to_run(row) if row is not None else None
+
+    def load(self, run, name):
+        """Returns a stored artifact of `run`, or None if it has none."""
+        if not run["artifact_dir"]:
+            return None
+        path = os.path.join(self.root, run["artifact_dir"], ARTIFACT_FILES[name])
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        return json.loads(text) if name == "api" else text
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def recent(self, page=1, page_size=20):
+        """Returns one page (1-based) of runs, newest first."""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {_RUN_COLUMNS} FROM runs ORDER BY created DESC, id DESC LIMIT ? OFFSET ?",
+                (page_size, (max(1, page) - 1) * page_size)
+            ).fetchall()
+        return [self._row_to_run(row) for row in rows]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,90 @@
+"""
+Compares the memory and time cost of the CCG graph backends.
+
+Builds the same synthetic Code Context Graph with each backend through
+CodeAnalyzer's normal merge/resolve path (parsing is skipped), then times
+the Mermaid and API-reference renderers.
+
+    python -m benchmarks.ccg_backends --files 5000 --symbols 20
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from code_analyzer import CodeAnalyzer
+
+BACKENDS = ['networkx', 'compact']
+
+
+def synthetic_records(files, symbols):
+    """Yields (relative_path, record) pairs shaped like _extract_symbols output."""
+    for file_index in range(files):
+        relative_path = f"pkg{file_index % 50}/sub{file_index % 7}/module_{file_index}.py"
+        classes = [f"Class{i}" for i in range(max(1, symbols // 5))]
+        functions = [f"function_{i}" for i in range(symbols // 2)]
+        functions += [f"{classes[i % len(classes)]}.method_{i}" for i in range(symbols - len(functions) - len(classes))]
+        calls = [["", functions[0]]] + [[functions[i], f"function_{(i + 1) % (symbols // 2 or 1)}"] for i in range(len(functions))]
+        record = {"classes": classes, "functions": functions, "imports": [], "calls": calls}
+        yield relative_path, record
+
+
+def run_backend(backend, files, symbols):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    analyzer = CodeAnalyzer(".", graph_backend=backend)
+    file_node_ids = []
+    for relative_path, record in synthetic_records(files, symbols):
+        file_node_id = f"file:{relative_path}"
+        analyzer.ccg.add_node(file_node_id, type='file', file=relative_path)
+        analyzer._merge_record(file_node_id, record)
+        file_node_ids.append(file_node_id)
+    analyzer._resolve_calls(file_node_ids)
+
+    build_seconds = time.perf_counter() - start
+    graph_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    mermaid = analyzer.get_ccg_as_mermaid()
+    mermaid_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    api_data = analyzer.get_api_reference_data()
+    api_seconds = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "nodes": analyzer.ccg.number_of_nodes(),
+        "edges": analyzer.ccg.number_of_edges(),
+        "graph_mb": round(graph_bytes / (1024 * 1024), 1),
+        "build_s": round(build_seconds, 3),
+        "mermaid_s": round(mermaid_seconds, 3),
+        "api_reference_s": round(api_seconds, 3),
+        "output_chars": len(mermaid) + len(api_data),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--symbols", type=int, default=20, help="symbols per file")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [run_backend(backend, args.files, args.symbols) for backend in BACKENDS]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    columns = list(results[0])
+    print(" | ".join(f"{column:>15}" for column in columns))
+    for result in results:
+        print(" | ".join(f"{str(result[column]):>15}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
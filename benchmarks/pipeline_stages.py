@@ -0,0 +1,198 @@
+"""
+Times each stage of the documentation pipeline on a synthetic repository,
+with fake_llm.FakeGenerativeModel standing in for Gemini.
+
+For every stage (clone, build_file_tree, analyze_repository,
+get_ccg_as_mermaid, get_api_reference_data, prompt assembly and the
+final LLM call) it records wall time, peak traced memory and files per
+second, and can write them as JSON. With --baseline it compares against
+an earlier JSON result and exits with status 1 if any stage regressed.
+
+    python -m benchmarks.pipeline_stages --files 1000 --output results.json
+    python -m benchmarks.pipeline_stages --files 1000 --baseline results.json
+
+Peak memory is what tracemalloc sees in this process, so parser worker
+processes (--workers > 1) are not included.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic_repo import generate_repo
+from clone_workspace import CloneWorkspace
+from code_analyzer import CodeAnalyzer
+from doc_genie import DocGenie
+from fake_llm import FakeGenerativeModel
+from repo_mapper import RepoMapper
+
+STAGES = [
+    "clone", "build_file_tree", "analyze_repository", "get_ccg_as_mermaid",
+    "get_api_reference_data", "prompt_assembly", "generate_final_docs",
+]
+DEFAULT_THRESHOLD = 0.2
+# Differences below these are noise, whatever the ratio.
+MIN_SECONDS_DELTA = 0.01
+MIN_MB_DELTA = 1.0
+
+
+def measure(results, stage, files, fn):
+    """Runs `fn()`, records its wall time, peak memory and throughput under `stage`, and returns its result."""
+    gc.collect()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    value = fn()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    results[stage] = {
+        "seconds": round(seconds, 4),
+        "peak_mb": round(max(0, peak - baseline) / (1024 * 1024), 2),
+        "files_per_s": round(files / seconds, 1) if seconds > 0 else None,
+    }
+    return value
+
+
+def run_once(repo_path, files, args):
+    """Runs every stage once against a fresh clone of `repo_path`; returns {stage: measurements}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as workspace_root:
+        workspace = CloneWorkspace(root=workspace_root)
+        model = FakeGenerativeModel(latency=args.llm_latency, seed=0)
+        doc_genie = DocGenie(None, model=model, requests_per_minute=None)
+        mapper = RepoMapper(f"file://{os.path.abspath(repo_path)}", doc_genie=doc_genie, workspace=workspace)
+
+        if not measure(results, "clone", files, mapper.clone_repo):
+            raise RuntimeError(f"Could not clone {repo_path}")
+        file_tree = measure(results, "build_file_tree", files, mapper.build_file_tree)
+
+        analyzer = CodeAnalyzer(mapper.local_repo_path, workers=args.workers, graph_backend=args.backend,
+                                store_path=os.path.join(workspace_root, "ccg.sqlite"))
+        measure(results, "analyze_repository", files, analyzer.analyze_repository)
+        mermaid_graph = measure(results, "get_ccg_as_mermaid", files, analyzer.get_ccg_as_mermaid)
+        api_data = measure(results, "get_api_reference_data", files, analyzer.get_api_reference_data)
+
+        readme_summary = "A synthetic repository used for benchmarking."
+        measure(results, "prompt_assembly", files, lambda: doc_genie.build_final_prompt(
+            mapper.repo_name, readme_summary, file_tree, mermaid_graph, api_data
+        ))
+        measure(results, "generate_final_docs", files, lambda: doc_genie.generate_final_docs(
+            mapper.repo_name, readme_summary, file_tree, mermaid_graph, api_data
+        ))
+    return results
+
+
+def run_benchmark(args):
+    """Generates the synthetic repo and returns the machine-readable result of `args.repeat` runs."""
+    config = {
+        "files": args.files, "depth": args.depth, "file_size": args.file_size, "symbols": args.symbols,
+        "workers": args.workers, "backend": args.backend, "llm_latency": args.llm_latency, "repeat": args.repeat,
+    }
+    with tempfile.TemporaryDirectory() as repo_root:
+        repo_path = os.path.join(repo_root, "synthetic")
+        generate_repo(repo_path, args.files, args.depth, args.file_size, args.symbols)
+
+        tracemalloc.start()
+        try:
+            runs = [run_once(repo_path, args.files, args) for _ in range(args.repeat)]
+        finally:
+            tracemalloc.stop()
+
+    # Best wall time across repeats (least disturbed by noise), worst memory.
+    stages = {}
+    for stage in STAGES:
+        samples = [run[stage] for run in runs]
+        best = min(samples, key=lambda sample: sample["seconds"])
+        stages[stage] = {
+            "seconds": best["seconds"],
+            "peak_mb": max(sample["peak_mb"] for sample in samples),
+            "files_per_s": best["files_per_s"],
+        }
+    return {
+        "config": config,
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stages": stages,
+    }
+
+
+def compare(result, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares two run_benchmark() results stage by stage. Returns a list of
+    (stage, metric, baseline value, new value, change) for every metric
+    that got worse by more than `threshold` (a fraction) and by more
+    than the noise floor.
+    """
+    regressions = []
+    for stage, current in result["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous is None:
+            continue
+        for metric, floor in (("seconds", MIN_SECONDS_DELTA), ("peak_mb", MIN_MB_DELTA)):
+            old, new = previous[metric], current[metric]
+            if new - old > floor and new > old * (1 + threshold):
+                change = (new - old) / old if old else float('inf')
+                regressions.append((stage, metric, old, new, change))
+    return regressions
+
+
+def print_table(result, baseline=None):
+    header = f"{'stage':>24} | {'seconds':>9} | {'peak MB':>8} | {'files/s':>9}"
+    if baseline is not None:
+        header += f" | {'vs baseline':>11}"
+    print(header)
+    for stage, values in result["stages"].items():
+        line = (f"{stage:>24} | {values['seconds']:>9.4f} | {values['peak_mb']:>8.2f} | "
+                f"{str(values['files_per_s']):>9}")
+        previous = (baseline or {}).get("stages", {}).get(stage)
+        if previous and previous["seconds"]:
+            line += f" | {(values['seconds'] - previous['seconds']) / previous['seconds']:>+11.0%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=3, help="package nesting depth")
+    parser.add_argument("--file-size", type=int, default=2000, help="approximate bytes per file")
+    parser.add_argument("--symbols", type=int, default=10, help="symbols per file")
+    parser.add_argument("--workers", type=int, default=1, help="parser processes")
+    parser.add_argument("--backend", default="networkx", choices=["networkx", "compact", "sqlite"])
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per fake LLM call")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fractional slowdown or memory growth counted as a regression")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("config") != result["config"]:
+            print("Warning: the baseline was recorded with a different configuration.")
+
+    print_table(result, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(result, baseline, args.threshold)
+        for stage, metric, old, new, change in regressions:
+            print(f"REGRESSION: {stage} {metric} {old} -> {new} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
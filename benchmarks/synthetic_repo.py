@@ -0,0 +1,128 @@
+"""
+Generates synthetic Python repositories as local git repos, for the
+benchmarks.
+
+Files are spread over nested packages; each defines classes, methods
+and functions that import and call functions in other modules, and is
+padded with comments to roughly the requested size.
+
+    python -m benchmarks.synthetic_repo /tmp/synthetic --files 1000 --depth 3 --symbols 20
+"""
+import argparse
+import os
+import random
+
+from git import Repo
+
+
+def module_paths(files, depth, fan_out=4):
+    """Returns `files` relative module paths spread over packages up to `depth` levels deep."""
+    paths = []
+    for index in range(files):
+        parts = []
+        remaining = index
+        for level in range(depth):
+            parts.append(f"pkg{remaining % fan_out}" if level == 0 else f"sub{remaining % fan_out}")
+            remaining //= fan_out
+        paths.append("/".join(parts + [f"module_{index}.py"]))
+    return paths
+
+
+def _module_name(path):
+    return path[:-len(".py")].replace("/", ".")
+
+
+def render_module(index, paths, symbols, file_size, rng):
+    """Returns the source of module `index`: ~`symbols` definitions padded to ~`file_size` bytes."""
+    classes = max(1, symbols // 5)
+    functions = max(1, symbols - classes * 2)
+    methods = max(0, symbols - classes - functions)
+    other = rng.randrange(len(paths)) if len(paths) > 1 else index
+    if other == index:
+        other = (index + 1) % len(paths)
+
+    lines = [f'"""Synthetic module {index}."""']
+    if other != index:
+        lines.append(f"from {_module_name(paths[other])} import function_0 as imported_function")
+    lines.append("")
+    for function in range(functions):
+        callee = f"function_{function + 1}" if function + 1 < functions else "imported_function"
+        if callee == "imported_function" and other == index:
+            callee = "function_0"
+        lines += [
+            "",
+            f"def function_{function}(value=0):",
+            f"    return {callee}(value + 1) if value < 0 else value",
+            "",
+        ]
+    for class_index in range(classes):
+        lines += ["", f"class Class{class_index}:"]
+        class_methods = methods // classes + (1 if class_index < methods % classes else 0)
+        if not class_methods:
+            lines.append("    pass")
+        for method in range(class_methods):
+            lines += [
+                f"    def method_{method}(self):",
+                f"        return function_{method % functions}()",
+                "",
+            ]
+
+    source = "\n".join(lines) + "\n"
+    padding = file_size - len(source)
+    filler = "# " + "synthetic padding " * 4 + "\n"
+    if padding > 0:
+        source += filler * (padding // len(filler) + 1)
+    return source
+
+
+def generate_repo(path, files=200, depth=3, file_size=2000, symbols=10, seed=0):
+    """
+    Writes a synthetic repository to `path` and commits it as a git repo.
+    Returns the list of generated module paths.
+    """
+    rng = random.Random(seed)
+    paths = module_paths(files, depth)
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "README.md"), 'w', encoding='utf-8') as f:
+        f.write(f"# Synthetic repository\n\n{files} modules, {symbols} symbols each, {depth} packages deep.\n")
+
+    for index, relative_path in enumerate(paths):
+        file_path = os.path.join(path, *relative_path.split("/"))
+        directory = os.path.dirname(file_path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+            # Every package level gets an __init__.py so imports are real.
+            package = directory
+            while package != os.path.normpath(path):
+                init_path = os.path.join(package, "__init__.py")
+                if not os.path.exists(init_path):
+                    open(init_path, 'w').close()
+                package = os.path.dirname(package)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(render_module(index, paths, symbols, file_size, rng))
+
+    repo = Repo.init(path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "Synthetic Benchmark")
+        config.set_value("user", "email", "benchmark@example.com")
+    repo.git.add("-A")
+    repo.git.commit("-q", "-m", f"Synthetic repository: {files} files")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=3, help="package nesting depth")
+    parser.add_argument("--file-size", type=int, default=2000, help="approximate bytes per file")
+    parser.add_argument("--symbols", type=int, default=10, help="symbols per file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_repo(args.path, args.files, args.depth, args.file_size, args.symbols, args.seed)
+    print(f"Generated {args.files} files in {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import posixpath
+from compact_graph import iter_edge_records, iter_node_records
+
+DEFAULT_NODE_BUDGET = 300
+
+
+def _truncate(package, depth):
+    """Cuts a directory path down to its first `depth` components."""
+    if depth is None or not package:
+        return package
+    return '/'.join(package.split('/')[:depth])
+
+
+def _package_of(file_path, depth=None):
+    """Returns the directory of a repo-relative path, cut to `depth` levels."""
+    return _truncate(posixpath.dirname(file_path), depth)
+
+
+def _in_focus(file_path, focus):
+    return file_path == focus or file_path.startswith(focus + '/')
+
+
+def _node_shape(mermaid_id, node_type, file_path, name):
+    if node_type == 'file':
+        return f'{mermaid_id}(("[{posixpath.basename(file_path)}]"))'
+    if node_type == 'function':
+        return f'{mermaid_id}[/"{name}()"/]'
+    return f'{mermaid_id}["{name}"]'
+
+
+def _plural(count, noun):
+    if count == 1:
+        return f"{count} {noun}"
+    return f"{count} {noun}es" if noun.endswith('s') else f"{count} {noun}s"
+
+
+def _file_node_counts(graph):
+    """Yields (file, node type, count) for the graph."""
+    if hasattr(graph, 'file_node_counts'):
+        yield from graph.file_node_counts()
+        return
+    counts = {}
+    for _, node_type, file_path, _ in iter_node_records(graph):
+        counts[file_path, node_type] = counts.get((file_path, node_type), 0) + 1
+    for (file_path, node_type), count in counts.items():
+        yield file_path, node_type, count
+
+
+def _file_edge_counts(graph):
+    """Yields (source file, target file, edge type, count) for edges between files."""
+    if hasattr(graph, 'file_edge_counts'):
+        yield from graph.file_edge_counts()
+        return
+    files = {key: file_path for key, _, file_path, _ in iter_node_records(graph)}
+    counts = {}
+    for u, v, edge_type in iter_edge_records(graph):
+        edge = (files[u], files[v], edge_type)
+        if edge[0] != edge[1]:
+            counts[edge] = counts.get(edge, 0) + 1
+    for (u_file, v_file, edge_type), count in counts.items():
+        yield u_file, v_file, edge_type, count
+
+
+class MermaidRenderer:
+    """
+    Renders a Code Context Graph as a Mermaid.js diagram whose size is
+    bounded by `max_nodes` rather than by the size of the repo.
+
+    Graphs within the budget are drawn node by node, with each
+    directory's nodes grouped into a `subgraph` cluster. Larger graphs
+    are collapsed into one aggregate node per package (directory,
+    shortened until the packages fit the budget) labelled with its
+    file/function/class counts, joined by edges weighted with the
+    number of calls between them. render(focus=...) instead draws one
+    file or package plus its direct neighbours.
+    """
+    def __init__(self, graph, max_nodes=DEFAULT_NODE_BUDGET):
+        self.graph = graph
+        self.max_nodes = max(1, max_nodes)
+
+    def render(self, focus=None):
+        return "".join(self.iter_lines(focus))
+
+    def iter_lines(self, focus=None):
+        """Yields the diagram line by line."""
+        if focus:
+            yield from self._focus_lines(focus.strip('/'))
+            return
+
+        counts = {}
+        total = 0
+        for file_path, node_type, count in _file_node_counts(self.graph):
+            counts.setdefault(file_path, {})[node_type] = count
+            total += count
+        if total <= self.max_nodes:
+            yield from self._detailed_lines(lambda key, file_path: True)
+        else:
+            yield from self._collapsed_lines(counts, total)
+
+    def _detailed_lines(self, selected, note=None):
+        """Draws the selected nodes, clustered by directory, and the edges between them."""
+        mermaid_ids = {}
+        clusters = {}
+        for key, node_type, file_path, name in iter_node_records(self.graph):
+            if not selected(key, file_path):
+                continue
+            mermaid_id = mermaid_ids[key] = f"n{len(mermaid_ids)}"
+            clusters.setdefault(_package_of(file_path), []).append(
+                _node_shape(mermaid_id, node_type, file_path, name)
+            )
+
+        yield "graph TD;\n"
+        if note:
+            yield f"    %% {note}\n"
+        for index, (package, shapes) in enumerate(clusters.items()):
+            yield f'    subgraph c{index}["{package or "(root)"}/"]\n'
+            for shape in shapes:
+                yield f"        {shape}\n"
+            yield "    end\n"
+
+        for u, v, edge_type in iter_edge_records(self.graph):
+            if u in mermaid_ids and v in mermaid_ids:
+                if edge_type == 'defines':
+                    yield f"    {mermaid_ids[u]} -- defines --> {mermaid_ids[v]}\n"
+                elif edge_type == 'calls':
+                    yield f"    {mermaid_ids[u]} -. calls .-> {mermaid_ids[v]}\n"
+
+    def _collapsed_lines(self, counts, total):
+        packages = {_package_of(file_path) for file_path in counts}
+        depth = max((len(package.split('/')) for package in packages if package), default=0)
+        while depth > 0 and len({_truncate(p, depth) for p in packages}) > self.max_nodes:
+            depth -= 1
+
+        totals = {}
+        for file_path, type_counts in counts.items():
+            package = _package_of(file_path, depth)
+            package_totals = totals.setdefault(package, {'file': 0, 'function': 0, 'class': 0})
+            for node_type, count in type_counts.items():
+                package_totals[node_type] = package_totals.get(node_type, 0) + count
+
+        yield "graph TD;\n"
+        yield f"    %% {total} nodes collapsed into {_plural(len(totals), 'package')} (budget: {self.max_nodes} nodes)\n"
+        mermaid_ids = {}
+        for package, package_totals in sorted(totals.items()):
+            mermaid_id = mermaid_ids[package] = f"p{len(mermaid_ids)}"
+            summary = ", ".join([
+                _plural(package_totals['file'], 'file'),
+                _plural(package_totals['function'], 'function'),
+                _plural(package_totals['class'], 'class'),
+            ])
+            yield f'    {mermaid_id}[["{package or "(root)"}/<br/>{summary}"]]\n'
+
+        edges = {}
+        for u_file, v_file, edge_type, count in _file_edge_counts(self.graph):
+            u, v = _package_of(u_file, depth), _package_of(v_file, depth)
+            if u != v:
+                edges[u, v, edge_type] = edges.get((u, v, edge_type), 0) + count
+
+        ranked = sorted(edges.items(), key=lambda item: (-item[1], item[0]))
+        for (u, v, edge_type), count in ranked[:self.max_nodes]:
+            yield f'    {mermaid_ids[u]} -- "{count} {edge_type}" --> {mermaid_ids[v]}\n'
+        if len(ranked) > self.max_nodes:
+            yield f"    %% {len(ranked) - self.max_nodes} lighter package edges omitted\n"
+
+    def _focus_lines(self, focus):
+        """Draws the nodes of one file or package plus the nodes they are directly linked to."""
+        selected = set()
+        omitted = 0
+        for key, _, file_path, _ in iter_node_records(self.graph):
+            if _in_focus(file_path, focus):
+                if len(selected) < self.max_nodes:
+                    selected.add(key)
+                else:
+                    omitted += 1
+        if not selected:
+            yield "graph TD;\n"
+            yield f"    %% No nodes found for '{focus}'\n"
+            return
+
+        neighbors = set()
+        dropped_links = 0
+        for u, v, _ in iter_edge_records(self.graph):
+            for key, other in ((u, v), (v, u)):
+                if key in selected and other not in selected and other not in neighbors:
+                    if len(selected) + len(neighbors) < self.max_nodes:
+                        neighbors.add(other)
+                    else:
+                        dropped_links += 1
+
+        note = f"Focus: {focus}"
+        if omitted or dropped_links:
+            note += (f" ({omitted} focus nodes and {dropped_links} neighbour links omitted"
+                     f" to stay within {self.max_nodes} nodes)")
+        shown = selected | neighbors
+        yield from self._detailed_lines(lambda key, file_path: key in shown, note=note)
@@ -0,0 +1,479 @@
+import json
+import os
+import sqlite3
+from collections.abc import MutableMapping
+from compact_graph import EDGE_TYPES, NODE_PREFIXES, NODE_TYPES
+
+_TYPE_CODES = {name: code for code, name in enumerate(NODE_TYPES)}
+_PREFIX_TYPES = {prefix: node_type for node_type, prefix in NODE_PREFIXES.items()}
+_EDGE_CODES = {name: code for code, name in enumerate(EDGE_TYPES)}
+_IDENTITY_KEYS = ('type', 'file', 'name')
+
+DEFAULT_BATCH_SIZE = 5000
+FETCH_SIZE = 1000
+_RECENT_IDS = 8192
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    type INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    name TEXT NOT NULL,
+    short_name TEXT NOT NULL,
+    extras TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS nodes_identity ON nodes (file, name, type);
+CREATE INDEX IF NOT EXISTS nodes_short_name ON nodes (short_name);
+CREATE TABLE IF NOT EXISTS edges (
+    src INTEGER NOT NULL,
+    dst INTEGER NOT NULL,
+    type INTEGER NOT NULL,
+    PRIMARY KEY (src, dst)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst);
+CREATE TABLE IF NOT EXISTS callees (
+    file_id INTEGER NOT NULL,
+    short_name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS callees_short_name ON callees (short_name);
+CREATE INDEX IF NOT EXISTS callees_file ON callees (file_id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _short_name(name):
+    return name.rsplit('.', 1)[-1]
+
+
+class _NodeAttrs(MutableMapping):
+    """Write-through attribute view of one stored node."""
+    def __init__(self, graph, row_id):
+        self._graph = graph
+        self._row_id = row_id
+
+    def _load(self):
+        row = self._graph.conn.execute(
+            "SELECT type, file, name, extras FROM nodes WHERE id = ?", (self._row_id,)
+        ).fetchone()
+        return self._graph._attrs(*row)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        if key in _IDENTITY_KEYS:
+            raise KeyError(f"'{key}' is part of the node's identity and cannot be changed")
+        self._graph._set_extra(self._row_id, key, value)
+
+    def __delitem__(self, key):
+        attrs = self._load()
+        del attrs[key]
+        extras = {k: v for k, v in attrs.items() if k not in _IDENTITY_KEYS}
+        self._graph._write_extras(self._row_id, extras)
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+
+class _NodeView:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __call__(self, data=False):
+        graph = self._graph
+        for row_id, type_code, file_path, name, extras in graph._paged(
+                "SELECT id, type, file, name, extras FROM nodes WHERE id > ? ORDER BY id LIMIT ?"):
+            node_id = graph._node_id(type_code, file_path, name)
+            yield (node_id, graph._attrs(type_code, file_path, name, extras)) if data else node_id
+
+    def __iter__(self):
+        return self(data=False)
+
+    def __len__(self):
+        return self._graph.number_of_nodes()
+
+    def __contains__(self, node_id):
+        return self._graph.has_node(node_id)
+
+    def __getitem__(self, node_id):
+        return _NodeAttrs(self._graph, self._graph._require(node_id))
+
+
+class _EdgeView:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __call__(self, data=False):
+        graph = self._graph
+        rows = graph._paged_edges(
+            "SELECT e.src, e.dst, e.type, s.type, s.file, s.name, d.type, d.file, d.name "
+            "FROM edges e JOIN nodes s ON s.id = e.src JOIN nodes d ON d.id = e.dst "
+            "WHERE (e.src, e.dst) > (?, ?) ORDER BY e.src, e.dst LIMIT ?"
+        )
+        for _, _, edge_type, s_type, s_file, s_name, d_type, d_file, d_name in rows:
+            u_id = graph._node_id(s_type, s_file, s_name)
+            v_id = graph._node_id(d_type, d_file, d_name)
+            if data:
+                yield u_id, v_id, {'type': EDGE_TYPES[edge_type]}
+            else:
+                yield u_id, v_id
+
+    def __iter__(self):
+        return self(data=False)
+
+    def __getitem__(self, edge):
+        graph = self._graph
+        row = graph.conn.execute(
+            "SELECT type FROM edges WHERE src = ? AND dst = ?",
+            (graph._require(edge[0]), graph._require(edge[1]))
+        ).fetchone()
+        if row is None:
+            raise KeyError(edge)
+        return {'type': EDGE_TYPES[row[0]]}
+
+
+class SQLiteGraph:
+    """
+    An out-of-core Code Context Graph stored in a SQLite file.
+
+    Implements the same networkx.DiGraph subset as CompactGraph. Writes
+    are committed in batches of `batch_size` statements and all reads are
+    paged queries, so memory use stays flat however large the repo is.
+    It also indexes symbols by simple name and call sites by callee name,
+    which the analyzer uses for call resolution instead of in-memory
+    dictionaries.
+
+    The graph may be handed from one thread to another (e.g. between
+    pipeline stages) but must not be used by two threads at once.
+    """
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._pending = 0
+        self._recent = {}
+
+    # --- storage helpers ----------------------------------------------
+
+    def _write(self, sql, params=()):
+        cursor = self.conn.execute(sql, params)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.commit()
+        return cursor
+
+    def commit(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    def clear(self):
+        """Deletes every node, edge and metadata entry."""
+        for table in ("edges", "nodes", "callees", "meta"):
+            self.conn.execute(f"DELETE FROM {table}")
+        self.commit()
+        self._recent.clear()
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+        self.commit()
+
+    def _paged(self, sql, params=()):
+        """Runs a keyset-paginated query (`id > ? ... LIMIT ?`) and yields its rows."""
+        last = -1
+        while True:
+            rows = self.conn.execute(sql, params + (last, FETCH_SIZE)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def _paged_edges(self, sql):
+        last = (-1, -1)
+        while True:
+            rows = self.conn.execute(sql, last + (FETCH_SIZE,)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = (rows[-1][0], rows[-1][1])
+
+    @staticmethod
+    def _node_id(type_code, file_path, name):
+        node_type = NODE_TYPES[type_code]
+        if node_type == 'file':
+            return f"file:{file_path}"
+        return f"{NODE_PREFIXES[node_type]}:file:{file_path}:{name}"
+
+    @staticmethod
+    def _attrs(type_code, file_path, name, extras):
+        attrs = {'type': NODE_TYPES[type_code], 'file': file_path}
+        if NODE_TYPES[type_code] != 'file':
+            attrs['name'] = name
+        if extras:
+            attrs.update(json.loads(extras))
+        return attrs
+
+    @staticmethod
+    def _parse_node_id(node_id):
+        prefix, _, rest = node_id.partition(':')
+        node_type = _PREFIX_TYPES.get(prefix)
+        if node_type is None:
+            return None
+        if node_type == 'file':
+            return _TYPE_CODES['file'], rest, ""
+        if not rest.startswith('file:'):
+            return None
+        path, _, name = rest[len('file:'):].rpartition(':')
+        return _TYPE_CODES[node_type], path, name
+
+    def _find(self, node_id):
+        row_id = self._recent.get(node_id)
+        if row_id is not None:
+            return row_id
+        parsed = self._parse_node_id(node_id)
+        if parsed is None:
+            return None
+        type_code, path, name = parsed
+        row = self.conn.execute(
+            "SELECT id FROM nodes WHERE file = ? AND name = ? AND type = ?", (path, name, type_code)
+        ).fetchone()
+        if row is None:
+            return None
+        if len(self._recent) >= _RECENT_IDS:
+            self._recent.clear()
+        self._recent[node_id] = row[0]
+        return row[0]
+
+    def _require(self, node_id):
+        row_id = self._find(node_id)
+        if row_id is None:
+            raise KeyError(node_id)
+        return row_id
+
+    def _write_extras(self, row_id, extras):
+        self._write("UPDATE nodes SET extras = ? WHERE id = ?", (json.dumps(extras) if extras else None, row_id))
+
+    def _set_extra(self, row_id, key, value):
+        row = self.conn.execute("SELECT extras FROM nodes WHERE id = ?", (row_id,)).fetchone()
+        extras = json.loads(row[0]) if row[0] else {}
+        extras[key] = value
+        self._write_extras(row_id, extras)
+        if key == 'calls':
+            self._write("DELETE FROM callees WHERE file_id = ?", (row_id,))
+            short_names = {_short_name(callee) for _, callee in value}
+            self.conn.executemany(
+                "INSERT INTO callees (file_id, short_name) VALUES (?, ?)",
+                [(row_id, short_name) for short_name in short_names]
+            )
+
+    # --- networkx-compatible API --------------------------------------
+
+    @property
+    def nodes(self):
+        return _NodeView(self)
+
+    @property
+    def edges(self):
+        return _EdgeView(self)
+
+    def add_node(self, node_id, **attrs):
+        row_id = self._find(node_id)
+        if row_id is None:
+            parsed = self._parse_node_id(node_id)
+            if parsed is None:
+                raise ValueError(f"Unsupported node ID: {node_id}")
+            type_code, path, name = parsed
+            row_id = self._write(
+                "INSERT INTO nodes (type, file, name, short_name) VALUES (?, ?, ?, ?)",
+                (type_code, path, name, _short_name(name) if name else "")
+            ).lastrowid
+
+        for key, value in attrs.items():
+            if key not in _IDENTITY_KEYS:
+                self._set_extra(row_id, key, value)
+        return row_id
+
+    def add_nodes_from(self, nodes):
+        for node_id, attrs in nodes:
+            self.add_node(node_id, **attrs)
+
+    def add_edge(self, u_id, v_id, type='defines'):
+        u = self._find(u_id)
+        if u is None:
+            u = self.add_node(u_id)
+        v = self._find(v_id)
+        if v is None:
+            v = self.add_node(v_id)
+        self._write(
+            "INSERT OR REPLACE INTO edges (src, dst, type) VALUES (?, ?, ?)", (u, v, _EDGE_CODES[type])
+        )
+
+    def add_edges_from(self, edges):
+        for u_id, v_id, attrs in edges:
+            self.add_edge(u_id, v_id, **attrs)
+
+    def has_node(self, node_id):
+        return self._find(node_id) is not None
+
+    def has_edge(self, u_id, v_id):
+        u, v = self._find(u_id), self._find(v_id)
+        if u is None or v is None:
+            return False
+        return self.conn.execute("SELECT 1 FROM edges WHERE src = ? AND dst = ?", (u, v)).fetchone() is not None
+
+    def _neighbors(self, sql, node_id):
+        rows = self.conn.execute(sql, (self._require(node_id),)).fetchall()
+        return iter([self._node_id(*row) for row in rows])
+
+    def successors(self, node_id):
+        return self._neighbors(
+            "SELECT n.type, n.file, n.name FROM edges e JOIN nodes n ON n.id = e.dst WHERE e.src = ?", node_id
+        )
+
+    def predecessors(self, node_id):
+        return self._neighbors(
+            "SELECT n.type, n.file, n.name FROM edges e JOIN nodes n ON n.id = e.src WHERE e.dst = ?", node_id
+        )
+
+    def remove_edges_from(self, edges):
+        for u_id, v_id in edges:
+            u, v = self._find(u_id), self._find(v_id)
+            if u is not None and v is not None:
+                self._write("DELETE FROM edges WHERE src = ? AND dst = ?", (u, v))
+
+    def remove_node(self, node_id):
+        row_id = self._require(node_id)
+        self._write("DELETE FROM edges WHERE src = ? OR dst = ?", (row_id, row_id))
+        self._write("DELETE FROM callees WHERE file_id = ?", (row_id,))
+        self._write("DELETE FROM nodes WHERE id = ?", (row_id,))
+        self._recent.clear()
+
+    def remove_nodes_from(self, node_ids):
+        for node_id in node_ids:
+            if self.has_node(node_id):
+                self.remove_node(node_id)
+
+    def number_of_nodes(self):
+        return self.conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def number_of_edges(self):
+        return self.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+    # --- streaming queries --------------------------------------------
+
+    def node_records(self):
+        """Yields (row_id, type, file, name) for every node, in insertion order."""
+        for row_id, type_code, file_path, name in self._paged(
+                "SELECT id, type, file, name FROM nodes WHERE id > ? ORDER BY id LIMIT ?"):
+            yield row_id, NODE_TYPES[type_code], file_path, name or None
+
+    def edge_records(self):
+        """Yields (src_row_id, dst_row_id, edge type) for every edge."""
+        for src, dst, edge_type in self._paged_edges(
+                "SELECT src, dst, type FROM edges WHERE (src, dst) > (?, ?) ORDER BY src, dst LIMIT ?"):
+            yield src, dst, EDGE_TYPES[edge_type]
+
+    def api_entries(self):
+        """
+        Yields (file, classes, functions) for every file defining symbols,
+        ordered by path, holding one file's symbols in memory at a time.
+        """
+        rows = self.conn.execute(
+            "SELECT file, type, name FROM nodes WHERE type != ? ORDER BY file, id", (_TYPE_CODES['file'],)
+        )
+        current, classes, functions = None, [], []
+        while True:
+            batch = rows.fetchmany(FETCH_SIZE)
+            if not batch:
+                break
+            for file_path, type_code, name in batch:
+                if file_path != current:
+                    if current is not None:
+                        yield current, classes, functions
+                    current, classes, functions = file_path, [], []
+                (classes if NODE_TYPES[type_code] == 'class' else functions).append(name)
+        if current is not None:
+            yield current, classes, functions
+
+    def symbols_in_file(self, file_path):
+        """Returns {"classes": [...], "functions": [...]} defined in one file."""
+        symbols = {"classes": [], "functions": []}
+        rows = self.conn.execute(
+            "SELECT type, name FROM nodes WHERE file = ? AND type != ? ORDER BY id",
+            (file_path, _TYPE_CODES['file'])
+        )
+        for type_code, name in rows:
+            symbols["classes" if NODE_TYPES[type_code] == 'class' else "functions"].append(name)
+        return symbols
+
+    def files_defining(self, name):
+        """Returns the sorted paths of files defining `name` (qualified or simple)."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT file FROM nodes WHERE short_name = ? AND type != ? AND (name = ? OR short_name = ?)"
+            " ORDER BY file",
+            (_short_name(name), _TYPE_CODES['file'], name, name)
+        )
+        return [row[0] for row in rows]
+
+    def file_node_counts(self):
+        """Yields (file, node type, count), aggregated in SQL."""
+        for file_path, type_code, count in self.conn.execute(
+                "SELECT file, type, COUNT(*) FROM nodes GROUP BY file, type"):
+            yield file_path, NODE_TYPES[type_code], count
+
+    def file_edge_counts(self):
+        """Yields (source file, target file, edge type, count) for edges between files."""
+        rows = self.conn.execute(
+            "SELECT s.file, d.file, e.type, COUNT(*) FROM edges e"
+            " JOIN nodes s ON s.id = e.src JOIN nodes d ON d.id = e.dst"
+            " WHERE s.file != d.file GROUP BY s.file, d.file, e.type"
+        )
+        for u_file, v_file, edge_type, count in rows:
+            yield u_file, v_file, EDGE_TYPES[edge_type], count
+
+    def file_node_ids(self):
+        """Returns every file node ID (a list, so callers may modify the graph while iterating)."""
+        return [f"file:{row[0]}" for row in self.conn.execute(
+            "SELECT file FROM nodes WHERE type = ? ORDER BY id", (_TYPE_CODES['file'],)
+        )]
+
+    def find_symbols(self, short_name):
+        """Returns the IDs of every function/class node whose simple name is `short_name`."""
+        rows = self.conn.execute(
+            "SELECT type, file, name FROM nodes WHERE short_name = ? AND type != ?",
+            (short_name, _TYPE_CODES['file'])
+        ).fetchall()
+        return {self._node_id(*row) for row in rows}
+
+    def add_callees(self, node_id, short_names):
+        """Indexes a file node as also calling `short_names` (e.g. names imported under an alias)."""
+        row_id = self._require(node_id)
+        known = {row[0] for row in self.conn.execute("SELECT short_name FROM callees WHERE file_id = ?", (row_id,))}
+        self.conn.executemany(
+            "INSERT INTO callees (file_id, short_name) VALUES (?, ?)",
+            [(row_id, short_name) for short_name in set(short_names) - known]
+        )
+
+    def files_calling(self, short_name):
+        """Returns the IDs of file nodes with a call site whose callee's simple name is `short_name`."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT n.file FROM callees c JOIN nodes n ON n.id = c.file_id WHERE c.short_name = ?",
+            (short_name,)
+        ).fetchall()
+        return {f"file:{row[0]}" for row in rows}
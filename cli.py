@@ -0,0 +1,301 @@
+"""
+Headless batch documentation: clones, analyzes and documents many
+repositories in parallel and writes one markdown file per repository
+plus a JSON run report.
+
+    python cli.py --input repos.txt --output-dir docs_output --resume
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from ccg_mermaid import DEFAULT_NODE_BUDGET
+from code_analyzer import CodeAnalyzer
+from doc_genie import DEFAULT_MODEL, DEFAULT_REQUESTS_PER_MINUTE, DocGenie
+from instrumentation import Instrumentation
+from llm_cache import LLMCache
+from llm_resilience import LLMError, ResilientCaller
+from parse_cache import ParseCache
+from pipeline import Pipeline
+from rate_limiter import RateLimiter
+from repo_mapper import RepoMapper
+from symbol_index import DEFAULT_SYMBOL_INDEX_PATH, SymbolIndex
+
+REPORT_FILE = "run_report.json"
+
+
+def read_sources(paths, input_file=None):
+    """Returns repository URLs/paths from the arguments and an optional list file (one per line, # comments)."""
+    sources = list(paths)
+    if input_file:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    sources.append(line)
+    return list(dict.fromkeys(sources))
+
+
+def source_url(source):
+    """Local repository paths become file:// URLs so they clone like remote ones."""
+    if os.path.isdir(source):
+        return Path(source).resolve().as_uri()
+    return source
+
+
+def docs_file_name(url):
+    name = url.rstrip('/').split('/')[-1].replace('.git', '') or "repo"
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+    return f"{name}-{digest}_docs.md"
+
+
+class RunReport:
+    """
+    The JSON report of a batch, rewritten after every repository so an
+    interrupted batch can be resumed from it. `batch_metrics` is an
+    Instrumentation for counters shared by the whole batch (LLM calls,
+    retries, ...); each repository entry carries its own metrics.
+    """
+    def __init__(self, path, resume=False, batch_metrics=None):
+        self.path = path
+        self.batch_metrics = batch_metrics
+        self.entries = {}
+        if resume and os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = {entry["source"]: entry for entry in json.load(f).get("repositories", [])}
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self._lock = threading.Lock()
+
+    def finished(self, source):
+        """True if `source` was documented successfully by an earlier run."""
+        entry = self.entries.get(source)
+        if entry is None or entry["status"] != "success":
+            return False
+        docs_path = os.path.join(os.path.dirname(self.path), entry["docs_file"])
+        return os.path.isfile(docs_path)
+
+    def record(self, entry):
+        with self._lock:
+            self.entries[entry["source"]] = entry
+            self._write()
+
+    def summary(self):
+        statuses = [entry["status"] for entry in self.entries.values()]
+        return {status: statuses.count(status) for status in sorted(set(statuses))}
+
+    def _write(self):
+        report = {
+            "started": self.started,
+            "updated": datetime.now().isoformat(timespec='seconds'),
+            "summary": self.summary(),
+            "batch_counters": self.batch_metrics.to_dict()["counters"] if self.batch_metrics else {},
+            "repositories": list(self.entries.values()),
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+class BatchDocumenter:
+    """
+    Documents repositories on a pool of `jobs` threads. Cloning, parsing
+    and LLM generation each have their own concurrency limit, so e.g.
+    many repos can wait on the LLM while only a few parse at once.
+    """
+    def __init__(self, args):
+        self.args = args
+        self.clone_slots = threading.BoundedSemaphore(args.clone_concurrency)
+        self.parse_slots = threading.BoundedSemaphore(args.parse_concurrency)
+        self.llm_slots = threading.BoundedSemaphore(args.llm_concurrency)
+        # Shared by every repository: one cache, one rate limit and one
+        # circuit breaker for the provider.
+        self.llm_cache = LLMCache()
+        self.rate_limiter = RateLimiter(args.requests_per_minute) if args.requests_per_minute else None
+        self.batch_metrics = Instrumentation()
+        self.resilience = ResilientCaller(instrumentation=self.batch_metrics)
+        self.symbol_index = SymbolIndex(args.symbol_index)
+        self.report = RunReport(os.path.join(args.output_dir, REPORT_FILE), resume=args.resume,
+                                batch_metrics=self.batch_metrics)
+
+    def run(self, sources):
+        pending = [source for source in sources if not self.report.finished(source)]
+        skipped = len(sources) - len(pending)
+        if skipped:
+            print(f"Resuming: skipping {skipped} already documented repositories.")
+        print(f"Documenting {len(pending)} repositories with {self.args.jobs} workers...")
+        with ThreadPoolExecutor(max_workers=self.args.jobs, thread_name_prefix="repo") as executor:
+            list(executor.map(self.document, pending))
+        return self.report.summary()
+
+    def document(self, source):
+        url = source_url(source)
+        started = time.perf_counter()
+        entry = {"source": source, "url": url, "status": "failed", "commit": None,
+                 "docs_file": docs_file_name(url), "error": None}
+        instrumentation = Instrumentation(profile=self.args.profile)
+        try:
+            entry.update(self._document(url, instrumentation))
+        except LLMError as e:
+            entry["error"] = f"LLM: {e}"
+        except Exception as e:
+            entry["error"] = str(e)
+            print(traceback.format_exc())
+        entry["seconds"] = round(time.perf_counter() - started, 2)
+        entry["metrics"] = instrumentation.to_dict()
+        print(f"[{source}] {entry['status']} in {entry['seconds']:.1f}s"
+              + (f": {entry['error']}" if entry["error"] else ""))
+        self.report.record(entry)
+
+    def _document(self, url, instrumentation):
+        args = self.args
+        doc_genie = DocGenie(
+            args.api_key, cache=self.llm_cache, bypass_cache=args.bypass_llm_cache, model_name=args.model,
+            resilience=self.resilience, rate_limiter=self.rate_limiter, instrumentation=instrumentation
+        )
+        mapper = RepoMapper(url, doc_genie=doc_genie, no_checkout=not args.checkout,
+                            instrumentation=instrumentation)
+        # The workspace and its saved CCG belong to this job until the analysis is done.
+        with mapper.reserve_workspace():
+            with self.clone_slots:
+                if not mapper.clone_repo():
+                    return {"status": "clone_failed", "error": "Failed to clone the repository"}
+
+            def summarize_readme():
+                with self.llm_slots:
+                    return mapper.get_readme_summary()
+
+            def analyze_code(file_tree):
+                with self.parse_slots:
+                    analyzer = CodeAnalyzer(
+                        mapper.local_repo_path,
+                        workers=args.parse_workers,
+                        cache=ParseCache(),
+                        graph_backend='sqlite' if args.disk_graph else 'networkx',
+                        instrumentation=instrumentation
+                    )
+                    previous_sha = analyzer.load_state() if mapper.previous_sha else None
+                    changes = mapper.get_changed_files(previous_sha) if previous_sha else None
+                    if changes is not None:
+                        analyzer.update_repository(changes, sources=mapper.source_files)
+                    else:
+                        analyzer.analyze_sources(mapper.source_files)
+                    analyzer.save_state(mapper.head_sha)
+                    return analyzer
+
+            def render_graph(analysis):
+                return analysis.get_ccg_as_mermaid(max_nodes=DEFAULT_NODE_BUDGET)
+
+            # After the graph stage: the SQLite backend's graph can't be read by two threads at once.
+            def extract_api(analysis, mermaid_graph):
+                if args.map_reduce:
+                    return analysis.get_api_reference()
+                return analysis.get_api_reference_data()
+
+            def index_symbols(analysis, api):
+                return self.symbol_index.update(url, mapper.repo_name, mapper.head_sha, analysis.get_api_reference())
+
+            pipeline = Pipeline(instrumentation=instrumentation)
+            pipeline.add("file_tree", mapper.build_file_tree)
+            pipeline.add("readme_summary", summarize_readme)
+            pipeline.add("analysis", analyze_code, deps=["file_tree"])
+            pipeline.add("mermaid_graph", render_graph, deps=["analysis"])
+            pipeline.add("api", extract_api, deps=["analysis", "mermaid_graph"])
+            pipeline.add("symbol_index", index_symbols, deps=["analysis", "api"])
+            results = pipeline.run()
+
+        with self.llm_slots, instrumentation.span("stage:docs"):
+            if args.map_reduce:
+                docs = doc_genie.generate_docs_map_reduce(
+                    repo_name=mapper.repo_name,
+                    readme_summary=results["readme_summary"],
+                    file_tree=results["file_tree"],
+                    mermaid_graph=results["mermaid_graph"],
+                    api_reference=results["api"]
+                )
+            else:
+                docs = doc_genie.generate_final_docs(
+                    repo_name=mapper.repo_name,
+                    readme_summary=results["readme_summary"],
+                    file_tree=results["file_tree"],
+                    mermaid_graph=results["mermaid_graph"],
+                    api_data=results["api"]
+                )
+
+        docs_path = os.path.join(args.output_dir, docs_file_name(url))
+        with open(docs_path, 'w', encoding='utf-8') as f:
+            f.write(docs)
+        return {
+            "status": "success",
+            "repo_name": mapper.repo_name,
+            "commit": mapper.head_sha,
+            "stage_seconds": {name: round(seconds, 2) for name, seconds in pipeline.timings.items()},
+            "prompt_report": doc_genie.last_prompt_report,
+            "symbols": results["symbol_index"],
+        }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Generate documentation for many repositories without the Streamlit UI."
+    )
+    parser.add_argument("sources", nargs="*", help="Repository URLs or local git repository paths.")
+    parser.add_argument("--input", help="File listing repository URLs/paths, one per line.")
+    parser.add_argument("--output-dir", default="docs_output", help="Where docs and the run report are written.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip repositories the existing run report marks as documented.")
+    parser.add_argument("--jobs", type=int, default=4, help="Repositories processed at once.")
+    parser.add_argument("--clone-concurrency", type=int, default=2, help="Clones/fetches running at once.")
+    parser.add_argument("--parse-concurrency", type=int, default=1, help="Repositories being parsed at once.")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1,
+                        help="Parser processes per repository being parsed.")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Repositories calling the LLM at once.")
+    parser.add_argument("--requests-per-minute", type=int, default=DEFAULT_REQUESTS_PER_MINUTE,
+                        help="Rate limit for LLM calls across the whole batch (0 for none).")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Gemini model name.")
+    parser.add_argument("--api-key", default=os.environ.get("GOOGLE_API_KEY"),
+                        help="Google API key (defaults to $GOOGLE_API_KEY).")
+    parser.add_argument("--map-reduce", action="store_true", help="Document each package separately, in parallel.")
+    parser.add_argument("--checkout", action="store_true",
+                        help="Check out a working tree instead of reading files from git objects.")
+    parser.add_argument("--disk-graph", action="store_true", help="Keep the code graph on disk.")
+    parser.add_argument("--bypass-llm-cache", action="store_true",
+                        help="Regenerate AI text instead of reusing cached responses.")
+    parser.add_argument("--symbol-index", default=DEFAULT_SYMBOL_INDEX_PATH,
+                        help="SQLite symbol index updated with every documented repository.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile code analysis with cProfile; reports go into the run report.")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    sources = read_sources(args.sources, args.input)
+    if not sources:
+        parser.error("no repositories given")
+    if not args.api_key:
+        parser.error("no API key: pass --api-key or set GOOGLE_API_KEY")
+    for option in ("jobs", "clone_concurrency", "parse_concurrency", "parse_workers", "llm_concurrency"):
+        if getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    started = time.perf_counter()
+    summary = BatchDocumenter(args).run(sources)
+    print(f"Batch finished in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{count} {status}" for status, count in summary.items()))
+    print(f"Report: {os.path.join(args.output_dir, REPORT_FILE)}")
+    return 0 if set(summary) <= {"success"} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
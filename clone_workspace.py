@@ -0,0 +1,203 @@
+import hashlib
+import os
+import shutil
+import stat
+import threading
+from contextlib import contextmanager
+from git import Repo, GitCommandError
+
+DEFAULT_WORKSPACE_DIR = ".codebase_genius_workspaces"
+DEFAULT_DISK_BUDGET = 5 * 1024 * 1024 * 1024
+
+_path_locks = {}
+_reservations = {}
+_path_locks_guard = threading.Lock()
+
+
+def _remove_readonly(func, path, exc_info):
+    """
+    Error handler for shutil.rmtree.
+    If the error is due to a read-only file, it changes the permissions
+    and tries to remove it again. This is crucial for Windows.
+    """
+    if not os.access(path, os.W_OK):
+        os.chmod(path, stat.S_IWRITE)
+        func(path)
+    else:
+        raise
+
+
+def _lock_for(path):
+    with _path_locks_guard:
+        return _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def _reservation_for(path):
+    with _path_locks_guard:
+        return _reservations.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class CloneWorkspace:
+    """
+    A managed directory of reusable clones, one per repository URL.
+
+    New clones are shallow and blobless by default. A repeat checkout of
+    the same URL fetches and resets the existing clone instead of cloning
+    again. Once the workspaces exceed `disk_budget` bytes, the least
+    recently used ones are deleted, except those reserved by a running
+    job. Each workspace's size is recorded when it is cloned or updated,
+    so eviction never has to walk the other workspaces.
+
+    Bare checkouts (no working tree) are kept separately and are never
+    blobless, since their blobs are read directly from the object store.
+    """
+    def __init__(self, root=DEFAULT_WORKSPACE_DIR, disk_budget=DEFAULT_DISK_BUDGET,
+                 shallow=True, blobless=True):
+        self.root = root
+        self.disk_budget = disk_budget
+        self.shallow = shallow
+        self.blobless = blobless
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, url, bare=False):
+        """Returns the workspace directory used for `url`."""
+        name = url.rstrip('/').split('/')[-1].replace('.git', '') or "repo"
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]
+        suffix = "-bare" if bare else ""
+        return os.path.join(self.root, f"{name}-{digest}{suffix}")
+
+    def checkout(self, url, bare=False):
+        """
+        Makes the workspace for `url` match the remote HEAD.
+        Returns (path, previous_sha, head_sha); previous_sha is None when
+        the repo had to be cloned from scratch.
+        """
+        path = self.path_for(url, bare)
+        with _lock_for(path):
+            previous_sha = self._refresh(url, path, bare)
+            if previous_sha is None:
+                self._clone(url, path, bare)
+            head_sha = Repo(path).head.commit.hexsha
+            os.utime(path)
+
+        self._record_size(path)
+        self.evict(keep=path)
+        return path, previous_sha, head_sha
+
+    @contextmanager
+    def reserve(self, url, bare=False):
+        """
+        Holds the workspace for `url` exclusively for the enclosed block:
+        other jobs on the same workspace wait, and evict() skips it. Hold
+        it from checkout until the job no longer needs the clone or the
+        files stored next to it (e.g. its saved CCG).
+        """
+        with _reservation_for(self.path_for(url, bare)):
+            yield
+
+    def _size_path(self, path):
+        return f"{path}.size"
+
+    def _record_size(self, path):
+        size = _dir_size(path)
+        with open(self._size_path(path), 'w', encoding='utf-8') as f:
+            f.write(str(size))
+        return size
+
+    def _recorded_size(self, path):
+        try:
+            with open(self._size_path(path), 'r', encoding='utf-8') as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return self._record_size(path)
+
+    def _clone_options(self, bare):
+        options = []
+        if self.shallow:
+            options.append('--depth=1')
+        if self.blobless and not bare:
+            options.append('--filter=blob:none')
+        return options
+
+    def _clone(self, url, path, bare):
+        if os.path.exists(path):
+            print(f"Removing old repo at {path}...")
+            shutil.rmtree(path, onerror=_remove_readonly)
+            print("Old repo removed successfully.")
+
+        print(f"Cloning {url} into {path}...")
+        Repo.clone_from(url, path, bare=bare, multi_options=self._clone_options(bare))
+        print("Clone successful.")
+
+    def _refresh(self, url, path, bare):
+        """
+        Fetches and hard-resets an existing clone of `url`.
+        Returns its HEAD before the update, or None if there is no
+        reusable clone.
+        """
+        git_dir = path if bare else os.path.join(path, '.git')
+        if not os.path.isfile(os.path.join(git_dir, 'HEAD')):
+            return None
+        try:
+            repo = Repo(path)
+            if repo.remotes.origin.url != url:
+                return None
+
+            previous_sha = repo.head.commit.hexsha
+            print(f"Updating existing checkout at {path}...")
+            fetch_options = ['--depth=1'] if self.shallow else []
+            repo.git.fetch(*fetch_options, 'origin', 'HEAD')
+            if bare:
+                repo.git.update_ref('HEAD', 'FETCH_HEAD')
+            else:
+                repo.git.reset('--hard', 'FETCH_HEAD')
+                repo.git.clean('-fd')
+            print(f"Update successful ({previous_sha[:7]} -> {repo.head.commit.hexsha[:7]}).")
+            return previous_sha
+        except (GitCommandError, ValueError, AttributeError) as e:
+            print(f"Could not update existing checkout, re-cloning: {e}")
+            return None
+
+    def evict(self, keep=None):
+        """Deletes least recently used workspaces until under the disk budget."""
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path):
+                entries.append((os.path.getmtime(path), path, self._recorded_size(path)))
+
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= self.disk_budget:
+                break
+            if keep and os.path.abspath(path) == os.path.abspath(keep):
+                continue
+            reservation = _reservation_for(path)
+            if not reservation.acquire(blocking=False):
+                continue
+            try:
+                with _lock_for(path):
+                    print(f"Evicting workspace {path} to stay within the disk budget...")
+                    shutil.rmtree(path, onerror=_remove_readonly)
+                    self._remove_sidecars(path)
+            finally:
+                reservation.release()
+            total -= size
+
+    def _remove_sidecars(self, path):
+        """Removes files stored next to a workspace, e.g. its saved CCG."""
+        prefix = os.path.basename(path) + '.'
+        for name in os.listdir(self.root):
+            if name.startswith(prefix):
+                os.remove(os.path.join(self.root, name))
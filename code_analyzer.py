@@ -1,156 +1,828 @@
 import os
-from tree_sitter import Parser
-from tree_sitter_languages import get_language
-import networkx as nx
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from parse_cache import blob_sha, grammar_version
+from repo_scanner import RepoScanner
+from compact_graph import CompactGraph, iter_edge_records, iter_node_records
+from ccg_store import SQLiteGraph
+from api_index import ApiIndex, iter_api_reference_text
+from ccg_mermaid import DEFAULT_NODE_BUDGET, MermaidRenderer
+from instrumentation import Instrumentation
+from languages import LANGUAGES, dotted_name, language_for, module_name
+from parser_pool import get_query, parser_pool
+
+# Bump whenever the shape of the per-file symbol records changes, so
+# records cached by older versions are not reused.
+RECORD_VERSION = 3
+
+# Files resolved, parsed and merged per batch, which bounds how many
+# symbol records are held in memory at once.
+ANALYSIS_BATCH_SIZE = 256
+
+
+def _definition_kind(language, node):
+    """Returns "functions" or "classes" if `node` defines one in `language`, else None."""
+    node_type = node.type
+    if node_type in language.functions:
+        return "functions"
+    if node_type in language.classes:
+        return "classes"
+    if node_type in language.function_values:
+        value = node.child_by_field_name('value')
+        if value is not None and value.type in language.function_value_types:
+            return "functions"
+    return None
+
+
+def _extract_symbols(parser, code, language):
+    """
+    Parses source bytes of a registered `language` (see languages.py)
+    and walks the syntax tree once with a cursor, returning a compact
+    symbol record:
+    {"classes": [...], "functions": [...], "imports": [[target, local], ...],
+     "calls": [[caller, callee], ...], "receivers": {method: name, ...}}.
+    Names are qualified by their enclosing classes/functions
+    (`Class.method`); a caller of "" means module level. `receivers`
+    holds the receiver names of methods that declare one (Go).
+    """
+    code = code.decode('utf-8', errors='ignore').encode('utf8')
+    tree = parser.parse(code)
+    record = {"classes": [], "functions": [], "imports": [], "calls": [], "receivers": {}}
+    scopes = []
+    depth = 0
+    cursor = tree.walk()
+
+    while True:
+        node = cursor.node
+        node_type = node.type
+        kind = _definition_kind(language, node)
+        if kind is not None:
+            name_node = node.child_by_field_name('name')
+            if name_node is not None:
+                name = name_node.text.decode('utf8')
+                owner = language.owner(node) if language.owner is not None else None
+                if owner:
+                    qualified = f"{owner}.{name}"
+                else:
+                    qualified = f"{scopes[-1][0]}.{name}" if scopes else name
+                record[kind].append(qualified)
+                receiver = language.receiver(node) if language.receiver is not None else None
+                if receiver:
+                    record["receivers"][qualified] = receiver
+                scopes.append((qualified, depth))
+        elif node_type in language.calls:
+            callee = dotted_name(node.child_by_field_name(language.calls[node_type]))
+            if callee is not None:
+                record["calls"].append([scopes[-1][0] if scopes else "", callee])
+        elif node_type in language.imports:
+            record["imports"].extend(language.import_names(node))
+
+        if cursor.goto_first_child():
+            depth += 1
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return record
+            depth -= 1
+        # Moving to a sibling leaves every scope opened at this depth or below.
+        while scopes and scopes[-1][1] >= depth:
+            scopes.pop()
+
+
+def _called_names(calls, imports):
+    """
+    Returns the simple names a file's call sites may refer to: each
+    callee's own name, plus the imported name behind an aliased import
+    (`from m import f as g; g()` calls "g" and "f").
+    """
+    aliases = {}
+    for target, local in imports:
+        imported = target.rsplit('.', 1)[-1]
+        if imported != local:
+            aliases[local] = imported
+    names = set()
+    for _, callee in calls:
+        names.add(callee.rsplit('.', 1)[-1])
+        if callee in aliases:
+            names.add(aliases[callee])
+    return names
+
+
+def _module_matches(module, target):
+    """True if an import target (possibly relative) names `module`."""
+    target = target.lstrip('.')
+    return bool(target) and (module == target or module.endswith('.' + target))
+
+
+def _read_source(file_path):
+    """Reads a source file's raw bytes."""
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+def _load_source(source):
+    """Returns the bytes of a source given as a file path, bytes, or a loader callable."""
+    if isinstance(source, str):
+        return _read_source(source)
+    if callable(source):
+        return source()
+    return source
+
+
+def _parse_worker(task):
+    """
+    Pool task: parses one file and returns (record, error).
+    `task` is (language name, source) where `source` is either a file
+    path or the file's bytes. Each worker process loads a grammar the
+    first time it sees that language and keeps its parsers pooled.
+    Exactly one of the two return values is None.
+    """
+    language_name, source = task
+    try:
+        code = _load_source(source)
+        language = LANGUAGES[language_name]
+        with parser_pool(language.grammar).acquire() as parser:
+            return _extract_symbols(parser, code, language), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _pool_context():
+    """
+    Start method for parse worker processes. Callers run analyses on
+    threads, and forking a threaded process can copy a lock some other
+    thread holds; forkserver (spawn where it's unavailable) starts
+    workers from a clean process instead.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
 
 class CodeAnalyzer:
     """
-    Parses all Python files in a repository and builds a 
-    Code Context Graph (CCG).
+    Parses the source files of a repository in every language registered
+    in languages.py (Python, JavaScript, TypeScript, Go) and builds a
+    Code Context Graph (CCG). A language's grammar is loaded the first
+    time one of its files is parsed, so repos only pay for the languages
+    they contain.
+
+    `workers` controls how many processes parse files. 1 (the default)
+    parses serially in this process; None or 0 uses one worker per CPU.
+    `cache` is an optional ParseCache; files whose contents are already
+    cached skip tree-sitter entirely.
+    `graph_backend` is 'networkx' (a networkx.DiGraph), 'compact'
+    (a CompactGraph with interned strings and array-backed adjacency,
+    for very large repos) or 'sqlite' (a SQLiteGraph at `store_path`,
+    which keeps the graph and its indexes on disk so memory use stays
+    flat for repos that don't fit in memory).
+    Timings and counters (files parsed, bytes read, graph size) go to
+    `instrumentation`; analysis runs under its profiler if enabled.
     """
-    def __init__(self, repo_path):
+    def __init__(self, repo_path, workers=1, cache=None, graph_backend='networkx', store_path=None,
+                 instrumentation=None):
         self.repo_path = repo_path
-        self.parser = Parser()
-        
-        try:
-            self.PYTHON_LANGUAGE = get_language('python')
-          
-            self.parser.set_language(self.PYTHON_LANGUAGE)
-         
+        self.state_path = f"{os.path.normpath(repo_path)}.ccg.json"
+        self.store_path = store_path or f"{os.path.normpath(repo_path)}.ccg.sqlite"
+        self.workers = workers if workers else (os.cpu_count() or 1)
+        self.cache = cache
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        # Grammars and parsers are process-wide and per language (see
+        # parser_pool), so only the first analyzer in a process to meet a
+        # language pays for loading it.
 
-        except Exception as e:
-            print(f"Error loading tree-sitter Python grammar: {e}")
-            print("Please ensure 'tree-sitter-languages' and 'tree-sitter-python' are installed.")
-            print(f"Full traceback: {e}")
-            raise Exception("Python parser for tree-sitter is not loaded.")
+        self.graph_backend = graph_backend
+        self.ccg = self._new_graph()
+        # Simple symbol name -> node IDs defining it, and simple callee
+        # name -> file node IDs calling it; used to resolve call edges.
+        # The sqlite backend keeps these indexes in its store instead.
+        self.symbol_index = {}
+        self.callers = {}
+        # Per-file API index, kept in step with the CCG (in-memory backends).
+        self.api_index = ApiIndex()
+
+    def _new_graph(self):
+        if self.graph_backend == 'compact':
+            return CompactGraph()
+        if self.graph_backend == 'networkx':
+            import networkx as nx
+            return nx.DiGraph()
+        if self.graph_backend == 'sqlite':
+            return SQLiteGraph(self.store_path)
+        raise ValueError(f"Unknown graph backend: {self.graph_backend}")
 
-        self.ccg = nx.DiGraph() 
-        self.query_cache = {} 
+    def _reset_graph(self):
+        """Empties the CCG and its indexes before a full analysis."""
+        if self.graph_backend == 'sqlite':
+            self.ccg.clear()
+        else:
+            self.ccg = self._new_graph()
+        self.symbol_index = {}
+        self.callers = {}
+        self.api_index = ApiIndex()
 
-    def _get_query(self, query_str):
-        """Compiles and caches a tree-sitter query."""
-        if query_str not in self.query_cache:
-           
-            self.query_cache[query_str] = self.PYTHON_LANGUAGE.query(query_str)
-        return self.query_cache[query_str]
+    def _commit_graph(self):
+        if self.graph_backend == 'sqlite':
+            self.ccg.commit()
+
+    def _index_symbol(self, name, node_id):
+        if self.graph_backend != 'sqlite':
+            self.symbol_index.setdefault(name.rsplit('.', 1)[-1], set()).add(node_id)
+
+    def _index_calls(self, file_node_id, calls, imports):
+        names = _called_names(calls, imports)
+        if self.graph_backend == 'sqlite':
+            # The store indexes the callees' own names; add the aliased ones.
+            self.ccg.add_callees(file_node_id, names)
+            return
+        for name in names:
+            self.callers.setdefault(name, set()).add(file_node_id)
+
+    def _symbols_named(self, name):
+        """Returns the IDs of function/class nodes whose simple name is `name`."""
+        if self.graph_backend == 'sqlite':
+            return self.ccg.find_symbols(name)
+        return self.symbol_index.get(name, set())
+
+    def _files_calling(self, name):
+        """Returns the IDs of file nodes that call something named `name`."""
+        if self.graph_backend == 'sqlite':
+            return self.ccg.files_calling(name)
+        return self.callers.get(name, set())
+
+    def _file_node_ids(self):
+        if self.graph_backend == 'sqlite':
+            return self.ccg.file_node_ids()
+        return [
+            f"file:{file_path}"
+            for _, node_type, file_path, _ in iter_node_records(self.ccg)
+            if node_type == 'file'
+        ]
+
+    def _get_query(self, query_str, language='python'):
+        """Returns a compiled tree-sitter query for a language, cached process-wide."""
+        return get_query(LANGUAGES[language].grammar, query_str)
 
     def analyze_repository(self):
-        """Walks the repo and analyzes each Python file."""
+        """Walks the repo and analyzes each source file."""
+        self.analyze_sources(
+            (entry.path, os.path.join(self.repo_path, entry.path), entry.hash)
+            for entry in RepoScanner(self.repo_path).scan()
+            if entry.language is not None
+        )
+
+    def analyze_sources(self, sources):
+        """
+        Builds the CCG from scratch for a prepared set of files, such as
+        RepoMapper.source_files. `sources` is an iterable of
+        (relative_path, source, content_hash) where `source` is a file
+        path, bytes, or a callable returning bytes (e.g. a git blob), and
+        `content_hash` is the file's git blob SHA or None.
+        Sources are only loaded on a cache miss.
+        """
         print("Starting repository analysis...")
-        for root, _, files in os.walk(self.repo_path):
-            if '.git' in root or 'venv' in root:
-                continue
-            
-            for file in files:
-                if file.endswith('.py'):
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, self.repo_path)
-                    
-                    file_node_id = f"file:{relative_path}"
-                    self.ccg.add_node(file_node_id, type='file')
-                    
-                    self._parse_file(file_path, file_node_id)
+        with self.instrumentation.span("analyze_sources"), self.instrumentation.profile("analyze_sources"):
+            self._reset_graph()
+            self._analyze_sources(sources)
+            with self.instrumentation.span("resolve_calls"):
+                self._resolve_calls(self._file_node_ids())
+        self._record_graph_size()
         print("Repository analysis complete.")
 
+    def _analyze_sources(self, sources):
+        """
+        Resolves records from the cache, parses the rest, and merges them
+        into the CCG in input order, ANALYSIS_BATCH_SIZE files at a time,
+        so `sources` can be a lazy iterable of any length.
+        Returns the number of files parsed.
+        """
+        sources = iter(sources)
+        parsed = 0
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+        try:
+            while True:
+                batch = list(islice(sources, ANALYSIS_BATCH_SIZE))
+                if not batch:
+                    break
+                with self.instrumentation.span("parse_batch"):
+                    parsed += self._analyze_batch(batch, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if self.cache is not None:
+            stats = self.cache.stats()
+            print(f"Parse cache: {stats['hits']} hits, {stats['misses']} misses.")
+        self._commit_graph()
+        return parsed
+
+    def _analyze_batch(self, sources, executor):
+        """Analyzes one batch of sources; returns the number of files parsed."""
+        records = [None] * len(sources)
+        pending = []
+
+        for index, (relative_path, source, content_hash) in enumerate(sources):
+            language = language_for(relative_path)
+            if language is None:
+                continue
+            if self.cache is not None:
+                if content_hash is None:
+                    try:
+                        source = self._load(source)
+                    except OSError as e:
+                        print(f"Warning: Could not read {relative_path}. Error: {e}")
+                        continue
+                    content_hash = blob_sha(source)
+                records[index] = self.cache.get(self._cache_key(language, content_hash))
+                if records[index] is not None:
+                    self.instrumentation.count("files_from_cache")
+                    continue
+            pending.append((index, language, source, content_hash))
+
+        if executor is not None and len(pending) > 1:
+            # Loader callables can't be sent to worker processes.
+            results = self._parse_parallel(executor, [
+                (language, source if isinstance(source, (str, bytes)) else self._load(source))
+                for _, language, source, _ in pending
+            ])
+            # Workers read file paths themselves; count those bytes here.
+            for _, _, source, _ in pending:
+                if isinstance(source, str):
+                    try:
+                        self.instrumentation.count("bytes_read", os.path.getsize(source))
+                    except OSError:
+                        pass
+        else:
+            results = (self._parse_source(source, language) for _, language, source, _ in pending)
+
+        for (index, language, _, content_hash), (record, error) in zip(pending, results):
+            if error is not None:
+                print(f"Warning: Could not parse {sources[index][0]}. Error: {error}")
+                self.instrumentation.count("parse_errors")
+                continue
+            self.instrumentation.count("files_parsed")
+            self.instrumentation.count(f"files_parsed_{language}")
+            records[index] = record
+            if self.cache is not None:
+                self.cache.put(self._cache_key(language, content_hash), record)
+
+        for (relative_path, _, _), record in zip(sources, records):
+            file_node_id = f"file:{relative_path}"
+            self.ccg.add_node(file_node_id, type='file', file=relative_path)
+            if record is not None:
+                self._merge_record(file_node_id, record)
+
+        if self.cache is not None:
+            self.cache.flush()
+        return len(pending)
+
+    def _cache_key(self, language, content_hash):
+        # The same bytes give different records in different languages.
+        return f"{grammar_version()}:{RECORD_VERSION}:{language}:{content_hash}"
+
+    def _parse_parallel(self, executor, sources):
+        """
+        Shards (language, source) pairs across the process pool and returns their
+        (record, error) results in input order, so the merged graph
+        is identical to the serial path.
+        """
+        workers = min(self.workers, len(sources))
+        chunksize = max(1, len(sources) // (workers * 4))
+        print(f"Parsing {len(sources)} files with {workers} worker processes...")
+        return list(executor.map(_parse_worker, sources, chunksize=chunksize))
+
+    def _load(self, source):
+        """_load_source, counting the bytes read unless `source` already is bytes."""
+        code = _load_source(source)
+        if not isinstance(source, bytes):
+            self.instrumentation.count("bytes_read", len(code))
+        return code
+
+    def _parse_source(self, source, language='python'):
+        """Parses a file path or source bytes in-process; returns (record, error)."""
+        try:
+            code = self._load(source)
+            spec = LANGUAGES[language]
+            with parser_pool(spec.grammar).acquire() as parser:
+                record = _extract_symbols(parser, code, spec)
+            return record, None
+        except Exception as e:
+            return None, str(e)
+
     def _parse_file(self, file_path, file_node_id):
         """Parses a single file to find functions, classes, and calls."""
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            try:
-                code = f.read()
-                tree = self.parser.parse(bytes(code, "utf8"))
-                
-                func_query_str = "(function_definition name: (identifier) @func.name)"
-                func_query = self._get_query(func_query_str)
-                for capture, _ in func_query.captures(tree.root_node):
-                    func_name = capture.text.decode('utf8')
-                    func_node_id = f"func:{file_node_id}:{func_name}"
-                    self.ccg.add_node(func_node_id, type='function')
-                    self.ccg.add_edge(file_node_id, func_node_id, type='defines')
-
-                class_query_str = "(class_definition name: (identifier) @class.name)"
-                class_query = self._get_query(class_query_str)
-                for capture, _ in class_query.captures(tree.root_node):
-                    class_name = capture.text.decode('utf8')
-                    class_node_id = f"class:{file_node_id}:{class_name}"
-                    self.ccg.add_node(class_node_id, type='class')
-                    self.ccg.add_edge(file_node_id, class_node_id, type='defines')
-
-            except Exception as e:
-                print(f"Warning: Could not parse {file_path}. Error: {e}")
-
-    def get_ccg_as_mermaid(self):
-        """Converts the NetworkX graph into a Mermaid.js string."""
-        mermaid_str = "graph TD;\n"
+        record, error = self._parse_source(file_path, language_for(file_path) or 'python')
+        if error is not None:
+            print(f"Warning: Could not parse {file_path}. Error: {error}")
+            return
+        self._merge_record(file_node_id, record)
+
+    def _merge_record(self, file_node_id, record):
+        """
+        Adds the symbols from a per-file record to the CCG. Methods and
+        nested definitions hang off their enclosing class/function;
+        call sites are kept on the file node until _resolve_calls.
+        """
+        relative_path = file_node_id[len("file:"):]
+        self.ccg.nodes[file_node_id]['imports'] = record["imports"]
+        self.ccg.nodes[file_node_id]['calls'] = record["calls"]
+
+        kinds = {name: 'func' for name in record["functions"]}
+        kinds.update((name, 'class') for name in record["classes"])
+        defined = [(name, 'func', 'function') for name in record["functions"]]
+        defined += [(name, 'class', 'class') for name in record["classes"]]
+
+        receivers = record.get("receivers", {})
+        for name, prefix, node_type in defined:
+            node_id = f"{prefix}:{file_node_id}:{name}"
+            self.ccg.add_node(node_id, type=node_type, file=relative_path, name=name)
+            if prefix == 'func' and name in receivers:
+                self.ccg.nodes[node_id]['receiver'] = receivers[name]
+            self._index_symbol(name, node_id)
+
+        for name, prefix, _ in defined:
+            parent_id = file_node_id
+            if '.' in name:
+                parent = name.rsplit('.', 1)[0]
+                if parent in kinds:
+                    parent_id = f"{kinds[parent]}:{file_node_id}:{parent}"
+            self.ccg.add_edge(parent_id, f"{prefix}:{file_node_id}:{name}", type='defines')
+
+        self._index_calls(file_node_id, record["calls"], record["imports"])
+        if self.graph_backend != 'sqlite':
+            self.api_index.add_file(relative_path, record)
+
+    def _defined_nodes(self, file_node_id):
+        """Returns every node reachable from a file through 'defines' edges."""
+        found = []
+        stack = [file_node_id]
+        while stack:
+            node = stack.pop()
+            for child in self.ccg.successors(node):
+                if self.ccg.edges[node, child].get('type') == 'defines':
+                    found.append(child)
+                    stack.append(child)
+        return found
+
+    def _resolve_calls(self, file_node_ids):
+        """
+        (Re)builds the 'calls' edges that originate in the given files,
+        resolving each call site against the repo-wide symbol index.
+        """
+        for file_node_id in file_node_ids:
+            if not self.ccg.has_node(file_node_id):
+                continue
+            for node in [file_node_id] + self._defined_nodes(file_node_id):
+                stale = [
+                    (node, target) for target in self.ccg.successors(node)
+                    if self.ccg.edges[node, target].get('type') == 'calls'
+                ]
+                self.ccg.remove_edges_from(stale)
+
+            data = self.ccg.nodes[file_node_id]
+            imports = {local: target for target, local in data.get('imports', [])}
+            for caller, callee in data.get('calls', []):
+                target = self._resolve_callee(file_node_id, caller, callee, imports)
+                if target is None:
+                    continue
+                source = self._caller_node_id(file_node_id, caller)
+                # A function calling a helper it defines keeps its 'defines' edge.
+                if not self.ccg.has_edge(source, target):
+                    self.ccg.add_edge(source, target, type='calls')
+        self._commit_graph()
+
+    def _caller_node_id(self, file_node_id, caller):
+        for prefix in ('func', 'class'):
+            node_id = f"{prefix}:{file_node_id}:{caller}"
+            if caller and self.ccg.has_node(node_id):
+                return node_id
+        return file_node_id
+
+    def _resolve_callee(self, file_node_id, caller, callee, imports):
+        """
+        Maps a call expression to a function/class node, or None.
+        Tries, in order: definitions in enclosing scopes and the same
+        file, `self.`/`cls.`/`this.` (or a Go method's named receiver)
+        methods of the enclosing class, imported names and modules, and
+        finally a repo-wide unique top-level definition.
+        """
+        parts = callee.split('.')
+        name = parts[-1]
+        candidates = self._symbols_named(name)
+
+        if len(parts) == 1:
+            scope = caller
+            while scope and candidates:
+                node_id = f"func:{file_node_id}:{scope}.{name}"
+                if node_id in candidates:
+                    return node_id
+                scope = scope.rsplit('.', 1)[0] if '.' in scope else ""
+            for prefix in ('func', 'class'):
+                node_id = f"{prefix}:{file_node_id}:{name}"
+                if node_id in candidates:
+                    return node_id
+            # An imported name may be an alias (`from m import f as g`):
+            # look the target up by its own name.
+            target = imports.get(name)
+            if target is not None and '.' in target.lstrip('.'):
+                module, imported = target.rsplit('.', 1)
+                imported_candidates = candidates if imported == name else self._symbols_named(imported)
+                match = self._find_in_module(imported_candidates, module, imported)
+                if match is not None:
+                    return match
+            top_level = [c for c in candidates if self.ccg.nodes[c].get('name') == name]
+            return top_level[0] if len(top_level) == 1 else None
+
+        if not candidates:
+            return None
+
+        receiver = parts[0]
+        if len(parts) == 2 and receiver == self._receiver_name(file_node_id, caller):
+            # A Go type's methods may be spread over the files of its package.
+            method = f"{caller.rsplit('.', 1)[0]}.{name}"
+            node_id = f"func:{file_node_id}:{method}"
+            if node_id in candidates:
+                return node_id
+            package = module_name(file_node_id[len("file:"):])
+            for node_id in sorted(candidates):
+                data = self.ccg.nodes[node_id]
+                if data.get('name') == method and module_name(data['file']) == package:
+                    return node_id
+            return None
+
+        if receiver in ('self', 'cls', 'this') and len(parts) == 2:
+            scope = caller
+            while '.' in scope:
+                scope = scope.rsplit('.', 1)[0]
+                if self.ccg.has_node(f"class:{file_node_id}:{scope}"):
+                    node_id = f"func:{file_node_id}:{scope}.{name}"
+                    return node_id if node_id in candidates else None
+            return None
+
+        if receiver in imports:
+            target = imports[receiver]
+            if target == receiver or target.startswith(receiver + '.'):
+                module = '.'.join(parts[:-1])
+            else:
+                module = '.'.join([target] + parts[1:-1])
+            return self._find_in_module(candidates, module, name)
+        return None
+
+    def _receiver_name(self, file_node_id, caller):
+        """The receiver name `caller` declared (Go's `s` in `func (s *Server)`), or None."""
+        node_id = f"func:{file_node_id}:{caller}"
+        if not caller or not self.ccg.has_node(node_id):
+            return None
+        return self.ccg.nodes[node_id].get('receiver')
+
+    def _find_in_module(self, candidates, module, name):
+        for node_id in sorted(candidates):
+            data = self.ccg.nodes[node_id]
+            if data.get('name') == name and _module_matches(module_name(data['file']), module):
+                return node_id
+        # Languages like Go import whole packages by their full path
+        # ("github.com/org/repo/pkg"), of which the repo-relative package
+        # is only the tail.
+        for node_id in sorted(candidates):
+            data = self.ccg.nodes[node_id]
+            language = language_for(data['file'])
+            if data.get('name') != name or language is None or not LANGUAGES[language].package_imports:
+                continue
+            package = module_name(data['file'])
+            if package and module.endswith('.' + package):
+                return node_id
+        return None
+
+    def update_repository(self, changes, sources=None):
+        """
+        Patches the CCG in place for a diff between two commits.
+        `changes` maps "added", "modified" and "deleted" to lists of
+        repo-relative paths (see RepoMapper.get_changed_files). Only
+        those files are removed and/or re-parsed. Changed files are read
+        from the checkout unless `sources` (as for analyze_sources) is
+        given. Call edges are re-resolved for the changed files and for
+        files that call any symbol they define or used to define.
+        """
+        print("Starting incremental repository analysis...")
+        with self.instrumentation.span("update_repository"), self.instrumentation.profile("update_repository"):
+            items, parsed = self._update_repository(changes, sources)
+        self._record_graph_size()
+        print(f"Incremental analysis complete: {len(items)} changed files, {parsed} re-parsed.")
+
+    def _update_repository(self, changes, sources):
+        """Does the work of update_repository; returns (changed items, files re-parsed)."""
+        affected_names = set()
+        for relative_path in changes.get("deleted", []) + changes.get("modified", []):
+            affected_names |= self._remove_file(f"file:{relative_path}")
+
+        changed = changes.get("added", []) + changes.get("modified", [])
+        if sources is None:
+            scanner = RepoScanner(self.repo_path)
+            items = []
+            for relative_path in changed:
+                entry = scanner.entry_for(relative_path)
+                if entry is not None and entry.language is not None:
+                    file_path = os.path.join(self.repo_path, relative_path)
+                    items.append((relative_path, file_path, entry.hash))
+        else:
+            wanted = set(changed)
+            items = [item for item in sources if item[0] in wanted]
+
+        parsed = self._analyze_sources(items)
+
+        to_resolve = set()
+        for relative_path, _, _ in items:
+            file_node_id = f"file:{relative_path}"
+            to_resolve.add(file_node_id)
+            for node in self._defined_nodes(file_node_id):
+                affected_names.add(self.ccg.nodes[node]['name'].rsplit('.', 1)[-1])
+        for name in affected_names:
+            to_resolve |= self._files_calling(name)
+        with self.instrumentation.span("resolve_calls"):
+            self._resolve_calls(sorted(to_resolve))
+        return items, parsed
+
+    def _record_graph_size(self):
+        self.instrumentation.set("ccg_nodes", self.ccg.number_of_nodes())
+        self.instrumentation.set("ccg_edges", self.ccg.number_of_edges())
+
+    def _remove_file(self, file_node_id):
+        """
+        Removes a file node and every symbol node it defines.
+        Returns the simple names of the removed symbols.
+        """
+        if not self.ccg.has_node(file_node_id):
+            return set()
+        doomed = self._defined_nodes(file_node_id)
+        names = set()
+        for node in doomed:
+            name = self.ccg.nodes[node]['name'].rsplit('.', 1)[-1]
+            names.add(name)
+            self.symbol_index.get(name, set()).discard(node)
+        data = self.ccg.nodes[file_node_id]
+        for name in _called_names(data.get('calls', []), data.get('imports', [])):
+            self.callers.get(name, set()).discard(file_node_id)
+        self.ccg.remove_nodes_from(doomed + [file_node_id])
+        self.api_index.remove_file(file_node_id[len("file:"):])
+        return names
+
+    def _rebuild_indexes(self):
+        """Rebuilds the symbol, caller and API indexes from the CCG."""
+        self.symbol_index = {}
+        self.callers = {}
+        self.api_index = ApiIndex()
+        records = {}
         for node, data in self.ccg.nodes(data=True):
-            node_type = data.get('type')
-            
-            clean_node_id = node.replace(':', '_').replace('/', '_').replace('.', '_').replace('\\', '_')
+            if data.get('type') == 'file':
+                records.setdefault(data['file'], {"classes": [], "functions": []})
+                for name in _called_names(data.get('calls', []), data.get('imports', [])):
+                    self.callers.setdefault(name, set()).add(node)
+            elif 'name' in data:
+                self.symbol_index.setdefault(data['name'].rsplit('.', 1)[-1], set()).add(node)
+                kind = "classes" if data['type'] == 'class' else "functions"
+                records.setdefault(data['file'], {"classes": [], "functions": []})[kind].append(data['name'])
+        for file_path, record in records.items():
+            self.api_index.add_file(file_path, record)
+
+    def save_state(self, commit_sha, path=None):
+        """
+        Saves the CCG and the commit it describes, for later incremental
+        runs. The sqlite backend is already on disk, so it only records
+        the commit in its store and ignores `path`.
+        """
+        if self.graph_backend == 'sqlite':
+            self.ccg.set_meta("record_version", RECORD_VERSION)
+            self.ccg.set_meta("commit", commit_sha)
+            return
+        state = {
+            "commit": commit_sha,
+            "record_version": RECORD_VERSION,
+            "nodes": [[node, dict(data)] for node, data in self.ccg.nodes(data=True)],
+            "edges": [[u, v, data] for u, v, data in self.ccg.edges(data=True)],
+        }
+        # Written aside and renamed, so a reader never sees a half-written state.
+        path = path or self.state_path
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+
+    def load_state(self, path=None):
+        """
+        Loads a CCG saved by save_state. Returns the commit SHA it was
+        built from, or None if there is no usable saved state.
+        """
+        if self.graph_backend == 'sqlite':
+            if self.ccg.get_meta("record_version") != RECORD_VERSION:
+                return None
+            return self.ccg.get_meta("commit")
+
+        path = path or self.state_path
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load saved CCG from {path}. Error: {e}")
+            return None
+        if state.get("record_version") != RECORD_VERSION:
+            return None
+
+        self.ccg = self._new_graph()
+        self.ccg.add_nodes_from((node, data) for node, data in state["nodes"])
+        self.ccg.add_edges_from((u, v, data) for u, v, data in state["edges"])
+        self._rebuild_indexes()
+        return state["commit"]
+
+    def iter_ccg_as_mermaid(self):
+        """
+        Yields the Mermaid.js rendering of the CCG line by line, streaming
+        nodes and edges from the graph, so it can be written straight to
+        a file without building the whole string.
+        """
+        yield "graph TD;\n"
+        # Backends with integer node keys need no ID mapping.
+        mermaid_ids = {}
+        for key, node_type, file_path, name in iter_node_records(self.ccg):
+            if isinstance(key, int):
+                mermaid_id = f"n{key}"
+            else:
+                mermaid_id = mermaid_ids[key] = f"n{len(mermaid_ids)}"
 
             if node_type == 'file':
-                label = f"[{os.path.basename(node)}]"
-                mermaid_str += f'    {clean_node_id}(("{label}"))\n'
+                yield f'    {mermaid_id}(("[{os.path.basename(file_path)}]"))\n'
             elif node_type == 'function':
-                label = f"{node.split(':')[-1]}()"
-                mermaid_str += f'    {clean_node_id}[/"{label}"/]\n'
+                yield f'    {mermaid_id}[/"{name}()"/]\n'
             elif node_type == 'class':
-                label = f"{node.split(':')[-1]}"
-                mermaid_str += f'    {clean_node_id}["{label}"]\n'
-
-        for u, v, data in self.ccg.edges(data=True):
-            clean_u = u.replace(':', '_').replace('/', '_').replace('.', '_').replace('\\', '_')
-            clean_v = v.replace(':', '_').replace('/', '_').replace('.', '_').replace('\\', '_')
-            edge_type = data.get('type')
-            
+                yield f'    {mermaid_id}["{name}"]\n'
+
+        for u, v, edge_type in iter_edge_records(self.ccg):
+            u_id = f"n{u}" if isinstance(u, int) else mermaid_ids[u]
+            v_id = f"n{v}" if isinstance(v, int) else mermaid_ids[v]
             if edge_type == 'defines':
-                mermaid_str += f"    {clean_u} -- defines --> {clean_v}\n"
-        
-        return mermaid_str
+                yield f"    {u_id} -- defines --> {v_id}\n"
+            elif edge_type == 'calls':
+                yield f"    {u_id} -. calls .-> {v_id}\n"
+
+    def get_ccg_as_mermaid(self, max_nodes=None, focus=None):
+        """
+        Converts the CCG into a Mermaid.js string. With `max_nodes` the
+        diagram is clustered by directory and collapsed into package
+        nodes once it would exceed that many nodes; `focus` (a file or
+        package path) draws only that part of the repo and its neighbours.
+        See MermaidRenderer.
+        """
+        with self.instrumentation.span("mermaid"):
+            if max_nodes is None and focus is None:
+                return "".join(self.iter_ccg_as_mermaid())
+            return MermaidRenderer(self.ccg, max_nodes or DEFAULT_NODE_BUDGET).render(focus)
+
+    def symbols_in_file(self, file_path):
+        """Returns {"classes": [...], "functions": [...]} defined in a file."""
+        if self.graph_backend == 'sqlite':
+            return self.ccg.symbols_in_file(file_path)
+        return self.api_index.symbols_in(file_path)
+
+    def files_defining(self, name):
+        """Returns the sorted paths of files defining `name` (qualified or simple)."""
+        if self.graph_backend == 'sqlite':
+            return self.ccg.files_defining(name)
+        return self.api_index.files_defining(name)
+
+    def _api_entries(self):
+        if self.graph_backend == 'sqlite':
+            return self.ccg.api_entries()
+        return self.api_index.entries()
+
+    def get_api_reference(self):
+        """
+        Returns the API reference as structured data:
+        {file_path: {"classes": [...], "functions": [...]}}.
+        """
+        with self.instrumentation.span("api_reference"):
+            return {
+                file_path: {"classes": classes, "functions": functions}
+                for file_path, classes, functions in self._api_entries()
+            }
+
+    def get_api_reference_json(self, **kwargs):
+        return json.dumps(self.get_api_reference(), **kwargs)
+
+    def iter_api_reference_data(self):
+        """
+        Yields the API reference text file by file. With the sqlite
+        backend only one file's symbols are held in memory at a time.
+        """
+        yield from iter_api_reference_text(self._api_entries())
 
     def get_api_reference_data(self):
         """
         Extracts all function and class names from the CCG
         to be used by the LLM for an API reference.
         """
-        api_data = {
-            "files": {},
-            "classes": [],
-            "functions": []
-        }
-    
-        for node, data in self.ccg.nodes(data=True):
-            node_type = data.get('type')
-            
-            if node_type == 'function':
-               
-                parts = node.split(':', 2)
-                if len(parts) == 3:
-                    file_path = parts[1]
-                    func_name = parts[2]
-                    if file_path not in api_data["files"]:
-                        api_data["files"][file_path] = {"functions": [], "classes": []}
-                    api_data["files"][file_path]["functions"].append(f"{func_name}()")
-                    
-            elif node_type == 'class':
-                
-                parts = node.split(':', 2)
-                if len(parts) == 3:
-                    file_path = parts[1]
-                    class_name = parts[2]
-                    if file_path not in api_data["files"]:
-                        api_data["files"][file_path] = {"functions": [], "classes": []}
-                    api_data["files"][file_path]["classes"].append(class_name)
-
-        formatted_string = "### API Reference Data\n\n"
-        for file_path, contents in api_data["files"].items():
-            if contents["classes"] or contents["functions"]:
-                formatted_string += f"**File: `{file_path}`**\n"
-                if contents["classes"]:
-                    formatted_string += "  - Classes: " + ", ".join(contents["classes"]) + "\n"
-                if contents["functions"]:
-                    formatted_string += "  - Functions: " + ", ".join(contents["functions"]) + "\n"
-                formatted_string += "\n"
-                
-        if not api_data["files"]:
-            return "No functions or classes were found by the parser."
-            
-        return formatted_string
\ No newline at end of file
+        with self.instrumentation.span("api_reference"):
+            return "".join(self.iter_api_reference_data())
@@ -0,0 +1,386 @@
+from array import array
+from collections.abc import MutableMapping
+
+NODE_TYPES = ['file', 'function', 'class']
+NODE_PREFIXES = {'file': 'file', 'function': 'func', 'class': 'class'}
+EDGE_TYPES = ['defines', 'calls']
+
+_TYPE_CODES = {name: code for code, name in enumerate(NODE_TYPES)}
+_PREFIX_TYPES = {prefix: node_type for node_type, prefix in NODE_PREFIXES.items()}
+_EDGE_CODES = {name: code for code, name in enumerate(EDGE_TYPES)}
+_EDGE_BITS = 2
+# String node IDs resolved recently; bounded so it never grows with the graph.
+_RECENT_IDS = 8192
+
+
+class StringTable:
+    """Interns strings and hands out stable integer IDs for them."""
+    def __init__(self):
+        self._ids = {}
+        self._strings = []
+
+    def intern(self, value):
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._ids[value] = string_id
+            self._strings.append(value)
+        return string_id
+
+    def find(self, value):
+        """Returns the ID of an already interned string, or None."""
+        return self._ids.get(value)
+
+    def lookup(self, string_id):
+        return self._strings[string_id]
+
+    def __len__(self):
+        return len(self._strings)
+
+
+class _NodeAttrs(MutableMapping):
+    """Write-through attribute view of one node, like networkx's node dicts."""
+    def __init__(self, graph, index):
+        self._graph = graph
+        self._index = index
+
+    def __getitem__(self, key):
+        graph, index = self._graph, self._index
+        if key == 'type':
+            return NODE_TYPES[graph._types[index]]
+        if key == 'file':
+            return graph.strings.lookup(graph._files[index])
+        if key == 'name' and graph._names[index] >= 0:
+            return graph.strings.lookup(graph._names[index])
+        return graph._extras[index][key]
+
+    def __setitem__(self, key, value):
+        if key in ('type', 'file', 'name'):
+            raise KeyError(f"'{key}' is part of the node's identity and cannot be changed")
+        self._graph._extras.setdefault(self._index, {})[key] = value
+
+    def __delitem__(self, key):
+        del self._graph._extras[self._index][key]
+
+    def _keys(self):
+        keys = ['type', 'file']
+        if self._graph._names[self._index] >= 0:
+            keys.append('name')
+        keys.extend(self._graph._extras.get(self._index, ()))
+        return keys
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __contains__(self, key):
+        return key in self._keys()
+
+
+class _NodeView:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __call__(self, data=False):
+        graph = self._graph
+        for index in graph._live_nodes():
+            node_id = graph._node_id(index)
+            yield (node_id, dict(_NodeAttrs(graph, index))) if data else node_id
+
+    def __iter__(self):
+        return self(data=False)
+
+    def __len__(self):
+        return self._graph.number_of_nodes()
+
+    def __contains__(self, node_id):
+        return self._graph.has_node(node_id)
+
+    def __getitem__(self, node_id):
+        return _NodeAttrs(self._graph, self._graph._require(node_id))
+
+
+class _EdgeView:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __call__(self, data=False):
+        graph = self._graph
+        for u in graph._live_nodes():
+            targets = graph._out[u]
+            if not targets:
+                continue
+            u_id = graph._node_id(u)
+            for packed in targets:
+                v_id = graph._node_id(packed >> _EDGE_BITS)
+                if data:
+                    yield u_id, v_id, {'type': EDGE_TYPES[packed & 3]}
+                else:
+                    yield u_id, v_id
+
+    def __iter__(self):
+        return self(data=False)
+
+    def __getitem__(self, edge):
+        graph = self._graph
+        u, v = graph._require(edge[0]), graph._require(edge[1])
+        edge_type = graph._edge_type(u, v)
+        if edge_type is None:
+            raise KeyError(edge)
+        return {'type': EDGE_TYPES[edge_type]}
+
+
+class CompactGraph:
+    """
+    A memory-compact directed graph for the Code Context Graph.
+
+    Nodes are integers. A node's type is a one-byte code and its file
+    path and symbol name are IDs into a shared StringTable, so a path is
+    stored once no matter how many symbols it defines. Each node's
+    outgoing and incoming edges are packed into one `array('q')` per
+    direction as (neighbor << 2 | edge type).
+
+    It implements the subset of the networkx.DiGraph API the analyzer
+    uses, addressed by the usual string node IDs
+    (`func:file:path/to/x.py:name`), which are rebuilt on demand rather
+    than stored; `type`, `file` and `name` attributes are derived from
+    the ID. to_networkx() converts for other consumers.
+    """
+    def __init__(self):
+        self.strings = StringTable()
+        self._types = array('b')
+        self._files = array('i')
+        self._names = array('i')
+        self._alive = bytearray()
+        self._out = []
+        self._in = []
+        self._extras = {}
+        self._index = {}
+        self._recent = {}
+        self._node_count = 0
+
+    # --- identity -----------------------------------------------------
+
+    @staticmethod
+    def _key(type_code, file_id, name_id):
+        return ((file_id << 32) | (name_id + 1)) << 2 | type_code
+
+    def _node_id(self, index):
+        node_type = NODE_TYPES[self._types[index]]
+        path = self.strings.lookup(self._files[index])
+        if node_type == 'file':
+            return f"file:{path}"
+        name = self.strings.lookup(self._names[index])
+        return f"{NODE_PREFIXES[node_type]}:file:{path}:{name}"
+
+    def _parse_node_id(self, node_id):
+        """Splits a string node ID into (type code, path, name or None)."""
+        prefix, _, rest = node_id.partition(':')
+        node_type = _PREFIX_TYPES.get(prefix)
+        if node_type is None:
+            return None
+        if node_type == 'file':
+            return _TYPE_CODES['file'], rest, None
+        if not rest.startswith('file:'):
+            return None
+        path, _, name = rest[len('file:'):].rpartition(':')
+        return _TYPE_CODES[node_type], path, name
+
+    def _find(self, node_id):
+        index = self._recent.get(node_id)
+        if index is not None:
+            return index
+        parsed = self._parse_node_id(node_id)
+        if parsed is None:
+            return None
+        type_code, path, name = parsed
+        file_id = self.strings.find(path)
+        name_id = -1 if name is None else self.strings.find(name)
+        if file_id is None or name_id is None:
+            return None
+        index = self._index.get(self._key(type_code, file_id, name_id))
+        if index is not None:
+            if len(self._recent) >= _RECENT_IDS:
+                self._recent.clear()
+            self._recent[node_id] = index
+        return index
+
+    def _require(self, node_id):
+        index = self._find(node_id)
+        if index is None:
+            raise KeyError(node_id)
+        return index
+
+    def _live_nodes(self):
+        alive = self._alive
+        return (index for index in range(len(alive)) if alive[index])
+
+    def _edge_type(self, u, v):
+        targets = self._out[u]
+        if targets:
+            for packed in targets:
+                if packed >> _EDGE_BITS == v:
+                    return packed & 3
+        return None
+
+    # --- networkx-compatible API --------------------------------------
+
+    @property
+    def nodes(self):
+        return _NodeView(self)
+
+    @property
+    def edges(self):
+        return _EdgeView(self)
+
+    def add_node(self, node_id, **attrs):
+        index = self._find(node_id)
+        if index is None:
+            parsed = self._parse_node_id(node_id)
+            if parsed is None:
+                raise ValueError(f"Unsupported node ID: {node_id}")
+            type_code, path, name = parsed
+            file_id = self.strings.intern(path)
+            name_id = -1 if name is None else self.strings.intern(name)
+            index = len(self._alive)
+            self._types.append(type_code)
+            self._files.append(file_id)
+            self._names.append(name_id)
+            self._alive.append(1)
+            self._out.append(None)
+            self._in.append(None)
+            self._index[self._key(type_code, file_id, name_id)] = index
+            self._node_count += 1
+
+        extras = {k: v for k, v in attrs.items() if k not in ('type', 'file', 'name')}
+        if extras:
+            self._extras.setdefault(index, {}).update(extras)
+        return index
+
+    def add_nodes_from(self, nodes):
+        for node_id, attrs in nodes:
+            self.add_node(node_id, **attrs)
+
+    def add_edge(self, u_id, v_id, type='defines'):
+        u = self._find(u_id)
+        if u is None:
+            u = self.add_node(u_id)
+        v = self._find(v_id)
+        if v is None:
+            v = self.add_node(v_id)
+        code = _EDGE_CODES[type]
+        if self._edge_type(u, v) is not None:
+            self._drop_edge(u, v)
+        if self._out[u] is None:
+            self._out[u] = array('q')
+        if self._in[v] is None:
+            self._in[v] = array('q')
+        self._out[u].append(v << _EDGE_BITS | code)
+        self._in[v].append(u << _EDGE_BITS | code)
+
+    def add_edges_from(self, edges):
+        for u_id, v_id, attrs in edges:
+            self.add_edge(u_id, v_id, **attrs)
+
+    def has_node(self, node_id):
+        return self._find(node_id) is not None
+
+    def has_edge(self, u_id, v_id):
+        u, v = self._find(u_id), self._find(v_id)
+        return u is not None and v is not None and self._edge_type(u, v) is not None
+
+    def successors(self, node_id):
+        targets = self._out[self._require(node_id)]
+        return iter([self._node_id(packed >> _EDGE_BITS) for packed in targets or ()])
+
+    def predecessors(self, node_id):
+        sources = self._in[self._require(node_id)]
+        return iter([self._node_id(packed >> _EDGE_BITS) for packed in sources or ()])
+
+    def _drop_edge(self, u, v):
+        self._out[u] = array('q', (p for p in self._out[u] if p >> _EDGE_BITS != v))
+        self._in[v] = array('q', (p for p in self._in[v] if p >> _EDGE_BITS != u))
+
+    def remove_edges_from(self, edges):
+        for u_id, v_id in edges:
+            u, v = self._find(u_id), self._find(v_id)
+            if u is not None and v is not None and self._edge_type(u, v) is not None:
+                self._drop_edge(u, v)
+
+    def remove_node(self, node_id):
+        index = self._require(node_id)
+        for packed in self._out[index] or ():
+            v = packed >> _EDGE_BITS
+            self._in[v] = array('q', (p for p in self._in[v] if p >> _EDGE_BITS != index))
+        for packed in self._in[index] or ():
+            u = packed >> _EDGE_BITS
+            self._out[u] = array('q', (p for p in self._out[u] if p >> _EDGE_BITS != index))
+        del self._index[self._key(self._types[index], self._files[index], self._names[index])]
+        self._alive[index] = 0
+        self._out[index] = None
+        self._in[index] = None
+        self._extras.pop(index, None)
+        self._recent.clear()
+        self._node_count -= 1
+
+    def remove_nodes_from(self, node_ids):
+        for node_id in node_ids:
+            if self.has_node(node_id):
+                self.remove_node(node_id)
+
+    def number_of_nodes(self):
+        return self._node_count
+
+    def number_of_edges(self):
+        return sum(len(targets) for targets in self._out if targets)
+
+    def to_networkx(self):
+        """Returns an equivalent networkx.DiGraph."""
+        import networkx as nx
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.nodes(data=True))
+        graph.add_edges_from(self.edges(data=True))
+        return graph
+
+    def node_records(self):
+        """Yields (index, type, file, name) for every node without building string IDs."""
+        strings = self.strings
+        for index in self._live_nodes():
+            name_id = self._names[index]
+            yield (
+                index,
+                NODE_TYPES[self._types[index]],
+                strings.lookup(self._files[index]),
+                strings.lookup(name_id) if name_id >= 0 else None,
+            )
+
+    def edge_records(self):
+        """Yields (u_index, v_index, edge type) for every edge."""
+        for u in self._live_nodes():
+            for packed in self._out[u] or ():
+                yield u, packed >> _EDGE_BITS, EDGE_TYPES[packed & 3]
+
+
+def iter_node_records(graph):
+    """
+    Yields (key, type, file, name) for each node of a networkx graph or
+    any backend with a node_records() method (CompactGraph, SQLiteGraph).
+    `key` identifies the node within the matching iter_edge_records()
+    output.
+    """
+    if hasattr(graph, 'node_records'):
+        yield from graph.node_records()
+        return
+    for node, data in graph.nodes(data=True):
+        yield node, data.get('type'), data.get('file'), data.get('name')
+
+
+def iter_edge_records(graph):
+    """Yields (u_key, v_key, edge type) for each edge, see iter_node_records()."""
+    if hasattr(graph, 'edge_records'):
+        yield from graph.edge_records()
+        return
+    for u, v, data in graph.edges(data=True):
+        yield u, v, data.get('type')
@@ -1,33 +1,238 @@
-import streamlit as st
-import google.generativeai as genai
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from llm_cache import prompt_key
+from api_index import group_by_package, render_api_reference
+from rate_limiter import RateLimiter
+from prompt_builder import DEFAULT_TOKEN_BUDGET, PromptBuilder, compress_file_tree, estimate_tokens, summarize_mermaid
+from llm_resilience import LLMError, ResilientCaller
+from instrumentation import Instrumentation
+
+DEFAULT_MODEL = 'gemini-2.5-flash-preview-09-2025'
+DEFAULT_MAP_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+FILE_TREE_PLACEHOLDER = "<<FILE_TREE>>"
+CCG_PLACEHOLDER = "<<CCG_DIAGRAM>>"
+
+# Gemini clients by (api_key, model_name), shared by every DocGenie in the process.
+_models = {}
+_models_lock = threading.Lock()
+
+
+def shared_model(api_key, model_name=DEFAULT_MODEL):
+    """
+    Returns the process-wide Gemini model client for `model_name`,
+    importing and configuring google.generativeai only on first use.
+    """
+    with _models_lock:
+        model = _models.get((api_key, model_name))
+        if model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            model = _models[(api_key, model_name)] = genai.GenerativeModel(model_name)
+        return model
+
+
+def _next_text(stream):
+    """Returns the next non-empty text chunk of a Gemini response stream, or None at the end."""
+    for chunk in stream:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. only safety metadata).
+            continue
+        if text:
+            return text
+    return None
+
+
+def _first_paragraph(section):
+    """Returns the first non-heading paragraph of a markdown section."""
+    for paragraph in section.strip().split("\n\n"):
+        paragraph = paragraph.strip()
+        if paragraph and not paragraph.startswith('#'):
+            return paragraph
+    return ""
+
+
+def _top_level_entries(entries):
+    """Keeps each file's top-level classes and functions, dropping methods and nested definitions."""
+    return [
+        (file_path, [name for name in classes if '.' not in name], [name for name in functions if '.' not in name])
+        for file_path, classes, functions in entries
+    ]
+
+
+def _count_entries(entries):
+    """The most compact API data for a package: each file with its symbol counts."""
+    lines = [
+        f"- `{file_path}`: {len(classes)} classes, {len(functions)} functions"
+        for file_path, classes, functions in entries if classes or functions
+    ]
+    return "\n".join(lines) + "\n"
 
 class DocGenie:
     """
     The agent responsible for all LLM-based generation.
     It summarizes READMEs and synthesizes the final documentation.
+
+    `cache` is an optional LLMCache; responses are then reused for
+    identical prompts to the same model. `bypass_cache` skips cache
+    lookups (fresh responses are still stored). `requests_per_minute`
+    caps the rate of Gemini calls across all threads; pass `rate_limiter`
+    instead to share one limit between several DocGenies.
+
+    Every call goes through `resilience` (a ResilientCaller: deadlines,
+    retries, hedging, circuit breaking); a call that still fails raises
+    LLMError. `model` replaces the Gemini model, e.g. with a
+    fake_llm.FakeGenerativeModel, in which case no API key is needed;
+    otherwise the process-wide client from shared_model() is used.
+    LLM call timings and prompt/response token counts (estimated) go to
+    `instrumentation`.
     """
-    def __init__(self, api_key):
-        if not api_key:
+    def __init__(self, api_key, cache=None, bypass_cache=False, model_name=DEFAULT_MODEL,
+                 requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, model=None, resilience=None,
+                 rate_limiter=None, instrumentation=None):
+        if not api_key and model is None:
             raise ValueError("Google API Key not found. Please set it in .streamlit/secrets.toml")
         
         try:
-            genai.configure(api_key=api_key)
-        
-            self.model = genai.GenerativeModel('gemini-2.5-flash-preview-09-2025')
+            self.model_name = model_name
+            if model is None:
+                model = shared_model(api_key, model_name)
+            self.model = model
+            self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+            if resilience is None:
+                resilience = ResilientCaller(instrumentation=self.instrumentation)
+            self.resilience = resilience
+            self.cache = cache
+            self.bypass_cache = bypass_cache
+            if rate_limiter is None and requests_per_minute:
+                rate_limiter = RateLimiter(requests_per_minute)
+            self.rate_limiter = rate_limiter
+            self.last_prompt_report = None
+            # This instance's own cache lookups; the cache may be shared.
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.cache_saved_seconds = 0.0
+            self._stats_lock = threading.Lock()
             print("DocGenie initialized with Gemini model.")
         except Exception as e:
             raise RuntimeError(f"Failed to configure Gemini model: {e}")
 
     def _generate_content(self, prompt, is_json=False):
-        """Helper function to call the Gemini API."""
+        """
+        Helper function to call the Gemini API, through the response cache
+        and the resilience layer. Raises LLMError if the call fails.
+        """
+        key = None
+        if self.cache is not None:
+            key = prompt_key(self.model_name, prompt)
+            if not self.bypass_cache:
+                cached = self._cached_response(key)
+                if cached is not None:
+                    print("Using cached Gemini response.")
+                    self.instrumentation.count("llm_cache_hits")
+                    return cached
+
+        def attempt(timeout):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            return self.model.generate_content(prompt, request_options={"timeout": timeout}).text
+
+        started = time.perf_counter()
+        self.instrumentation.count("prompt_tokens", estimate_tokens(prompt))
+        try:
+            with self.instrumentation.span("llm_call"):
+                text = self.resilience.call(attempt, self.instrumentation)
+        except LLMError as e:
+            print(f"Error generating content from Gemini: {e}")
+            raise
+        self.instrumentation.count("response_tokens", estimate_tokens(text or ""))
+
+        # Failures raise above, so only real responses are ever cached.
+        if key is not None and text:
+            self.cache.put(key, text, time.perf_counter() - started)
+        return text
+
+    def _stream_content(self, prompt):
+        """
+        Streaming counterpart of _generate_content: yields the response
+        in chunks as Gemini produces them. Cached responses are yielded
+        whole; a response is only cached once it has completed.
+        Deadlines, retries and hedging apply until the first chunk
+        arrives; an error after that raises LLMError mid-stream.
+        """
+        key = None
+        if self.cache is not None:
+            key = prompt_key(self.model_name, prompt)
+            if not self.bypass_cache:
+                cached = self._cached_response(key)
+                if cached is not None:
+                    print("Using cached Gemini response.")
+                    self.instrumentation.count("llm_cache_hits")
+                    yield cached
+                    return
+
+        def attempt(timeout):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            stream = iter(self.model.generate_content(prompt, stream=True, request_options={"timeout": timeout}))
+            return _next_text(stream), stream
+
+        started = time.perf_counter()
+        self.instrumentation.count("prompt_tokens", estimate_tokens(prompt))
         try:
-           
-            response = self.model.generate_content(prompt)
-            return response.text
+            text, stream = self.resilience.call(attempt, self.instrumentation)
+        except LLMError as e:
+            print(f"Error generating content from Gemini: {e}")
+            raise
+        self.instrumentation.set("llm_first_chunk_seconds", round(time.perf_counter() - started, 3))
+
+        chunks = []
+        try:
+            while text is not None:
+                chunks.append(text)
+                yield text
+                text = _next_text(stream)
+        except LLMError:
+            raise
         except Exception as e:
             print(f"Error generating content from Gemini: {e}")
+            raise LLMError(f"LLM stream interrupted: {e}") from e
 
-            return f"Error from LLM: {e}"
+        # Timed by hand: a span can't stay open across the consumer's yields.
+        self.instrumentation.add_span("llm_stream", started, time.perf_counter() - started)
+        self.instrumentation.count("response_tokens", estimate_tokens("".join(chunks)))
+        if key is not None and chunks:
+            self.cache.put(key, "".join(chunks), time.perf_counter() - started)
+
+    def _cached_response(self, key):
+        response, latency = self.cache.lookup(key)
+        with self._stats_lock:
+            if response is None:
+                self.cache_misses += 1
+            else:
+                self.cache_hits += 1
+                self.cache_saved_seconds += latency
+        return response
+
+    def cache_stats(self):
+        """
+        Returns the hits, misses, hit rate and seconds saved of this
+        DocGenie's own cache lookups (not of everyone sharing the cache),
+        or None if caching is off.
+        """
+        if self.cache is None:
+            return None
+        with self._stats_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+                "saved_seconds": self.cache_saved_seconds,
+            }
 
     def summarize_readme(self, readme_content):
         """
@@ -48,16 +253,110 @@ class DocGenie:
         """
         
         print("Sending README to Gemini for summarization...")
-        summary = self._generate_content(prompt)
+        try:
+            summary = self._generate_content(prompt)
+        except LLMError as e:
+            # The docs can still be generated without it, so say so plainly instead of failing.
+            return f"(The README could not be summarized: {e})"
         print("README summary received.")
         return summary
 
-    def generate_final_docs(self, repo_name, readme_summary, file_tree, mermaid_graph, api_data=None):
+    def _add_repo_context(self, builder, readme_summary, file_tree, mermaid_graph):
+        """
+        Adds the README summary, a compressed file tree and a summary of
+        the CCG to a PromptBuilder. The full tree and diagram are not
+        sent; _stream_verbatim() puts them into the generated document.
+        """
+        builder.add("README Summary", readme_summary, priority=3)
+        builder.add(
+            "File Tree (compressed)",
+            compress_file_tree(file_tree),
+            priority=1,
+            variants=[
+                lambda: compress_file_tree(file_tree, max_siblings=10, max_depth=4),
+                lambda: compress_file_tree(file_tree, max_siblings=5, max_depth=2),
+                lambda: compress_file_tree(file_tree, max_siblings=3, max_depth=1),
+            ],
+            original=file_tree
+        )
+        builder.add(
+            "Code Context Graph (summary)",
+            summarize_mermaid(mermaid_graph),
+            priority=2,
+            variants=[lambda: summarize_mermaid(mermaid_graph, top=3)],
+            original=mermaid_graph
+        )
+
+    def _stream_verbatim(self, chunks, file_tree, mermaid_graph):
+        """
+        Passes generated text through line by line, replacing the
+        placeholder lines the LLM was asked to write with the full tree
+        and diagram. Placeholders the LLM left out are appended as
+        sections at the end.
+        """
+        blocks = {
+            FILE_TREE_PLACEHOLDER: ("Repository Map", f"```\n{file_tree.rstrip()}\n```"),
+            CCG_PLACEHOLDER: ("Code Context Graph", f"```mermaid\n{mermaid_graph.rstrip()}\n```"),
+        }
+        missing = dict(blocks)
+        pending = ""
+        for chunk in chunks:
+            pending += chunk
+            if '\n' not in pending:
+                continue
+            complete, _, pending = pending.rpartition('\n')
+            for placeholder, (_, block) in blocks.items():
+                if placeholder in complete:
+                    complete = complete.replace(placeholder, block)
+                    missing.pop(placeholder, None)
+            yield complete + '\n'
+
+        for placeholder, (_, block) in blocks.items():
+            if placeholder in pending:
+                pending = pending.replace(placeholder, block)
+                missing.pop(placeholder, None)
+        if pending:
+            yield pending
+        for title, block in missing.values():
+            yield f"\n\n## {title}\n\n{block}\n"
+
+    def _report_prompt(self, report):
+        self.last_prompt_report = report
+        print(
+            f"Prompt: {report['prompt_tokens']} tokens (budget {report['token_budget']}), "
+            f"{report['saved_tokens']} saved from {report['original_tokens']}."
+        )
+
+    def generate_final_docs(self, repo_name, readme_summary, file_tree, mermaid_graph, api_data=None,
+                            token_budget=DEFAULT_TOKEN_BUDGET):
         """
         Generates the complete, final markdown documentation.
+        The prompt is compacted to `token_budget` tokens by a
+        PromptBuilder; last_prompt_report records the tokens saved.
         """
-        
-       
+        return "".join(self.stream_final_docs(
+            repo_name, readme_summary, file_tree, mermaid_graph, api_data, token_budget
+        ))
+
+    def stream_final_docs(self, repo_name, readme_summary, file_tree, mermaid_graph, api_data=None,
+                          token_budget=DEFAULT_TOKEN_BUDGET):
+        """
+        Generator form of generate_final_docs: yields the document in
+        chunks as Gemini writes it.
+        """
+        with self.instrumentation.span("prompt_assembly"):
+            prompt, report = self.build_final_prompt(
+                repo_name, readme_summary, file_tree, mermaid_graph, api_data, token_budget
+            )
+        self._report_prompt(report)
+
+        print("Sending all context to Gemini for final documentation...")
+        yield from self._stream_verbatim(self._stream_content(prompt), file_tree, mermaid_graph)
+        print("Final documentation received.")
+
+    def build_final_prompt(self, repo_name, readme_summary, file_tree, mermaid_graph, api_data=None,
+                           token_budget=DEFAULT_TOKEN_BUDGET):
+        """Assembles the final documentation prompt; returns (prompt, report) like PromptBuilder.build."""
         api_section_prompt = ""
         if api_data:
             api_section_prompt = f"""
@@ -66,60 +365,149 @@ class DocGenie:
             **Do not just paste the data**, describe it. 
             For example: "The file `utils.py` contains the helper function `do_thing()`."
         """
-        
-        api_data_prompt = ""
-        if api_data:
-            api_data_prompt = f"""
-        ---
-        **API Reference Data:**
-        {api_data}
-        """
-        
-        prompt = f"""
+
+        header = f"""
         You are 'Codebase Genius', an AI documentation writer.
         Your job is to generate a complete, well-organized markdown document
-        for a software repository.
+        for the software repository {repo_name}.
 
-        You have been given the following pieces of information:
-        1.  **Repo Name:** {repo_name}
-        2.  **README Summary:** {readme_summary}
-        3.  **File Tree:** A map of all files in the repo.
-        4.  **Code Context Graph (CCG):** A Mermaid diagram showing files, functions, and classes.
+        You have been given a README summary, a compressed map of the
+        repo's files and a summary of its Code Context Graph (CCG).
 
         Please assemble this information into a single, high-quality `docs.md` file.
         Use good markdown formatting. Be clear and professional.
         
         The final document should have these sections:
         1.  **Overview:** Start with the README summary.
-        2.  **Repository Map:** Show the complete file tree.
-        3.  **Code Context Graph:** Show the Mermaid diagram.
+        2.  **Repository Map:** Describe the layout, then write the line
+            {FILE_TREE_PLACEHOLDER} on its own; it will be replaced by the full file tree.
+        3.  **Code Context Graph:** Describe the structure, then write the line
+            {CCG_PLACEHOLDER} on its own; it will be replaced by the Mermaid diagram.
         {api_section_prompt}
 
         Here is the data:
-        
-        ---
-        **README Summary:**
-        {readme_summary}
-        
-        ---
-        **File Tree:**
-        ```
-        {file_tree}
-        ```
-
-        ---
-        **Code Context Graph (CCG):**
-        ```mermaid
-        {mermaid_graph}
-        ```
-        {api_data_prompt}
-        ---
-        
+        """
+        footer = f"""
         Now, generate the complete markdown document.
         Start with the title `# Documentation for {repo_name}`.
         """
-        
-        print("Sending all context to Gemini for final documentation...")
-        final_doc_content = self._generate_content(prompt)
-        print("Final documentation received.")
-        return final_doc_content
\ No newline at end of file
+
+        builder = PromptBuilder(token_budget)
+        self._add_repo_context(builder, readme_summary, file_tree, mermaid_graph)
+        if api_data:
+            builder.add("API Reference Data", api_data, priority=0)
+        return builder.build(header, footer)
+
+    def generate_package_section(self, repo_name, package, entries, token_budget=DEFAULT_TOKEN_BUDGET):
+        """
+        Map step: documents one package from its files' API data.
+        `entries` are (file_path, classes, functions) tuples. A package
+        too large for `token_budget` is described from its top-level
+        symbols, then from per-file counts, and truncated as a last resort.
+        """
+        title = package or "(repository root)"
+        header = f"""
+        You are 'Codebase Genius', an AI documentation writer, documenting
+        the `{title}` package of the repository {repo_name}.
+
+        Write one markdown section for this package. Start with the heading
+        `## {title}`, then a single-sentence summary of what the package is
+        for as its own paragraph, then describe each file and its most
+        important classes and functions. **Do not just paste the data**,
+        describe it.
+        """
+        builder = PromptBuilder(token_budget)
+        builder.add(
+            "API Reference Data",
+            render_api_reference(entries),
+            variants=[
+                lambda: render_api_reference(_top_level_entries(entries)),
+                lambda: _count_entries(entries),
+            ]
+        )
+        prompt, report = builder.build(header)
+        if report["saved_tokens"]:
+            print(f"Package {title}: prompt compacted to {report['prompt_tokens']} tokens "
+                  f"(budget {report['token_budget']}).")
+        print(f"Sending package {title} to Gemini...")
+        return self._generate_content(prompt)
+
+    def generate_docs_map_reduce(self, repo_name, readme_summary, file_tree, mermaid_graph, api_reference,
+                                 max_concurrency=DEFAULT_MAP_CONCURRENCY, token_budget=DEFAULT_TOKEN_BUDGET):
+        """
+        Generates the final documentation in two phases so no single prompt
+        holds the whole repo: one section per package, generated
+        concurrently by up to `max_concurrency` threads (subject to the
+        rate limiter; a package whose call fails gets a placeholder
+        section), then a reduce call that writes the overview from
+        the package summaries. The package sections are appended to it
+        in path order.
+        `api_reference` is the structured data from
+        CodeAnalyzer.get_api_reference().
+        """
+        return "".join(self.stream_docs_map_reduce(
+            repo_name, readme_summary, file_tree, mermaid_graph, api_reference, max_concurrency, token_budget
+        ))
+
+    def stream_docs_map_reduce(self, repo_name, readme_summary, file_tree, mermaid_graph, api_reference,
+                               max_concurrency=DEFAULT_MAP_CONCURRENCY, token_budget=DEFAULT_TOKEN_BUDGET):
+        """
+        Generator form of generate_docs_map_reduce: once the package
+        sections are done, streams the overview as Gemini writes it,
+        then yields each section.
+        """
+        packages = sorted(group_by_package(api_reference).items())
+        print(f"Generating {len(packages)} package sections with up to {max_concurrency} concurrent calls...")
+
+        def map_package(item):
+            """Returns (section, error); a failed package doesn't fail the whole document."""
+            try:
+                return self.generate_package_section(repo_name, item[0], item[1], token_budget), None
+            except LLMError as e:
+                return None, e
+
+        with self.instrumentation.span("map_packages"):
+            with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+                sections = list(executor.map(map_package, packages))
+
+        summaries = []
+        for (package, _), (section, error) in zip(packages, sections):
+            if error is not None:
+                summaries.append(f"- `{package or '(root)'}`: (documentation unavailable)")
+            else:
+                summaries.append(f"- `{package or '(root)'}`: {_first_paragraph(section)}")
+        package_summaries = "\n".join(summaries)
+
+        header = f"""
+        You are 'Codebase Genius', an AI documentation writer.
+        Write the opening of a `docs.md` file for the repository {repo_name}.
+        Detailed per-package sections will be appended after your text, so
+        do not document individual packages yourself.
+
+        The opening should have these sections:
+        1.  **Overview:** Start with the README summary.
+        2.  **Architecture:** How the packages below fit together.
+        3.  **Repository Map:** Describe the layout, then write the line
+            {FILE_TREE_PLACEHOLDER} on its own; it will be replaced by the full file tree.
+        4.  **Code Context Graph:** Describe the structure, then write the line
+            {CCG_PLACEHOLDER} on its own; it will be replaced by the Mermaid diagram.
+        """
+        footer = f"Start with the title `# Documentation for {repo_name}`."
+
+        builder = PromptBuilder(token_budget)
+        self._add_repo_context(builder, readme_summary, file_tree, mermaid_graph)
+        builder.add("Packages", package_summaries, priority=2)
+        with self.instrumentation.span("prompt_assembly"):
+            prompt, report = builder.build(header, footer)
+        self._report_prompt(report)
+
+        print("Sending package summaries to Gemini for the final documentation...")
+        yield from self._stream_verbatim(self._stream_content(prompt), file_tree, mermaid_graph)
+
+        yield "\n\n# API Reference"
+        for (package, _), (section, error) in zip(packages, sections):
+            if error is not None:
+                section = f"## {package or '(repository root)'}\n\n_Documentation for this package could not be generated: {error}_"
+            yield "\n\n" + section.strip()
+        yield "\n"
+        print("Final documentation assembled.")
@@ -0,0 +1,74 @@
+import random
+import threading
+import time
+
+
+class FakeProviderError(Exception):
+    """An API error carrying an HTTP status in `.code`, like google.api_core's."""
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    A local stand-in for genai.GenerativeModel for tests and benchmarks.
+
+    Each call sleeps for a latency drawn from `latency` (seconds), plus
+    `slow_latency` for a `slow_rate` fraction of calls to simulate a
+    long tail, and fails with a 503 for an `error_rate` fraction of
+    calls. `responder(prompt)` produces the reply text (by default a
+    short echo). Streaming replies arrive in `chunk_size`-character
+    chunks spread over the call's latency. `seed` makes a run
+    repeatable. Calls are counted in `calls`.
+    """
+    def __init__(self, latency=0.05, slow_latency=0.0, slow_rate=0.0, error_rate=0.0,
+                 responder=None, chunk_size=40, seed=None, sleep=time.sleep):
+        self.latency = latency
+        self.slow_latency = slow_latency
+        self.slow_rate = slow_rate
+        self.error_rate = error_rate
+        self.responder = responder or (lambda prompt: f"# Documentation\n\nGenerated for a {len(prompt)}-character prompt.\n")
+        self.chunk_size = chunk_size
+        self.sleep = sleep
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _plan(self):
+        """Decides one call's latency and outcome."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency
+            if self._random.random() < self.slow_rate:
+                delay += self.slow_latency
+            fail = self._random.random() < self.error_rate
+        return delay, fail
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        delay, fail = self._plan()
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and delay > timeout:
+            self.sleep(timeout)
+            raise FakeProviderError("Deadline exceeded", 504)
+        if fail:
+            self.sleep(delay)
+            raise FakeProviderError("Service unavailable", 503)
+
+        text = self.responder(prompt)
+        if not stream:
+            self.sleep(delay)
+            return FakeResponse(text)
+        return self._stream(text, delay)
+
+    def _stream(self, text, delay):
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+        for chunk in chunks:
+            self.sleep(delay / len(chunks))
+            yield FakeResponse(chunk)
+
@@ -0,0 +1,129 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_PROFILE_LINES = 30
+
+# cProfile can only run one profiler per process at a time.
+_profiler_lock = threading.Lock()
+
+
+def breakdown(metrics):
+    """
+    Summarizes the spans of an Instrumentation.to_dict() result: one row
+    per span name, slowest first, with calls, total and longest seconds,
+    and the total's share of the run's elapsed time.
+    """
+    elapsed = metrics["elapsed_seconds"]
+    rows = {}
+    for span in metrics["spans"]:
+        row = rows.setdefault(span["name"], {"span": span["name"], "calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+        row["calls"] += 1
+        row["seconds"] += span["seconds"]
+        row["max_seconds"] = max(row["max_seconds"], span["seconds"])
+    for row in rows.values():
+        row["seconds"] = round(row["seconds"], 3)
+        row["max_seconds"] = round(row["max_seconds"], 3)
+        row["share"] = round(row["seconds"] / elapsed, 3) if elapsed else 0.0
+    return sorted(rows.values(), key=lambda row: row["seconds"], reverse=True)
+
+
+class Instrumentation:
+    """
+    Records where a documentation run spends its time: timed spans (which
+    may nest, per thread, and overlap across threads), named counters,
+    and optionally cProfile reports.
+
+    Components take one as their `instrumentation` argument and record
+    into it; each creates a private one if none is given, so recording is
+    always safe. With `profile=True`, profile() blocks run under cProfile
+    and keep the top `profile_lines` functions by cumulative time. Safe
+    to share between threads.
+    """
+    def __init__(self, profile=False, profile_lines=DEFAULT_PROFILE_LINES):
+        self.profile_enabled = profile
+        self.profile_lines = profile_lines
+        self.started = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self.profiles = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        """Times the enclosed block as span `name`, nested under any open span on this thread."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            self.add_span(name, start, seconds, parent)
+
+    def add_span(self, name, start, seconds, parent=None):
+        """Records a span timed elsewhere; `start` is a time.perf_counter() value."""
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "parent": parent,
+                "start": round(start - self.started, 4),
+                "seconds": round(seconds, 4),
+                "thread": threading.current_thread().name,
+            })
+
+    def count(self, name, amount=1):
+        """Adds `amount` to counter `name`."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set(self, name, value):
+        """Sets counter `name` to `value` (for gauges like graph size)."""
+        with self._lock:
+            self.counters[name] = value
+
+    @contextmanager
+    def profile(self, name):
+        """Runs the enclosed block under cProfile if profiling is enabled; the report goes to profiles[name]."""
+        if not self.profile_enabled or not _profiler_lock.acquire(blocking=False):
+            if self.profile_enabled:
+                print(f"Skipping profile of {name}: another profile is running.")
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+        finally:
+            _profiler_lock.release()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(self.profile_lines)
+        with self._lock:
+            self.profiles[name] = output.getvalue()
+
+    def breakdown(self):
+        return breakdown(self.to_dict())
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "elapsed_seconds": round(time.perf_counter() - self.started, 4),
+                "spans": list(self.spans),
+                "counters": dict(self.counters),
+                "profiles": dict(self.profiles),
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
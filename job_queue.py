@@ -0,0 +1,135 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_CONCURRENT_JOBS = 2
+DEFAULT_FINISHED_JOB_TTL = 3600
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job:
+    """
+    One unit of background work and everything the UI polls for: its
+    status, per-step progress messages, streamed output, and finally
+    its result or error.
+    """
+    def __init__(self, key, label):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.label = label
+        self.status = QUEUED
+        self.progress = {}
+        self.output = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.subscribers = 1
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def report(self, step, message):
+        """Sets the progress message shown for `step` (later calls replace it)."""
+        with self._lock:
+            self.progress[step] = message
+
+    def emit(self, chunk):
+        """Appends a chunk of streamed output (e.g. generated docs)."""
+        with self._lock:
+            self.output.append(chunk)
+
+    def snapshot(self):
+        """Returns (progress messages in order, output so far) for rendering."""
+        with self._lock:
+            return list(self.progress.values()), "".join(self.output)
+
+
+class JobManager:
+    """
+    Runs jobs on a pool of at most `max_concurrent` worker threads; the
+    rest wait in the pool's queue. Submitting a job whose `key` matches
+    one that is still queued or running returns that job instead of
+    starting another, so identical requests share one result.
+
+    Finished jobs are kept for `finished_ttl` seconds so clients can
+    poll for them after a rerun.
+    """
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT_JOBS, finished_ttl=DEFAULT_FINISHED_JOB_TTL):
+        self.max_concurrent = max_concurrent
+        self.finished_ttl = finished_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="job")
+        self._jobs = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, label=None):
+        """
+        Queues `fn(job)` unless a job with the same `key` is in flight.
+        Returns (job, created), where created is False for a shared job.
+        """
+        with self._lock:
+            self._expire()
+            job = self._in_flight.get(key)
+            if job is not None:
+                job.subscribers += 1
+                return job, False
+            job = Job(key, label or str(key))
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+        self.executor.submit(self._run, job, fn)
+        return job, True
+
+    def _run(self, job, fn):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job)
+            job.status = DONE
+        except Exception as e:
+            print(f"Job {job.id} ({job.label}) failed: {e}")
+            print(traceback.format_exc())
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+
+    def get(self, job_id):
+        """Returns the job with `job_id`, or None if unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Returns all known jobs, newest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def counts(self):
+        """Returns {status: number of jobs} for queued and running jobs."""
+        with self._lock:
+            jobs = list(self._in_flight.values())
+        return {
+            QUEUED: sum(1 for job in jobs if job.status == QUEUED),
+            RUNNING: sum(1 for job in jobs if job.status == RUNNING),
+        }
+
+    def _expire(self):
+        cutoff = time.time() - self.finished_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,252 @@
+import os
+import posixpath
+
+# Registry of the languages CodeAnalyzer understands: which file
+# extensions map to which tree-sitter grammar, and which syntax nodes are
+# definitions, calls and imports in it. This module is plain data; a
+# grammar is only loaded (see parser_pool) when the first file of its
+# language is parsed.
+
+# Node types naming a symbol, and the fields holding the receiver and
+# member of a member access (`a.b` in Python, JS/TS and Go).
+_NAME_TYPES = {'identifier', 'this', 'property_identifier', 'field_identifier', 'type_identifier',
+               'package_identifier'}
+_MEMBER_FIELDS = {
+    'attribute': ('object', 'attribute'),
+    'member_expression': ('object', 'property'),
+    'selector_expression': ('operand', 'field'),
+}
+
+
+def dotted_name(node):
+    """Returns `a.b.c` for identifier/member access chains, else None."""
+    if node is None:
+        return None
+    if node.type in _NAME_TYPES:
+        return node.text.decode('utf8')
+    fields = _MEMBER_FIELDS.get(node.type)
+    if fields is not None:
+        receiver = dotted_name(node.child_by_field_name(fields[0]))
+        member = node.child_by_field_name(fields[1])
+        if receiver is not None and member is not None:
+            return f"{receiver}.{member.text.decode('utf8')}"
+    return None
+
+
+def _python_import_names(node):
+    """
+    Returns [target, local_name] pairs for an import statement, e.g.
+    `from pkg import mod as m` gives [["pkg.mod", "m"]].
+    """
+    module = ""
+    if node.type == 'import_from_statement':
+        module_node = node.child_by_field_name('module_name')
+        module = module_node.text.decode('utf8') if module_node is not None else ""
+
+    pairs = []
+    for child in node.children_by_field_name('name'):
+        if child.type == 'aliased_import':
+            name = child.child_by_field_name('name').text.decode('utf8')
+            local = child.child_by_field_name('alias').text.decode('utf8')
+        else:
+            name = child.text.decode('utf8')
+            local = name if module else name.split('.')[0]
+        if module:
+            target = f"{module}{name}" if module.endswith('.') else f"{module}.{name}"
+        else:
+            target = name
+        pairs.append([target, local])
+    return pairs
+
+
+def _python_module_name(relative_path):
+    module = os.path.splitext(relative_path)[0].replace('/', '.')
+    if module.endswith('.__init__'):
+        module = module[:-len('.__init__')]
+    return module
+
+
+def _script_module_path(path):
+    """`../lib/util.js` -> `lib.util`: the dotted form of a JS/TS import path."""
+    stem, extension = posixpath.splitext(path)
+    if extension in SCRIPT_EXTENSIONS:
+        path = stem
+    parts = [part for part in path.split('/') if part not in ('', '.', '..')]
+    if len(parts) > 1 and parts[-1] == 'index':
+        parts.pop()
+    return '.'.join(parts)
+
+
+def _script_import_names(node):
+    """
+    Returns [target, local_name] pairs for an ES module import, e.g.
+    `import { a as b } from './pkg/mod'` gives [["pkg.mod.a", "b"]].
+    """
+    source = node.child_by_field_name('source')
+    if source is None:
+        return []
+    module = _script_module_path(source.text.decode('utf8').strip('\'"`'))
+    pairs = []
+    for clause in node.children:
+        if clause.type != 'import_clause':
+            continue
+        for child in clause.children:
+            if child.type == 'identifier':
+                pairs.append([module, child.text.decode('utf8')])
+            elif child.type == 'namespace_import':
+                names = [c for c in child.children if c.type == 'identifier']
+                if names:
+                    pairs.append([module, names[0].text.decode('utf8')])
+            elif child.type == 'named_imports':
+                for specifier in child.children:
+                    if specifier.type != 'import_specifier':
+                        continue
+                    name = specifier.child_by_field_name('name').text.decode('utf8')
+                    alias = specifier.child_by_field_name('alias')
+                    local = alias.text.decode('utf8') if alias is not None else name
+                    pairs.append([f"{module}.{name}", local])
+    return pairs
+
+
+def _script_module_name(relative_path):
+    return _script_module_path(relative_path)
+
+
+def _go_import_names(node):
+    """Returns the [target, local_name] pair of a Go import spec; `"a/b/c"` gives [["a.b.c", "c"]]."""
+    path_node = node.child_by_field_name('path')
+    if path_node is None:
+        return []
+    path = path_node.text.decode('utf8').strip('"`')
+    name_node = node.child_by_field_name('name')
+    local = name_node.text.decode('utf8') if name_node is not None else path.rsplit('/', 1)[-1]
+    return [[path.replace('/', '.'), local]]
+
+
+def _go_module_name(relative_path):
+    """Go code is imported by package, i.e. by directory."""
+    return posixpath.dirname(relative_path).replace('/', '.')
+
+
+def _go_receiver_type(node):
+    """Returns the type a Go method is declared on (`func (s *Server) Start()` gives "Server")."""
+    receiver = node.child_by_field_name('receiver')
+    if receiver is None:
+        return None
+    stack = [receiver]
+    while stack:
+        current = stack.pop()
+        if current.type == 'type_identifier':
+            return current.text.decode('utf8')
+        stack.extend(reversed(current.children))
+    return None
+
+
+def _go_receiver_name(node):
+    """Returns the name a Go method binds its receiver to (`func (s *Server) Start()` gives "s")."""
+    receiver = node.child_by_field_name('receiver')
+    if receiver is None:
+        return None
+    for parameter in receiver.children:
+        if parameter.type == 'parameter_declaration':
+            name = parameter.child_by_field_name('name')
+            return name.text.decode('utf8') if name is not None else None
+    return None
+
+
+class Language:
+    """
+    How to find symbols in one language's syntax tree.
+
+    `functions` and `classes` are the node types defining them (named by
+    their 'name' field); `function_values` are node types such as JS
+    `const f = () => ...` that define a function when their 'value' is
+    one of `function_value_types`. `calls` maps call node types to the
+    field holding the callee. `imports` are the node types handed to
+    `import_names`, which returns [target, local_name] pairs with dotted
+    targets comparable to `module_name(relative_path)`. `owner`, if set,
+    returns the type a definition belongs to when that isn't its
+    enclosing scope (Go methods), and `receiver`, if set, the variable
+    a method names its receiver with, which calls then use like `self`.
+    `package_imports` means imports name a whole package path, of which
+    a module name may only be the tail.
+    """
+    def __init__(self, name, extensions, functions, classes, calls, imports, import_names, module_name,
+                 grammar=None, function_values=(), function_value_types=(), owner=None, receiver=None,
+                 package_imports=False):
+        self.name = name
+        self.grammar = grammar or name
+        self.extensions = tuple(extensions)
+        self.functions = frozenset(functions)
+        self.classes = frozenset(classes)
+        self.calls = dict(calls)
+        self.imports = frozenset(imports)
+        self.import_names = import_names
+        self.module_name = module_name
+        self.function_values = frozenset(function_values)
+        self.function_value_types = frozenset(function_value_types)
+        self.owner = owner
+        self.receiver = receiver
+        self.package_imports = package_imports
+
+
+_SCRIPT_FUNCTIONS = ['function_declaration', 'generator_function_declaration', 'method_definition']
+_SCRIPT_FUNCTION_VALUES = ['arrow_function', 'function', 'function_expression', 'generator_function']
+_SCRIPT_CALLS = {'call_expression': 'function', 'new_expression': 'constructor'}
+
+
+def _script_language(name, extensions, classes, grammar=None):
+    return Language(
+        name, extensions, functions=_SCRIPT_FUNCTIONS, classes=classes, calls=_SCRIPT_CALLS,
+        imports=['import_statement'], import_names=_script_import_names, module_name=_script_module_name,
+        grammar=grammar, function_values=['variable_declarator'], function_value_types=_SCRIPT_FUNCTION_VALUES,
+    )
+
+
+LANGUAGES = {
+    language.name: language for language in [
+        Language(
+            'python', ['.py'],
+            functions=['function_definition'], classes=['class_definition'], calls={'call': 'function'},
+            imports=['import_statement', 'import_from_statement'], import_names=_python_import_names,
+            module_name=_python_module_name,
+        ),
+        _script_language('javascript', ['.js', '.jsx', '.mjs', '.cjs'], classes=['class_declaration']),
+        _script_language('typescript', ['.ts', '.mts', '.cts'],
+                         classes=['class_declaration', 'abstract_class_declaration']),
+        _script_language('tsx', ['.tsx'], classes=['class_declaration', 'abstract_class_declaration']),
+        Language(
+            'go', ['.go'],
+            functions=['function_declaration', 'method_declaration'], classes=['type_spec'],
+            calls={'call_expression': 'function'}, imports=['import_spec'], import_names=_go_import_names,
+            module_name=_go_module_name, owner=_go_receiver_type, receiver=_go_receiver_name,
+            package_imports=True,
+        ),
+    ]
+}
+
+EXTENSIONS = {extension: language.name for language in LANGUAGES.values() for extension in language.extensions}
+SCRIPT_EXTENSIONS = {
+    extension for name in ('javascript', 'typescript', 'tsx') for extension in LANGUAGES[name].extensions
+}
+
+
+def get_language_spec(name):
+    """Returns the Language registered as `name`."""
+    try:
+        return LANGUAGES[name]
+    except KeyError:
+        raise ValueError(f"Unsupported language: {name}")
+
+
+def language_for(path):
+    """Returns the language name for a path, or None if it isn't a known source file."""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def module_name(relative_path):
+    """Returns the dotted module name imports use for a repo-relative source path."""
+    language = language_for(relative_path)
+    if language is None:
+        return _python_module_name(relative_path)
+    return LANGUAGES[language].module_name(relative_path)
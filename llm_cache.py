@@ -0,0 +1,139 @@
+import hashlib
+import os
+import sqlite3
+import textwrap
+import threading
+import time
+from parse_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+
+def normalize_prompt(prompt):
+    """
+    Normalizes a prompt for cache keying: line endings, the indentation
+    shared by every line, trailing whitespace and surrounding blank lines
+    do not change the key.
+    """
+    prompt = prompt.replace('\r\n', '\n')
+    lines = [line.rstrip() for line in textwrap.dedent(prompt).split('\n')]
+    return '\n'.join(lines).strip('\n')
+
+
+def prompt_key(model_name, prompt):
+    """Returns the cache key for a prompt sent to `model_name`."""
+    payload = f"{model_name}\0{normalize_prompt(prompt)}".encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+class LLMCache:
+    """
+    On-disk cache of LLM responses, keyed by prompt_key().
+
+    Entries expire `ttl` seconds after they were stored (None keeps them
+    forever) and are evicted least-recently-used first once their total
+    size exceeds `max_bytes`. Each entry remembers how long the original
+    call took, so hits can report the time they saved. Safe to share
+    between threads.
+    """
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        if path is None:
+            path = os.path.join(DEFAULT_CACHE_DIR, "llm_cache.sqlite")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " latency REAL NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.conn.commit()
+
+    def get(self, key):
+        """Returns the cached response for `key`, or None on a miss or an expired entry."""
+        return self.lookup(key)[0]
+
+    def lookup(self, key):
+        """
+        Like get(), but returns (response, seconds the original call took),
+        or (None, None) on a miss, so callers can keep their own stats.
+        """
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+        row = self.conn.execute(
+            "SELECT response, latency, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row is not None and self.ttl is not None and now - row[2] > self.ttl:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.conn.commit()
+            row = None
+        if row is None:
+            self.misses += 1
+            return None, None
+
+        self.hits += 1
+        self.saved_seconds += row[1]
+        self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        return row[0], row[1]
+
+    def put(self, key, response, latency):
+        """Stores a successful response and the seconds it took to generate."""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, latency, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, len(response.encode('utf-8')), latency, now, now)
+            )
+            self.conn.commit()
+            self._evict()
+
+    def _evict(self):
+        if self.ttl is not None:
+            self.conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            doomed = []
+            rows = self.conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC")
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            print(f"LLM cache: evicted {len(doomed)} least-recently-used responses.")
+        self.conn.commit()
+
+    def stats(self):
+        """Returns hit/miss counts, hit rate and seconds saved since this cache was opened."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,264 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from instrumentation import Instrumentation
+
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_TOTAL_TIMEOUT = 300.0
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+
+# HTTP statuses Google API errors carry in `.code` that are worth retrying.
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """An LLM call failed for good (after any retries)."""
+
+
+class LLMTimeout(LLMError):
+    """An LLM call attempt did not finish within its deadline."""
+
+
+class CircuitOpenError(LLMError):
+    """The provider is marked degraded, so the call was not attempted."""
+
+
+def is_retryable(error):
+    """True for timeouts, connection problems and retryable API statuses."""
+    if isinstance(error, (LLMTimeout, TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, 'code', None) in RETRYABLE_STATUS_CODES
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects
+    calls for `reset_timeout` seconds; then lets one trial call through
+    (half-open) and closes again if it succeeds.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Returns True if a call may be made now."""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+
+class LatencyTracker:
+    """Keeps the last `window` successful call durations for percentile queries."""
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            if len(self._samples) > self.window:
+                del self._samples[0]
+
+    def percentile(self, fraction):
+        """Returns the `fraction` percentile (0-1) of recent durations, or None if empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class ResilientCaller:
+    """
+    Runs provider calls with a per-attempt deadline, retries with
+    jittered exponential backoff, optional hedging and a circuit breaker.
+    `total_timeout` bounds the whole call, retries and backoff included:
+    no attempt outlives it and no retry starts after it.
+
+    `call(fn)` invokes `fn(timeout)`, where `timeout` is the seconds left
+    for the attempt (to pass on to the provider's own timeout option).
+    Each attempt runs on a worker thread. If it is still running when
+    the `hedge_percentile` latency of recent calls has passed (once
+    `hedge_min_samples` have been seen), an identical duplicate is
+    started and whichever finishes first wins. Attempts that time out
+    or fail with a retryable error are retried up to `max_attempts`
+    times in all. Every retryable failure counts against `breaker`. Errors are
+    raised as LLMError subclasses.
+
+    Abandoned attempts (timed out or out-raced) cannot be cancelled and
+    finish in the background; their results are discarded.
+
+    The `stats` counters are mirrored into `instrumentation` with an
+    "llm_" prefix (llm_calls, llm_retries, ...), and into the recorder
+    passed to `call(fn, instrumentation)`, so a caller shared by many
+    runs still reports each run's own retries and timeouts.
+    """
+    def __init__(self, timeout=DEFAULT_TIMEOUT, total_timeout=DEFAULT_TOTAL_TIMEOUT,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 hedge_percentile=DEFAULT_HEDGE_PERCENTILE, hedge_min_samples=DEFAULT_HEDGE_MIN_SAMPLES,
+                 breaker=None, max_workers=16, sleep=time.sleep, clock=time.monotonic, instrumentation=None):
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker if breaker is not None else CircuitBreaker(clock=clock)
+        self.latency = LatencyTracker()
+        self.sleep = sleep
+        self.clock = clock
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                      "timeouts": 0, "rejected": 0}
+        self._stats_lock = threading.Lock()
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+
+    def _count(self, name, instrumentation=None):
+        with self._stats_lock:
+            self.stats[name] += 1
+        self.instrumentation.count(f"llm_{name}")
+        if instrumentation is not None and instrumentation is not self.instrumentation:
+            instrumentation.count(f"llm_{name}")
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _hedge_delay(self):
+        if self.hedge_percentile is None or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def call(self, fn, instrumentation=None):
+        """
+        Runs `fn(timeout)` resiliently and returns its result. Its
+        counters also go to `instrumentation`, if given.
+        """
+        self._count("calls", instrumentation)
+        deadline = None if self.total_timeout is None else self.clock() + self.total_timeout
+        last_error = None
+        for attempt in range(1, self.max_attempts + 1):
+            timeout = self.timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline - self.clock())
+                if timeout <= 0:
+                    break
+            if not self.breaker.allow():
+                self._count("rejected", instrumentation)
+                message = "LLM provider marked degraded after repeated failures; not calling it"
+                if last_error is not None:
+                    message += f" (last error: {last_error})"
+                raise CircuitOpenError(message)
+            if attempt > 1:
+                self._count("retries", instrumentation)
+            self._count("attempts", instrumentation)
+            try:
+                result = self._attempt(fn, timeout, instrumentation)
+            except Exception as e:
+                last_error = e
+                if not is_retryable(e):
+                    # The provider answered (e.g. a rejected prompt), so it isn't degraded.
+                    self.breaker.record_success()
+                    raise LLMError(f"LLM call failed: {e}") from e
+                self.breaker.record_failure()
+                if attempt < self.max_attempts:
+                    delay = self.backoff(attempt)
+                    if deadline is not None and self.clock() + delay >= deadline:
+                        break
+                    print(f"LLM call failed ({e}); retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_attempts})...")
+                    self.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+        if isinstance(last_error, LLMTimeout):
+            raise last_error
+        if last_error is None:
+            self._count("timeouts", instrumentation)
+            raise LLMTimeout(f"LLM call did not finish within {self.total_timeout:.3g}s")
+        raise LLMError(f"LLM call failed after {attempt} attempts: {last_error}") from last_error
+
+    def _attempt(self, fn, timeout, instrumentation=None):
+        """One attempt, possibly hedged, of at most `timeout` seconds. Returns the result or raises its error."""
+        started = self.clock()
+        deadline = started + timeout
+        primary = self.executor.submit(fn, timeout)
+        futures = [primary]
+        hedge_delay = self._hedge_delay()
+        hedged = False
+        errors = []
+
+        while futures:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                break
+            wait_for = remaining
+            if hedge_delay is not None and not hedged:
+                wait_for = min(remaining, max(0.0, started + hedge_delay - self.clock()))
+            done, _ = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                futures.remove(future)
+                error = future.exception()
+                if error is None:
+                    self.latency.record(self.clock() - started)
+                    if future is not primary:
+                        self._count("hedge_wins", instrumentation)
+                    return future.result()
+                errors.append(error)
+
+            if not done and hedge_delay is not None and not hedged and futures:
+                hedged = True
+                self._count("hedges", instrumentation)
+                futures.append(self.executor.submit(fn, max(0.0, deadline - self.clock())))
+            elif not futures and errors:
+                raise errors[0]
+
+        if errors and not futures:
+            raise errors[0]
+        self._count("timeouts", instrumentation)
+        raise LLMTimeout(f"LLM call did not finish within {timeout:.3g}s")
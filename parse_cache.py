@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from functools import lru_cache
+
+DEFAULT_CACHE_DIR = ".codebase_genius_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def blob_sha(data):
+    """
+    Returns the git blob SHA-1 of `data`, so keys computed from file
+    contents match the blob IDs git already stores for them.
+    """
+    header = f"blob {len(data)}\0".encode()
+    return hashlib.sha1(header + data).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def grammar_version():
+    """Version of the installed tree-sitter grammars, part of every cache key."""
+    try:
+        from importlib.metadata import version
+        return version('tree-sitter-languages')
+    except Exception:
+        return "unknown"
+
+
+# `meta.total_size` is the sum of `entries.size`, kept current by the
+# triggers so eviction never has to scan the table.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) SELECT 'total_size', COALESCE(SUM(size), 0) FROM entries;
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE meta SET value = value + NEW.size WHERE key = 'total_size';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE meta SET value = value + NEW.size - OLD.size WHERE key = 'total_size';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size WHERE key = 'total_size';
+END;
+"""
+
+
+class ParseCache:
+    """
+    On-disk cache of per-file symbol records, keyed by content hash.
+
+    Entries live in a SQLite file and are evicted least-recently-used
+    first once their total size exceeds `max_bytes`. Stored records and
+    hits' last-used times are buffered until flush(), which writes them
+    in one short transaction, so analyzers sharing the file never wait
+    on each other's parsing.
+    """
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if path is None:
+            path = os.path.join(DEFAULT_CACHE_DIR, "parse_cache.sqlite")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._touched = {}
+
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def get(self, key):
+        """Returns the cached record for `key`, or None on a miss."""
+        payload = self._pending.get(key)
+        if payload is None:
+            row = self.conn.execute("SELECT record FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            payload = row[0]
+            self._touched[key] = time.time()
+        self.hits += 1
+        return json.loads(payload)
+
+    def put(self, key, record):
+        """Stores a record. Changes are written by flush()."""
+        self._pending[key] = json.dumps(record, separators=(',', ':'))
+
+    def flush(self):
+        """Writes pending records and last-used times, then evicts old entries over the size cap."""
+        if self._pending or self._touched:
+            now = time.time()
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO entries (key, record, size, last_used) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (key) DO UPDATE SET"
+                    " record = excluded.record, size = excluded.size, last_used = excluded.last_used",
+                    [(key, payload, len(payload), now) for key, payload in self._pending.items()]
+                )
+                self.conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(last_used, key) for key, last_used in self._touched.items() if key not in self._pending]
+                )
+            self._pending.clear()
+            self._touched.clear()
+        self._evict()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT value FROM meta WHERE key = 'total_size'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        doomed = []
+        rows = self.conn.execute("SELECT key, size FROM entries ORDER BY last_used ASC")
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self.conn.commit()
+        print(f"Parse cache: evicted {len(doomed)} least-recently-used entries.")
+
+    def stats(self):
+        """Returns hit/miss counts for this session."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,85 @@
+import threading
+from contextlib import contextmanager
+
+DEFAULT_MAX_IDLE_PARSERS = 8
+
+# Process-wide warm state, shared by every CodeAnalyzer (and so by every
+# Streamlit session): grammars load once, queries compile once, and
+# parsers are reused instead of rebuilt for each analysis.
+_languages = {}
+_queries = {}
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_language(name):
+    """Returns the tree-sitter grammar for `name`, loading it (and tree_sitter_languages) on first use."""
+    with _lock:
+        language = _languages.get(name)
+        if language is None:
+            from tree_sitter_languages import get_language as load_language
+            language = _languages[name] = load_language(name)
+        return language
+
+
+def get_query(language_name, source):
+    """Returns the compiled tree-sitter query `source` for a language, compiling it once per process."""
+    key = (language_name, source)
+    with _lock:
+        query = _queries.get(key)
+    if query is None:
+        query = get_language(language_name).query(source)
+        with _lock:
+            query = _queries.setdefault(key, query)
+    return query
+
+
+class ParserPool:
+    """
+    Ready-made tree-sitter parsers for one language, shared between
+    threads. acquire() lends an idle parser, creating one if none is
+    free, and takes it back afterwards; at most `max_idle` are kept.
+    """
+    def __init__(self, language_name, max_idle=DEFAULT_MAX_IDLE_PARSERS):
+        self.language_name = language_name
+        self.max_idle = max_idle
+        self.created = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def new_parser(self):
+        """Returns a fresh parser for the pool's language, outside the pool."""
+        from tree_sitter import Parser
+        parser = Parser()
+        parser.set_language(get_language(self.language_name))
+        with self._lock:
+            self.created += 1
+        return parser
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            parser = self._idle.pop() if self._idle else None
+        if parser is None:
+            parser = self.new_parser()
+        try:
+            yield parser
+        finally:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(parser)
+
+    def warm(self, count=1):
+        """Creates parsers ahead of time so the first analyses don't pay for it."""
+        parsers = [self.new_parser() for _ in range(count)]
+        with self._lock:
+            self._idle.extend(parsers[:max(0, self.max_idle - len(self._idle))])
+
+
+def parser_pool(language_name):
+    """Returns the process-wide ParserPool for a language."""
+    with _lock:
+        pool = _pools.get(language_name)
+        if pool is None:
+            pool = _pools[language_name] = ParserPool(language_name)
+        return pool
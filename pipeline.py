@@ -0,0 +1,115 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from instrumentation import Instrumentation
+
+DEFAULT_PIPELINE_WORKERS = 4
+
+
+class Pipeline:
+    """
+    Runs named stages as a dependency graph, starting each stage on a
+    worker thread as soon as the stages it depends on have finished, so
+    independent work (e.g. an LLM call and code parsing) overlaps and the
+    whole run takes about as long as its critical path.
+
+    A stage is a callable that receives its dependencies' results as
+    keyword arguments named after them. Dependencies must be added
+    before the stages that use them, which keeps the graph acyclic.
+    Each stage runs inside a "stage:<name>" span of `instrumentation`.
+    """
+    def __init__(self, max_workers=DEFAULT_PIPELINE_WORKERS, instrumentation=None):
+        self.max_workers = max_workers
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.stages = {}
+        self.timings = {}
+        self.elapsed = None
+
+    def add(self, name, fn, deps=(), label=None):
+        """Adds stage `name` running `fn(**{dep: result})` after `deps`."""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = {"fn": fn, "deps": tuple(deps), "label": label or name}
+        return self
+
+    def label(self, name):
+        return self.stages[name]["label"]
+
+    def critical_path(self):
+        """Returns (stage names, seconds) of the slowest dependency chain of the last run."""
+        best = {}
+        for name, stage in self.stages.items():
+            if name not in self.timings:
+                continue
+            before = max((best[dep] for dep in stage["deps"] if dep in best),
+                         key=lambda path: path[1], default=([], 0.0))
+            best[name] = (before[0] + [name], before[1] + self.timings[name])
+        return max(best.values(), key=lambda path: path[1], default=([], 0.0))
+
+    def _run_stage(self, name, fn, kwargs):
+        with self.instrumentation.span(f"stage:{name}"):
+            return fn(**kwargs)
+
+    def run(self, on_progress=None):
+        """
+        Runs every stage and returns {name: result}.
+
+        `on_progress(name, status, seconds)` is called from the calling
+        thread (so it may update a UI) with status 'started', 'finished'
+        or 'failed', and 'skipped' for stages never started because an
+        earlier one failed. On failure the remaining stages are not
+        started, running ones are waited for, and the first error is
+        re-raised.
+        """
+        def notify(name, status, seconds=0.0):
+            if on_progress is not None:
+                on_progress(name, status, seconds)
+
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+        started = {}
+        error = None
+        self.timings = {}
+        run_started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as executor:
+            while pending or running:
+                if error is None:
+                    for name in list(pending):
+                        stage = pending[name]
+                        if all(dep in results for dep in stage["deps"]):
+                            del pending[name]
+                            kwargs = {dep: results[dep] for dep in stage["deps"]}
+                            started[name] = time.perf_counter()
+                            running[executor.submit(self._run_stage, name, stage["fn"], kwargs)] = name
+                            notify(name, 'started')
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    seconds = time.perf_counter() - started[name]
+                    self.timings[name] = seconds
+                    stage_error = future.exception()
+                    if stage_error is not None:
+                        print(f"Pipeline stage '{name}' failed after {seconds:.2f}s: {stage_error}")
+                        error = error or stage_error
+                        notify(name, 'failed', seconds)
+                    else:
+                        results[name] = future.result()
+                        notify(name, 'finished', seconds)
+
+        self.elapsed = time.perf_counter() - run_started
+        if error is not None:
+            for name in pending:
+                notify(name, 'skipped')
+            raise error
+
+        path, path_seconds = self.critical_path()
+        print(f"Pipeline finished in {self.elapsed:.2f}s ({sum(self.timings.values()):.2f}s of stage work; "
+              f"critical path {' -> '.join(path)}: {path_seconds:.2f}s).")
+        return results
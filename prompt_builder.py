@@ -0,0 +1,230 @@
+import re
+
+DEFAULT_TOKEN_BUDGET = 30000
+VENDORED_DIRS = {
+    'vendor', 'vendored', 'third_party', 'thirdparty', 'external', 'extern',
+    'site-packages', 'node_modules', 'dist', 'build', 'deps',
+}
+
+# Mermaid lines as written by CodeAnalyzer.iter_ccg_as_mermaid and MermaidRenderer.
+_FILE_NODE = re.compile(r'^\s*(\w+)\(\("\[(.*)\]"\)\)\s*$')
+_FUNCTION_NODE = re.compile(r'^\s*(\w+)\[/"(.*)\(\)"/\]\s*$')
+_PACKAGE_NODE = re.compile(r'^\s*(\w+)\[\["(.*?)(?:<br/>(.*))?"\]\]\s*$')
+_CLASS_NODE = re.compile(r'^\s*(\w+)\["(.*)"\]\s*$')
+_EDGE = re.compile(r'^\s*(\w+)\s+(?:-- defines -->|-\. calls \.->|-- "(\d+) (\w+)" -->)\s+(\w+)\s*$')
+
+
+def estimate_tokens(text):
+    """Approximates the token count of `text` (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _count(number, singular, plural):
+    return f"{number} {singular if number == 1 else plural}"
+
+
+def _parse_file_tree(file_tree):
+    """Parses render_file_tree() output into (root line, [(name, is_dir, children)])."""
+    lines = file_tree.splitlines()
+    if not lines:
+        return "", []
+    root = []
+    stack = [(-1, root)]
+    for line in lines[1:]:
+        stripped = line.lstrip(' ')
+        if not stripped.startswith('|-- '):
+            continue
+        level = (len(line) - len(stripped)) // 4
+        name = stripped[len('|-- '):]
+        node = (name.rstrip('/'), name.endswith('/'), [])
+        while stack[-1][0] >= level:
+            stack.pop()
+        stack[-1][1].append(node)
+        stack.append((level, node[2]))
+    return lines[0], root
+
+
+def _count_entries(children):
+    return sum(1 + _count_entries(grandchildren) for _, _, grandchildren in children)
+
+
+def compress_file_tree(file_tree, max_siblings=20, max_depth=None):
+    """
+    Compacts render_file_tree() output: directories list at most
+    `max_siblings` entries before a "... N more" line, vendored or
+    build directories (VENDORED_DIRS) and directories deeper than
+    `max_depth` are shown with an entry count instead of their contents.
+    """
+    root_line, root = _parse_file_tree(file_tree)
+    lines = [root_line] if root_line else []
+
+    def render(children, level):
+        indent = "    " * level + "|-- "
+        for name, is_dir, grandchildren in children[:max_siblings]:
+            if not is_dir:
+                lines.append(f"{indent}{name}")
+            elif grandchildren and (name in VENDORED_DIRS or (max_depth is not None and level + 1 >= max_depth)):
+                lines.append(f"{indent}{name}/ ({_count_entries(grandchildren)} entries)")
+            else:
+                lines.append(f"{indent}{name}/")
+                render(grandchildren, level + 1)
+        if len(children) > max_siblings:
+            hidden = children[max_siblings:]
+            lines.append(f"{indent}... {_count_entries(hidden)} more entries")
+
+    render(root, 0)
+    return "\n".join(lines) + "\n"
+
+
+def summarize_mermaid(mermaid_graph, top=10):
+    """
+    Describes a CCG Mermaid diagram in a few lines: node and edge counts
+    plus the most called functions/classes (or, for a collapsed diagram,
+    the heaviest package dependencies).
+    """
+    labels = {}
+    counts = {'files': 0, 'functions': 0, 'classes': 0, 'packages': 0}
+    defines = calls = 0
+    callers = {}
+    package_edges = []
+
+    for line in mermaid_graph.splitlines():
+        match = _EDGE.match(line)
+        if match:
+            source, weight, edge_type, target = match.groups()
+            if weight is not None:
+                package_edges.append((int(weight), edge_type, source, target))
+            elif '-- defines -->' in line:
+                defines += 1
+            else:
+                calls += 1
+                callers[target] = callers.get(target, 0) + 1
+            continue
+        for pattern, kind, suffix in ((_FILE_NODE, 'files', ''), (_FUNCTION_NODE, 'functions', '()'),
+                                      (_PACKAGE_NODE, 'packages', ''), (_CLASS_NODE, 'classes', '')):
+            match = pattern.match(line)
+            if match:
+                counts[kind] += 1
+                labels[match.group(1)] = match.group(2) + suffix
+                if kind == 'packages' and match.group(3):
+                    labels[match.group(1)] += f" ({match.group(3)})"
+                break
+
+    if counts['packages']:
+        lines = [f"Collapsed graph of {counts['packages']} packages:"]
+        lines += [f"- {labels[node]}" for node in sorted(labels)[:top]]
+        ranked = sorted(package_edges, reverse=True)[:top]
+        if ranked:
+            lines.append("Heaviest package dependencies:")
+            lines += [f"- {labels.get(u, u)} -> {labels.get(v, v)}: {weight} {kind}"
+                      for weight, kind, u, v in ranked]
+        return "\n".join(lines) + "\n"
+
+    lines = [
+        f"{_count(counts['files'], 'file', 'files')}, {_count(counts['functions'], 'function', 'functions')} "
+        f"and {_count(counts['classes'], 'class', 'classes')}, linked by {defines} 'defines' and {calls} 'calls' edges."
+    ]
+    ranked = sorted(callers.items(), key=lambda item: (-item[1], labels.get(item[0], item[0])))[:top]
+    if ranked:
+        lines.append("Most called:")
+        lines += [f"- {labels.get(node, node)}: called from {_count(count, 'place', 'places')}" for node, count in ranked]
+    return "\n".join(lines) + "\n"
+
+
+def truncate_to_tokens(text, max_tokens, count_tokens=estimate_tokens):
+    """Keeps whole lines of `text` up to `max_tokens`, noting what was cut."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    kept = []
+    used = count_tokens("... (truncated)\n")
+    for line in text.splitlines(keepends=True):
+        cost = count_tokens(line)
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return "".join(kept) + "... (truncated)\n"
+
+
+class PromptBuilder:
+    """
+    Assembles an LLM prompt from titled sections within `token_budget`
+    tokens, counted with `count_tokens` (estimate_tokens by default; a
+    model's own counter can be passed instead).
+
+    A section whose text repeats an earlier one is replaced by a
+    reference to it. While the prompt is over budget, the lowest
+    priority section that still has a more compact variant is swapped
+    for it, and as a last resort sections are truncated, lowest
+    priority first. build() returns the prompt and a report of how many
+    tokens this saved compared with pasting every section in full.
+    """
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET, count_tokens=estimate_tokens):
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens
+        self.sections = []
+
+    def add(self, title, text, priority=0, variants=(), original=None):
+        """
+        Adds a section. `variants` are progressively more compact
+        renderings of `text`, each a string or a zero-argument callable,
+        used only if the prompt would otherwise exceed the budget.
+        `original` is the uncompacted material `text` was derived from,
+        if any, for the savings report.
+        """
+        self.sections.append({
+            "title": title,
+            "raw": text if original is None else original,
+            "text": text,
+            "priority": priority,
+            "variants": list(variants),
+        })
+
+    def _render(self, header, footer):
+        parts = [header.rstrip() + "\n"]
+        for section in self.sections:
+            parts.append(f"\n---\n**{section['title']}:**\n{section['text'].rstrip()}\n")
+        parts.append("\n---\n" + footer.strip() + "\n")
+        return "".join(parts)
+
+    def build(self, header, footer=""):
+        """Returns (prompt, report); see the class docstring."""
+        original = self.count_tokens(header) + self.count_tokens(footer) + sum(
+            self.count_tokens(section["raw"]) for section in self.sections
+        )
+
+        seen = {}
+        for section in self.sections:
+            key = " ".join(section["text"].split())
+            if key in seen:
+                section["text"] = f"(Same as **{seen[key]}** above.)"
+                section["variants"] = []
+            elif key:
+                seen[key] = section["title"]
+
+        by_priority = sorted(self.sections, key=lambda section: section["priority"])
+        prompt = self._render(header, footer)
+        while self.count_tokens(prompt) > self.token_budget:
+            shrinkable = [section for section in by_priority if section["variants"]]
+            if not shrinkable:
+                break
+            variant = shrinkable[0]["variants"].pop(0)
+            shrinkable[0]["text"] = variant() if callable(variant) else variant
+            prompt = self._render(header, footer)
+
+        for section in by_priority:
+            excess = self.count_tokens(prompt) - self.token_budget
+            if excess <= 0:
+                break
+            allowed = max(0, self.count_tokens(section["text"]) - excess)
+            section["text"] = truncate_to_tokens(section["text"], allowed, self.count_tokens)
+            prompt = self._render(header, footer)
+
+        tokens = self.count_tokens(prompt)
+        report = {
+            "original_tokens": original,
+            "prompt_tokens": tokens,
+            "saved_tokens": max(0, original - tokens),
+            "token_budget": self.token_budget,
+        }
+        return prompt, report
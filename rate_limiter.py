@@ -0,0 +1,26 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Spaces calls evenly so that no more than `per_minute` start in any
+    minute, across all threads sharing the limiter.
+    """
+    def __init__(self, per_minute):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.interval = 60.0 / per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until the caller may start its call; returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
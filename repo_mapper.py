@@ -1,55 +1,69 @@
 import os
-import shutil
-import stat
-from git import Repo, GitCommandError
+from git import Git, Repo, GitCommandError
+from clone_workspace import CloneWorkspace
+from instrumentation import Instrumentation
+from repo_scanner import (
+    HEADER_BYTES, GitIgnore, RepoScanner, ScanEntry, analyzable_language, is_excluded, render_file_tree
+)
 
-IGNORE_DIRS = ['.git', 'node_modules', '.venv', 'venv', '__pycache__', '.vscode']
-IGNORE_FILES = ['.DS_Store']
+SYMLINK_MODE = 0o120000
 
-def _remove_readonly(func, path, exc_info):
+
+def remote_head_sha(github_url):
     """
-    Error handler for shutil.rmtree.
-    If the error is due to a read-only file, it changes the permissions
-    and tries to remove it again. This is crucial for Windows.
+    Asks the remote for its HEAD commit with `git ls-remote`, without
+    cloning. Returns the SHA, or None if the remote can't be reached.
     """
-    if not os.access(path, os.W_OK):
-        os.chmod(path, stat.S_IWRITE)
-        func(path)
-    else:
-        raise
+    try:
+        output = Git().ls_remote(github_url, 'HEAD')
+    except GitCommandError as e:
+        print(f"Could not read the remote HEAD of {github_url}: {e}")
+        return None
+    return output.split()[0] if output.strip() else None
+
 
 class RepoMapper:
-    def __init__(self, github_url, doc_genie=None):
+    """
+    Clones a repository and maps its file structure.
+
+    With `no_checkout=True` the repo is cloned bare and never checked
+    out: the file tree, README and Python sources are all read from the
+    HEAD tree object instead of a working tree.
+
+    Clone, scan and README timings go to `instrumentation`.
+    """
+    def __init__(self, github_url, doc_genie=None, workspace=None, no_checkout=False, instrumentation=None):
         self.github_url = github_url
         self.repo_name = github_url.split('/')[-1].replace('.git', '')
-        self.local_repo_path = f"./temp_repo_{self.repo_name}"
+        self.workspace = workspace or CloneWorkspace()
+        self.no_checkout = no_checkout
+        self.local_repo_path = self.workspace.path_for(github_url, bare=no_checkout)
+        self.source_files = []
+        self._blob_loaders = {}
         self.file_tree = ""
         self.doc_genie = doc_genie 
         self.readme_content = "" 
+        self.head_sha = None
+        self.previous_sha = None
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+
+    def reserve_workspace(self):
+        """Context manager holding this repo's workspace for one job; see CloneWorkspace.reserve."""
+        return self.workspace.reserve(self.github_url, bare=self.no_checkout)
 
     def clone_repo(self):
         """
-        Clones the public GitHub repository to a local path.
+        Clones the public GitHub repository into its managed workspace.
+        If the workspace already holds a clone of this repo it is fetched
+        and reset instead, and its previous HEAD is kept in `previous_sha`.
         Returns True on success, False on failure.
         """
         try:
-            if os.path.exists(self.local_repo_path):
-                print(f"Removing old repo at {self.local_repo_path}...")
-                shutil.rmtree(self.local_repo_path, onerror=_remove_readonly)
-                print("Old repo removed successfully.")
-                
-            print(f"Cloning {self.github_url} into {self.local_repo_path}...")
-            Repo.clone_from(self.github_url, self.local_repo_path)
-            print("Clone successful.")
-            
-            readme_path = os.path.join(self.local_repo_path, 'README.md')
-            if os.path.exists(readme_path):
-                with open(readme_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    self.readme_content = f.read()
-            else:
-                self.readme_content = "No README.md file found."
-
-            
+            with self.instrumentation.span("clone"):
+                self.local_repo_path, self.previous_sha, self.head_sha = self.workspace.checkout(
+                    self.github_url, bare=self.no_checkout
+                )
+                self._read_readme()
             return True
         except GitCommandError as e:
             print(f"Error cloning repo: {e}")
@@ -58,41 +72,141 @@ class RepoMapper:
             print(f"An unexpected error occurred during cloning or cleanup: {e}")
             return False
 
+    def _read_readme(self):
+        if self.no_checkout:
+            try:
+                blob = Repo(self.local_repo_path).head.commit.tree / 'README.md'
+                self.readme_content = blob.data_stream.read().decode('utf-8', errors='ignore')
+            except KeyError:
+                self.readme_content = "No README.md file found."
+            return
+
+        readme_path = os.path.join(self.local_repo_path, 'README.md')
+        if os.path.exists(readme_path):
+            with open(readme_path, 'r', encoding='utf-8', errors='ignore') as f:
+                self.readme_content = f.read()
+        else:
+            self.readme_content = "No README.md file found."
+
+    def get_changed_files(self, old_sha, new_sha=None):
+        """
+        Diffs two commits of the local checkout (new_sha defaults to HEAD).
+        Returns {"added": [...], "modified": [...], "deleted": [...]} with
+        repo-relative paths, or None if the diff cannot be computed
+        (e.g. old_sha is not in the local object store).
+        """
+        new_sha = new_sha or self.head_sha
+        changes = {"added": [], "modified": [], "deleted": []}
+        if old_sha == new_sha:
+            return changes
+        try:
+            # -z keeps paths verbatim; without it git quotes non-ASCII names.
+            output = Repo(self.local_repo_path).git.diff('--name-status', '-z', '-M', old_sha, new_sha)
+        except GitCommandError as e:
+            print(f"Could not diff {old_sha} against {new_sha}: {e}")
+            return None
+
+        # Records are NUL-separated: a status, then one path (two for renames and copies).
+        fields = iter(output.split('\0'))
+        for field in fields:
+            status = field[:1]
+            if not status:
+                continue
+            if status in ('R', 'C'):
+                old_path, new_path = next(fields), next(fields)
+                if status == 'R':
+                    changes["deleted"].append(old_path)
+                changes["added"].append(new_path)
+            elif status == 'A':
+                changes["added"].append(next(fields))
+            elif status == 'D':
+                changes["deleted"].append(next(fields))
+            else:
+                changes["modified"].append(next(fields))
+        return changes
+
     def build_file_tree(self):
         """
         Builds a file-tree representation of the cloned repo.
         Ignores specified directories and files.
+
+        The repo is scanned once; the same manifest also fills
+        `source_files` with (relative_path, source, blob_sha) entries for
+        CodeAnalyzer.analyze_sources, so the analyzer never walks it again.
         """
-        tree_str = f"{self.repo_name}/\n"
-        
-        for root, dirs, files in os.walk(self.local_repo_path, topdown=True):
-            dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
-            files = [f for f in files if f not in IGNORE_FILES]
-
-            relative_path = os.path.relpath(root, self.local_repo_path)
-            if relative_path == ".":
-                level = 0
+        with self.instrumentation.span("build_file_tree"):
+            if self.no_checkout:
+                entries = self._scan_objects()
             else:
-                level = relative_path.count(os.sep) + 1
-            
-            indent = "    " * level + "|-- "
+                entries = RepoScanner(self.local_repo_path).scan()
+
+            self.source_files = []
+            self.file_tree = render_file_tree(self.repo_name, self._collect_sources(entries))
+        self.instrumentation.set("source_files", len(self.source_files))
+        return self.file_tree
+
+    def _collect_sources(self, entries):
+        """Passes manifest entries through, recording the analyzable ones."""
+        for entry in entries:
+            if entry.kind == 'file':
+                self.instrumentation.count("files_scanned")
+            if entry.language is not None:
+                if self.no_checkout:
+                    source = self._blob_loaders.pop(entry.path)
+                else:
+                    source = os.path.join(self.local_repo_path, entry.path)
+                self.source_files.append((entry.path, source, entry.hash))
+            yield entry
+
+    def _scan_objects(self):
+        """
+        Streams the HEAD tree object of a bare clone as manifest entries,
+        in the same order and with the same rules as RepoScanner
+        (.gitignore files, generated and binary files). Only the headers
+        of candidate source files are read; full blob contents are only
+        read if the analyzer needs to parse them.
+        """
+        self._blob_loaders = {}
+        pending = [(Repo(self.local_repo_path).head.commit.tree, 0, [])]
+
+        while pending:
+            tree, level, ignores = pending.pop()
+            gitignore = self._tree_gitignore(tree)
+            if gitignore is not None and gitignore.rules:
+                ignores = ignores + [(f"{tree.path}/" if tree.path else "", gitignore)]
+            subtrees = [t for t in tree.trees if not is_excluded(t.path, True, ignores)]
+            blobs = [b for b in tree.blobs if not is_excluded(b.path, False, ignores)]
+
+            for subtree in subtrees:
+                yield ScanEntry(subtree.path, 'dir', 0, None, None, level)
+            for blob in blobs:
+                language = analyzable_language(blob.path, blob.size, blob.mode == SYMLINK_MODE,
+                                               lambda blob=blob: blob.data_stream.read(HEADER_BYTES))
+                if language is None:
+                    yield ScanEntry(blob.path, 'file', blob.size, None, None, level)
+                    continue
+                self._blob_loaders[blob.path] = lambda blob=blob: blob.data_stream.read()
+                yield ScanEntry(blob.path, 'file', blob.size, language, blob.hexsha, level)
 
-            for d in dirs:
-                tree_str += f"{indent}{d}/\n"
-            
-            for f in files:
-                tree_str += f"{indent}{f}\n"
+            # Reversed so the stack visits subtrees in order, like RepoScanner.
+            pending.extend((subtree, level + 1, ignores) for subtree in reversed(subtrees))
 
-        self.file_tree = tree_str
-        return tree_str
+    @staticmethod
+    def _tree_gitignore(tree):
+        """Returns the GitIgnore of a tree's .gitignore blob, or None."""
+        for blob in tree.blobs:
+            if blob.name == '.gitignore':
+                text = blob.data_stream.read().decode('utf-8', errors='ignore')
+                return GitIgnore(text.splitlines())
+        return None
 
     def get_readme_summary(self):
         """
         Summarizes the README using the DocGenie agent.
         """
         if self.doc_genie:
-           
-            return self.doc_genie.summarize_readme(self.readme_content)
+            with self.instrumentation.span("readme_summary"):
+                return self.doc_genie.summarize_readme(self.readme_content)
         else:
   
             print("Warning: DocGenie not provided. Using placeholder summary.")
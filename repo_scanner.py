@@ -0,0 +1,267 @@
+import os
+import re
+import stat
+from collections import namedtuple
+from parse_cache import blob_sha
+from languages import language_for
+
+IGNORE_DIRS = ['.git', 'node_modules', '.venv', 'venv', '__pycache__', '.vscode']
+IGNORE_FILES = ['.DS_Store']
+
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+HEADER_BYTES = 8192
+GENERATED_MARKERS = (b'@generated', b'DO NOT EDIT', b'Code generated by', b'autogenerated')
+
+# One manifest entry. `level` is the depth of the entry's parent directory
+# (0 for the repo root). `language` and `hash` are only set for source
+# files the analyzer should parse; `hash` is the git blob SHA-1.
+ScanEntry = namedtuple('ScanEntry', ['path', 'kind', 'size', 'language', 'hash', 'level'])
+
+
+def _looks_generated_or_binary(header):
+    if b'\0' in header:
+        return True
+    head = header[:1024]
+    return any(marker in head for marker in GENERATED_MARKERS)
+
+
+def _read_header(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read(HEADER_BYTES)
+
+
+def is_excluded(relative_path, is_dir, ignores):
+    """
+    True if a path is left out of the manifest: by IGNORE_DIRS/IGNORE_FILES
+    or by `ignores`, a list of (base directory, GitIgnore) from the root
+    down, where later (deeper) rules win.
+    """
+    name = relative_path.rsplit('/', 1)[-1]
+    if name in (IGNORE_DIRS if is_dir else IGNORE_FILES):
+        return True
+    ignored = False
+    for base, gitignore in ignores:
+        result = gitignore.match(relative_path[len(base):], is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def analyzable_language(relative_path, size, is_symlink, read_header, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """
+    Returns the language to analyze a file as, or None for files that are
+    listed but not analyzed: unknown languages, symlinks, files over
+    `max_file_size`, and binary or generated files. `read_header()`
+    returns the file's first HEADER_BYTES and is only called if needed.
+    """
+    language = language_for(relative_path)
+    if language is None or is_symlink or size > max_file_size:
+        return None
+    if _looks_generated_or_binary(read_header()):
+        return None
+    return language
+
+
+def _translate_pattern(pattern):
+    """Translates one .gitignore glob into a regular expression body."""
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == n:
+            out.append('(?:/.*)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class GitIgnore:
+    """
+    The rules of one .gitignore file, matched against paths relative to
+    the directory that contains it. Supports comments, negation, `/`
+    anchoring, directory-only patterns and `**`.
+    """
+    def __init__(self, lines):
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip('\r')
+            if not line.strip() or line.startswith('#'):
+                continue
+            line = line.rstrip()
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            line = line.lstrip('/')
+            body = _translate_pattern(line)
+            regex = f"^{body}$" if anchored else f"^(?:.*/)?{body}$"
+            self.rules.append((re.compile(regex), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+
+    def match(self, relative_path, is_dir):
+        """Returns True (ignored), False (re-included) or None (no rule matched)."""
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative_path):
+                result = not negate
+        return result
+
+
+class RepoScanner:
+    """
+    Walks a checked-out repository once and streams a manifest of
+    ScanEntry records that both the file-tree renderer and the code
+    analyzer consume, so they share the same ignore rules.
+
+    Honors nested .gitignore files plus IGNORE_DIRS/IGNORE_FILES. Source
+    files that are binary, generated or larger than `max_file_size` are
+    still listed but get no language, so they are not analyzed; the
+    check only reads the first few KB of each candidate file.
+    """
+    def __init__(self, repo_path, max_file_size=DEFAULT_MAX_FILE_SIZE, compute_hashes=True):
+        self.repo_path = repo_path
+        self.max_file_size = max_file_size
+        self.compute_hashes = compute_hashes
+
+    def scan(self):
+        """
+        Yields ScanEntry records. Within each directory its child
+        directories come first, then its files, then the contents of each
+        child directory in order.
+        """
+        yield from self._scan_dir(self.repo_path, "", 0, [])
+
+    def _scan_dir(self, dir_path, relative_dir, level, ignores):
+        gitignore = GitIgnore.from_file(os.path.join(dir_path, '.gitignore'))
+        if gitignore is not None and gitignore.rules:
+            ignores = ignores + [(relative_dir, gitignore)]
+
+        try:
+            with os.scandir(dir_path) as it:
+                children = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Warning: Could not list {dir_path}. Error: {e}")
+            return
+
+        dirs, files = [], []
+        for child in children:
+            is_dir = child.is_dir(follow_symlinks=False)
+            if is_excluded(f"{relative_dir}{child.name}", is_dir, ignores):
+                continue
+            (dirs if is_dir else files).append(child)
+
+        for child in dirs:
+            yield ScanEntry(f"{relative_dir}{child.name}", 'dir', 0, None, None, level)
+        for child in files:
+            yield self._file_entry(child.path, f"{relative_dir}{child.name}", level)
+        for child in dirs:
+            yield from self._scan_dir(child.path, f"{relative_dir}{child.name}/", level + 1, ignores)
+
+    def entry_for(self, relative_path):
+        """
+        Builds the manifest entry for one file, applying the same ignore
+        rules as scan(). Returns None if the file is ignored or missing.
+        """
+        parts = relative_path.split('/')
+        ignores = []
+        for depth, name in enumerate(parts):
+            base = "".join(f"{part}/" for part in parts[:depth])
+            gitignore = GitIgnore.from_file(os.path.join(self.repo_path, base, '.gitignore'))
+            if gitignore is not None and gitignore.rules:
+                ignores.append((base, gitignore))
+            if is_excluded(base + name, depth < len(parts) - 1, ignores):
+                return None
+
+        file_path = os.path.join(self.repo_path, *parts)
+        if not os.path.isfile(file_path):
+            return None
+        return self._file_entry(file_path, relative_path, len(parts) - 1)
+
+    def _file_entry(self, file_path, relative_path, level):
+        try:
+            info = os.lstat(file_path)
+        except OSError:
+            return ScanEntry(relative_path, 'file', 0, None, None, level)
+
+        size = info.st_size
+        try:
+            language = analyzable_language(relative_path, size, stat.S_ISLNK(info.st_mode),
+                                           lambda: _read_header(file_path), self.max_file_size)
+            if language is None:
+                return ScanEntry(relative_path, 'file', size, None, None, level)
+            content_hash = None
+            if self.compute_hashes:
+                with open(file_path, 'rb') as f:
+                    content_hash = blob_sha(f.read())
+        except OSError as e:
+            print(f"Warning: Could not read {relative_path}. Error: {e}")
+            return ScanEntry(relative_path, 'file', size, None, None, level)
+        return ScanEntry(relative_path, 'file', size, language, content_hash, level)
+
+
+def render_file_tree(repo_name, entries):
+    """
+    Renders manifest entries as the indented text tree used in the docs.
+    Each directory's contents are nested directly below it (its
+    subdirectories first, then its files), so the indentation alone
+    says where every entry lives; prompt_builder.compress_file_tree
+    relies on that.
+    """
+    children = {}
+    for entry in entries:
+        parent = entry.path.rsplit('/', 1)[0] if '/' in entry.path else ""
+        children.setdefault(parent, []).append(entry)
+
+    lines = [f"{repo_name}/\n"]
+    pending = [iter(children.get("", []))]
+    while pending:
+        entry = next(pending[-1], None)
+        if entry is None:
+            pending.pop()
+            continue
+        indent = "    " * entry.level + "|-- "
+        suffix = "/" if entry.kind == 'dir' else ""
+        lines.append(f"{indent}{os.path.basename(entry.path)}{suffix}\n")
+        if entry.kind == 'dir':
+            pending.append(iter(children.get(entry.path, [])))
+    return "".join(lines)
@@ -0,0 +1,298 @@
+import os
+import sqlite3
+import threading
+import time
+from artifact_store import DEFAULT_ARTIFACT_DIR
+
+DEFAULT_SYMBOL_INDEX_PATH = os.path.join(DEFAULT_ARTIFACT_DIR, "symbols.sqlite")
+DEFAULT_SEARCH_LIMIT = 50
+# Share of a query's trigrams a name must contain to count as a fuzzy match.
+MIN_TRIGRAM_SHARE = 0.5
+# Names looked up per query; stays below SQLite's bound parameter limit.
+NAME_LOOKUP_BATCH = 500
+
+# Symbol kind -> the API reference key listing them.
+KINDS = {"class": "classes", "function": "functions"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    repo_name TEXT NOT NULL,
+    commit_sha TEXT,
+    updated REAL NOT NULL,
+    symbol_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    short_name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS trigrams (
+    trigram TEXT NOT NULL,
+    name_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, name_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    repo_id INTEGER NOT NULL,
+    name_id INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name_id);
+CREATE INDEX IF NOT EXISTS symbols_repo ON symbols (repo_id, file);
+"""
+_SYMBOL_COLUMNS = "r.url, r.repo_name, r.commit_sha, s.file, s.name, s.kind"
+
+
+def short_name(name):
+    """The searchable part of a qualified name: `Class.method` -> "method", lower-cased."""
+    return name.rsplit('.', 1)[-1].lower()
+
+
+def trigrams(text):
+    """Returns the set of trigrams of `text`, padded so its start and end count too."""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _symbols_of(api_reference):
+    """{file: {"classes", "functions"}} -> set of (file, name, kind)."""
+    return {
+        (file_path, name, kind)
+        for file_path, symbols in api_reference.items()
+        for kind, key in KINDS.items()
+        for name in symbols.get(key, [])
+    }
+
+
+class SymbolIndex:
+    """
+    Persistent, cross-repository index of the classes and functions found
+    by CodeAnalyzer, answering "which repos define `RepoMapper`" without
+    re-running an analysis.
+
+    Each repository is indexed at the commit it was last documented at;
+    update() only writes the symbols that changed since then. Lookups go
+    through an inverted index: distinct lower-cased simple names (exact
+    and prefix matches use their B-tree) and the trigrams of those names
+    (fuzzy matches). Because names are shared by every repo defining
+    them, the trigram table grows with the vocabulary, not with the
+    number of symbols. Safe to share between threads.
+    """
+    def __init__(self, path=DEFAULT_SYMBOL_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def update(self, url, repo_name, commit_sha, api_reference):
+        """
+        Brings the index for repository `url` up to date with an analysis
+        result, given as CodeAnalyzer.get_api_reference() data. Only
+        symbols added or removed since the last update are written.
+        Returns {"added": n, "removed": n}.
+        """
+        wanted = _symbols_of(api_reference)
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT id FROM repos WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                repo_id = self.conn.execute(
+                    "INSERT INTO repos (url, repo_name, commit_sha, updated) VALUES (?, ?, ?, ?)",
+                    (url, repo_name, commit_sha, time.time())
+                ).lastrowid
+            else:
+                repo_id = row[0]
+            existing = {
+                (file_path, name, kind): (symbol_id, name_id)
+                for symbol_id, name_id, file_path, name, kind in self.conn.execute(
+                    "SELECT id, name_id, file, name, kind FROM symbols WHERE repo_id = ?", (repo_id,)
+                )
+            }
+
+            removed = [existing[symbol] for symbol in existing.keys() - wanted]
+            self.conn.executemany("DELETE FROM symbols WHERE id = ?", [(symbol_id,) for symbol_id, _ in removed])
+            self._drop_unused_names({name_id for _, name_id in removed})
+
+            added = wanted - existing.keys()
+            name_ids = self._name_ids({short_name(name) for _, name, _ in added})
+            self.conn.executemany(
+                "INSERT INTO symbols (repo_id, name_id, file, name, kind) VALUES (?, ?, ?, ?, ?)",
+                [(repo_id, name_ids[short_name(name)], file_path, name, kind) for file_path, name, kind in added]
+            )
+            self.conn.execute(
+                "UPDATE repos SET repo_name = ?, commit_sha = ?, updated = ?, symbol_count = ? WHERE id = ?",
+                (repo_name, commit_sha, time.time(), len(wanted), repo_id)
+            )
+        return {"added": len(added), "removed": len(removed)}
+
+    def _name_ids(self, keys):
+        """Returns {short name: id} for `keys`, adding new names and their trigrams."""
+        ids = self._lookup_names(keys)
+        new = sorted(keys - ids.keys())
+        if new:
+            self.conn.executemany("INSERT INTO names (short_name) VALUES (?)", [(key,) for key in new])
+            added = self._lookup_names(new)
+            self.conn.executemany(
+                "INSERT INTO trigrams (trigram, name_id) VALUES (?, ?)",
+                [(trigram, name_id) for key, name_id in added.items() for trigram in trigrams(key)]
+            )
+            ids.update(added)
+        return ids
+
+    def _lookup_names(self, keys):
+        keys = list(keys)
+        ids = {}
+        for start in range(0, len(keys), NAME_LOOKUP_BATCH):
+            batch = keys[start:start + NAME_LOOKUP_BATCH]
+            ids.update(self.conn.execute(
+                f"SELECT short_name, id FROM names WHERE short_name IN ({', '.join('?' * len(batch))})", batch
+            ))
+        return ids
+
+    def _drop_unused_names(self, name_ids):
+        """Removes names (and their trigrams) no symbol uses any more."""
+        for name_id in name_ids:
+            if self.conn.execute("SELECT 1 FROM symbols WHERE name_id = ? LIMIT 1", (name_id,)).fetchone():
+                continue
+            row = self.conn.execute("SELECT short_name FROM names WHERE id = ?", (name_id,)).fetchone()
+            if row is None:
+                continue
+            self.conn.executemany(
+                "DELETE FROM trigrams WHERE trigram = ? AND name_id = ?",
+                [(trigram, name_id) for trigram in trigrams(row[0])]
+            )
+            self.conn.execute("DELETE FROM names WHERE id = ?", (name_id,))
+
+    def remove_repo(self, url):
+        """Drops repository `url` and its symbols from the index."""
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT id FROM repos WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return
+            name_ids = {name_id for (name_id,) in self.conn.execute(
+                "SELECT DISTINCT name_id FROM symbols WHERE repo_id = ?", (row[0],)
+            )}
+            self.conn.execute("DELETE FROM symbols WHERE repo_id = ?", (row[0],))
+            self.conn.execute("DELETE FROM repos WHERE id = ?", (row[0],))
+            self._drop_unused_names(name_ids)
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT, kind=None, repo_url=None):
+        """
+        Finds symbols by name, case-insensitively, best matches first:
+        names equal to the query, then names starting with it, then names
+        sharing at least MIN_TRIGRAM_SHARE of its trigrams. A dotted query
+        (`Class.method`) is looked up by its last part, and its exact
+        matches must end with the whole qualified name.
+        `kind` ("class" or "function") and `repo_url` narrow the results.
+
+        Returns up to `limit` dicts with the repository's url, name and
+        indexed commit, and the symbol's file, qualified name, kind and
+        match ("exact", "prefix" or "fuzzy").
+        """
+        query = query.strip()
+        if not query:
+            return []
+        key = short_name(query)
+        results = []
+        with self._lock:
+            for name_id, match in self._matching_names(key, limit):
+                results.extend(self._symbols_named(name_id, match, query, kind, repo_url, limit - len(results)))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def definitions(self, name, kind=None):
+        """Returns every indexed definition of `name` (simple or qualified), e.g. all classes named RepoMapper."""
+        with self._lock:
+            row = self.conn.execute("SELECT id FROM names WHERE short_name = ?", (short_name(name),)).fetchone()
+            if row is None:
+                return []
+            return self._symbols_named(row[0], "exact", name, kind, None, None)
+
+    def _matching_names(self, key, limit):
+        """Yields (name_id, match) for names matching `key`, best first."""
+        seen = set()
+        row = self.conn.execute("SELECT id FROM names WHERE short_name = ?", (key,)).fetchone()
+        if row is not None:
+            seen.add(row[0])
+            yield row[0], "exact"
+
+        # A range scan over the names index; '\U0010ffff' sorts after any character.
+        for (name_id,) in self.conn.execute(
+                "SELECT id FROM names WHERE short_name > ? AND short_name < ? ORDER BY short_name LIMIT ?",
+                (key, key + '\U0010ffff', limit)):
+            if name_id not in seen:
+                seen.add(name_id)
+                yield name_id, "prefix"
+
+        if len(key) < 3:
+            return
+        grams = sorted(trigrams(key))
+        needed = max(1, int(len(grams) * MIN_TRIGRAM_SHARE + 0.5))
+        placeholders = ", ".join("?" * len(grams))
+        for (name_id,) in self.conn.execute(
+                f"SELECT name_id FROM trigrams WHERE trigram IN ({placeholders})"
+                " GROUP BY name_id HAVING COUNT(*) >= ? ORDER BY COUNT(*) DESC, name_id LIMIT ?",
+                grams + [needed, limit + len(seen)]):
+            if name_id not in seen:
+                seen.add(name_id)
+                yield name_id, "fuzzy"
+
+    def _symbols_named(self, name_id, match, query, kind, repo_url, limit):
+        sql = f"SELECT {_SYMBOL_COLUMNS} FROM symbols s JOIN repos r ON r.id = s.repo_id WHERE s.name_id = ?"
+        params = [name_id]
+        if kind is not None:
+            sql += " AND s.kind = ?"
+            params.append(kind)
+        if repo_url is not None:
+            sql += " AND r.url = ?"
+            params.append(repo_url)
+        sql += " ORDER BY r.repo_name, s.file, s.name"
+
+        qualified = query.lower() if '.' in query else None
+        results = []
+        for url, repo_name, commit_sha, file_path, name, symbol_kind in self.conn.execute(sql, params):
+            if qualified is not None and match == "exact":
+                lowered = name.lower()
+                if lowered != qualified and not lowered.endswith('.' + qualified):
+                    continue
+            results.append({
+                "repo_url": url,
+                "repo_name": repo_name,
+                "commit_sha": commit_sha,
+                "file": file_path,
+                "name": name,
+                "kind": symbol_kind,
+                "match": match,
+            })
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def repos(self):
+        """Returns the indexed repositories, most recently updated first."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT url, repo_name, commit_sha, updated, symbol_count FROM repos ORDER BY updated DESC"
+            ).fetchall()
+        return [
+            {"url": url, "repo_name": repo_name, "commit_sha": commit_sha, "updated": updated,
+             "symbol_count": symbol_count}
+            for url, repo_name, commit_sha, updated, symbol_count in rows
+        ]
+
+    def count(self):
+        """Returns the number of indexed symbols."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+
+    def close(self):
+        self.conn.close()